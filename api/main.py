@@ -1,7 +1,12 @@
+import os
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from api.routes import submit, queue, sms  # Add the sms import
+from api.services.caption_pool import get_caption_pool
+from api.services.events import get_change_feed
+from api.services.scheduler import get_posting_scheduler
+from database.models import init_db, dispose_engines
 
 app = FastAPI(
     title="Maple Handler API",
@@ -23,12 +28,51 @@ app.include_router(submit.router, prefix="/submit", tags=["Submission"])
 app.include_router(queue.router, prefix="/queue", tags=["Queue"])
 app.include_router(sms.router, prefix="/sms", tags=["SMS"])  # Add the SMS router
 
+@app.on_event("startup")
+async def startup():
+    # Create any missing tables and indexes (no-op when schema.sql already ran)
+    init_db()
+    # Load approved senders from the database before the first SMS arrives
+    await sms.sender_allowlist.refresh_from_database()
+    # Periodically write buffered delivery-status callbacks
+    sms.delivery_status_buffer.start()
+    # Send pending notifications as per-recipient digests
+    sms.notification_coalescer.start()
+    # Publish submission changes (from any process) to /queue/stream subscribers
+    get_change_feed().start()
+    # Post scheduled items (one replica at a time holds the scheduler lease)
+    if os.environ.get("SCHEDULER_ENABLED", "true").lower() != "false":
+        get_posting_scheduler().start()
+    
+    # Start filling the caption pool without holding up startup
+    caption_pool = get_caption_pool()
+    if caption_pool:
+        caption_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    caption_pool = get_caption_pool()
+    if caption_pool:
+        await caption_pool.stop()
+    await get_change_feed().stop()
+    await get_posting_scheduler().stop()
+    await get_posting_scheduler().twitter_service.aclose()
+    await sms.notification_coalescer.stop()
+    # Commit any inbound SMS still waiting in the writer
+    await sms.inbound_writer.stop()
+    # Write delivery statuses still held in memory
+    await sms.delivery_status_buffer.stop()
+    await sms.twilio_service.aclose()
+    # Release pooled database connections
+    await dispose_engines()
+
 # Global exception handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.detail},
+        headers=exc.headers,
     )
 
 @app.get("/", tags=["Status"])
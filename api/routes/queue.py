@@ -1,128 +1,567 @@
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import base64
+import json
+import os
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.services.events import get_event_bus
+from api.services.gpt_caption import get_caption_service
+from api.services.jobs import job_values
+from api.services.scheduler import (
+    PostingError, QuotaExceeded, get_posting_scheduler, post_submission, publish_claimed,
+)
+from api.services.waveform import load_peaks
+from database.models import ChangeCounter, Job, SUBMISSIONS_COUNTER, Submission, get_async_db
 
 router = APIRouter()
 
-# Define data models (would normally come from database/models.py)
+VALID_STATUSES = ["processing", "pending", "approved", "posting", "posted", "rejected", "failed"]
+MAX_PAGE_SIZE = 200
+MAX_CHANGES_PAGE = 1000
+MAX_WAVEFORM_WIDTH = 4096
+MAX_CAPTION_CANDIDATES = 10
+MAX_BULK_ITEMS = 1000
+STREAM_KEEPALIVE = float(os.environ.get("QUEUE_STREAM_KEEPALIVE", "15"))
+
+caption_service = get_caption_service()
+posting_scheduler = get_posting_scheduler()
+event_bus = get_event_bus()
+
 class QueueItem(BaseModel):
-    id: str
+    id: int
     filename: Optional[str] = None
     text_content: Optional[str] = None
     transcript: Optional[str] = None
     sound_type: Optional[str] = None
     caption: str
+    caption_candidates: List[dict] = []
     tone: str
     status: str  # "pending", "approved", "posted", "rejected"
+    scheduled_at: Optional[datetime] = None
+    source: Optional[str] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
+
+# Statuses each bulk action may start from (the same rules as the per-item endpoints)
+BULK_ALLOWED_FROM = {
+    "approve": ["pending"],
+    "reject": ["pending", "approved"],
+    "schedule": ["pending", "approved"],
+    "post": ["approved"],
+    "retone": ["pending", "approved"],
+}
+
+class BulkAction(BaseModel):
+    ids: List[int]
+    action: str  # "approve", "reject", "schedule", "post" or "retone"
+    scheduled_at: Optional[datetime] = None  # schedule: time to post at (omit to unschedule)
+    tone: Optional[str] = None  # retone: tone for the new caption (default "auto")
+
+def _to_item(submission: Submission) -> QueueItem:
+    return QueueItem(
+        id=submission.id,
+        filename=submission.filename,
+        text_content=submission.text_content,
+        transcript=submission.transcript,
+        sound_type=submission.sound_type,
+        caption=submission.caption,
+        caption_candidates=json.loads(submission.caption_candidates) if submission.caption_candidates else [],
+        tone=submission.tone,
+        status=submission.status,
+        scheduled_at=submission.scheduled_at,
+        source=submission.source,
+        created_at=submission.created_at,
+        updated_at=submission.updated_at,
+    )
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor."""
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor into (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_change_cursor(version: int, item_id: Optional[int] = None) -> str:
+    """
+    Encode a position in the change feed as an opaque cursor: just after item
+    item_id of a version, or after the whole version if item_id is None.
+    """
+    raw = f"v{version}" if item_id is None else f"v{version}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_change_cursor(cursor: str):
+    """Decode a cursor produced by encode_change_cursor into (version, id or None)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, _, item_id = base64.urlsafe_b64decode(padded).decode().partition("|")
+        if not version.startswith("v"):
+            raise ValueError(version)
+        return int(version[1:]), int(item_id) if item_id else None
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _current_version(session: AsyncSession) -> int:
+    """Latest committed submissions version (one primary-key lookup)."""
+    version = (await session.execute(
+        select(ChangeCounter.value).where(ChangeCounter.name == SUBMISSIONS_COUNTER)
+    )).scalar()
+    return version or 0
+
+async def _get_or_404(session: AsyncSession, item_id: int) -> Submission:
+    submission = await session.get(Submission, item_id)
+    if submission is None:
+        raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    return submission
 
-# Mock data until DB is implemented
-mock_queue = [
-    QueueItem(
-        id="1",
-        filename="sample-whimper-001.wav",
-        transcript="Please use me for your entertainment",
-        sound_type="whimper",
-        caption="Listen to how pathetic she sounds begging for attention.",
-        tone="auto",
-        status="pending",
-        created_at=datetime.now()
-    ),
-    QueueItem(
-        id="2",
-        filename="beg-clip-2.ogg",
-        transcript="I need to be exposed online",
-        sound_type="beg",
-        caption="She claims she \"needs\" to be exposed. Let's oblige.",
-        tone="teasing",
-        status="approved",
-        created_at=datetime.now()
-    ),
-    QueueItem(
-        id="3",
-        text_content="I've been naughty again and need to be punished",
-        caption="My pet has been misbehaving. Public humiliation seems appropriate.",
-        tone="possessive",
-        status="posted",
-        created_at=datetime.now()
+async def _transition(session: AsyncSession, item_id: int, allowed_from: list, values: dict) -> bool:
+    """
+    Atomically update an item by primary key if it is in one of the allowed statuses.
+
+    Returns:
+        bool: True if the row was updated, False if its status did not allow it
+    """
+    result = await session.execute(
+        update(Submission)
+        .where(Submission.id == item_id, Submission.status.in_(allowed_from))
+        .values(updated_at=datetime.utcnow(), **values)
     )
-]
+    await session.commit()
+    return result.rowcount == 1
 
 @router.get("/")
-async def get_queue(status: Optional[str] = Query(None)):
+async def get_queue(
+    request: Request,
+    response: Response,
+    status: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_async_db),
+):
     """
-    Get the current post queue, optionally filtered by status.
+    Get a page of the post queue, newest first, optionally filtered by status.
+    
+    Pages are keyset-paginated on (created_at, id), so each page is a single
+    index range scan regardless of how many historical submissions exist.
+    
+    The ETag is the submissions version, so a poll with If-None-Match gets a
+    304 without reading the page when nothing has changed. The returned
+    cursor can be passed to /queue/changes to fetch only later changes.
     
     Args:
-        status: Filter by item status (pending, approved, posted, rejected)
+        status: Filter by item status (processing, pending, approved, posting, posted, rejected, failed)
+        limit: Maximum number of items to return
+        after: Cursor from a previous page's next_cursor
     """
+    if status and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Valid statuses: {', '.join(VALID_STATUSES)}")
+    
+    version = await _current_version(session)
+    etag = f'W/"{version}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    stmt = select(Submission)
     if status:
-        filtered_queue = [item for item in mock_queue if item.status == status]
-        return {"queue": filtered_queue, "count": len(filtered_queue)}
-    return {"queue": mock_queue, "count": len(mock_queue)}
+        stmt = stmt.where(Submission.status == status)
+    if after:
+        created_at, item_id = decode_cursor(after)
+        stmt = stmt.where(or_(
+            Submission.created_at < created_at,
+            and_(Submission.created_at == created_at, Submission.id < item_id),
+        ))
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(Submission.created_at.desc(), Submission.id.desc()).limit(limit + 1)
+    
+    rows = (await session.execute(stmt)).scalars().all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    
+    return {
+        "queue": [_to_item(row) for row in page],
+        "count": len(page),
+        "next_cursor": next_cursor,
+        "cursor": encode_change_cursor(version),
+    }
+
+@router.get("/changes")
+async def get_changes(
+    since: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=MAX_CHANGES_PAGE),
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get submissions created or updated after a cursor, oldest change first.
+    
+    Every write stamps the submission with the next version, so this is one
+    index range scan on (version, id) and its cost grows with the number of
+    changes, not the size of the queue. With a status filter, changed items
+    that no longer match are returned as tombstones in "removed" (drop them
+    if present). Repeat with the returned cursor while has_more is true.
+    
+    Args:
+        since: Cursor from GET /queue or a previous call (omit to start from the beginning)
+        status: Only return items with this status; others become tombstones
+        limit: Maximum number of changed items to return
+    """
+    if status and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Valid statuses: {', '.join(VALID_STATUSES)}")
+    version, item_id = decode_change_cursor(since) if since else (-1, None)
+    
+    stmt = select(Submission)
+    if item_id is None:
+        stmt = stmt.where(Submission.version > version)
+    else:
+        stmt = stmt.where(or_(
+            Submission.version > version,
+            and_(Submission.version == version, Submission.id > item_id),
+        ))
+    rows = (await session.execute(
+        stmt
+        .order_by(Submission.version, Submission.id)
+        .limit(limit + 1)
+    )).scalars().all()
+    page = rows[:limit]
+    
+    changes = [_to_item(row) for row in page if not status or row.status == status]
+    removed = [row.id for row in page if status and row.status != status]
+    if len(rows) > limit:
+        cursor = encode_change_cursor(page[-1].version, page[-1].id)
+    elif page:
+        cursor = encode_change_cursor(page[-1].version)
+    else:
+        cursor = since or encode_change_cursor(-1)
+    return {"changes": changes, "removed": removed, "cursor": cursor, "has_more": len(rows) > limit}
+
+@router.get("/stream")
+async def stream_queue():
+    """
+    Live queue events as Server-Sent Events.
+    
+    Each event is named after what happened (created, status, caption,
+    posted, updated) and carries a compact JSON body: id, status, caption,
+    tone, source and version. The SSE id is a /queue/changes cursor, so a
+    reconnecting client can catch up with GET /queue/changes?since=<last id>.
+    Everything one statement wrote (a bulk action, say) arrives as a single
+    "bulk" event listing the items. A client that falls too far behind gets
+    a "dropped" event and the stream ends.
+    """
+    subscription = event_bus.subscribe()
+    
+    async def events():
+        try:
+            yield "retry: 3000\nevent: hello\ndata: {}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                data = json.dumps(event, separators=(",", ":"))
+                yield f"id: {encode_change_cursor(event['version'])}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/stream/stats")
+async def stream_stats():
+    """Live feed subscribers and delivery counters for this worker."""
+    return event_bus.get_stats()
+
+@router.get("/scheduler/stats")
+async def scheduler_stats():
+    """Posting scheduler state: leadership, scheduled items and quota waits."""
+    return posting_scheduler.get_stats()
+
+@router.post("/bulk")
+async def bulk_action(body: BulkAction, session: AsyncSession = Depends(get_async_db)):
+    """
+    Apply one action to many queue items in a single transaction.
+    
+    The status check and the change are one set-based UPDATE for the whole
+    batch, so every changed row shares one change version and live
+    subscribers get a single "bulk" event; items left unchanged are explained
+    with one more query. "retone" sends items back to the caption stage (one
+    bulk job insert). "post" claims the items (approved -> posting) in that
+    UPDATE, no more than the posting quota allows, and then posts them
+    concurrently.
+    
+    Returns:
+        dict: Per-item results, in request order, and success/failure counts
+    """
+    if body.action not in BULK_ALLOWED_FROM:
+        raise HTTPException(status_code=400, 
+                            detail=f"Unknown action: {body.action}. Use one of {', '.join(BULK_ALLOWED_FROM)}")
+    ids = list(dict.fromkeys(body.ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(ids) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} ids per request")
+    
+    allowed_from = BULK_ALLOWED_FROM[body.action]
+    values = {"updated_at": datetime.utcnow()}
+    targets = and_(Submission.id.in_(ids), Submission.status.in_(allowed_from))
+    scheduled_at = body.scheduled_at
+    tone = body.tone or "auto"
+    if body.action == "approve":
+        values["status"] = "approved"
+    elif body.action == "reject":
+        values["status"] = "rejected"
+    elif body.action == "schedule":
+        if scheduled_at is not None and scheduled_at.tzinfo is not None:
+            scheduled_at = scheduled_at.astimezone(timezone.utc).replace(tzinfo=None)
+        values["scheduled_at"] = scheduled_at
+    elif body.action == "retone":
+        values.update(status="processing", tone=tone)
+    elif body.action == "post":
+        values.update(status="posting", posting_claimed_at=datetime.utcnow())
+        # Claim no more than fit in the quota window; the rest stay approved
+        room = await posting_scheduler.quota.remaining(session)
+        targets = Submission.id.in_(
+            select(Submission.id).where(targets).order_by(Submission.id).limit(room).scalar_subquery()
+        )
+    
+    # id -> new status
+    changed = dict((await session.execute(
+        update(Submission).where(targets).values(**values).returning(Submission.id, Submission.status)
+    )).all())
+    if body.action == "post" and changed:
+        # A concurrent poster may have claimed since the count; hand back any excess
+        excess = await posting_scheduler.quota.in_use(session) - posting_scheduler.quota.limit
+        if excess > 0:
+            returned = sorted(changed)[-excess:]
+            await session.execute(
+                update(Submission).where(Submission.id.in_(returned))
+                .values(status="approved", posting_claimed_at=None)
+            )
+            for item_id in returned:
+                del changed[item_id]
+    if body.action == "retone" and changed:
+        await session.execute(insert(Job), [job_values(item_id, {"tone": tone}, stage="caption") for item_id in changed])
+    await session.commit()
+    
+    unchanged = [item_id for item_id in ids if item_id not in changed]
+    current = dict((await session.execute(
+        select(Submission.id, Submission.status).where(Submission.id.in_(unchanged))
+    )).all()) if unchanged else {}
+    
+    outcomes = {}
+    if body.action == "post" and changed:
+        posted = await asyncio.gather(
+            *(publish_claimed(posting_scheduler.twitter_service, item_id) for item_id in changed),
+            return_exceptions=True
+        )
+        for item_id, tweet in zip(changed, posted):
+            if isinstance(tweet, Exception):
+                outcomes[item_id] = {"ok": False, "status": "approved",
+                                     "error": f"Posting to Twitter failed: {str(tweet)}"}
+            else:
+                outcomes[item_id] = {"ok": True, "status": "posted", "tweet_url": tweet.url}
+    elif body.action == "schedule" and scheduled_at is not None:
+        for item_id in changed:
+            posting_scheduler.schedule(item_id, scheduled_at)
+    
+    results = []
+    for item_id in ids:
+        if item_id in outcomes:
+            results.append({"id": item_id, **outcomes[item_id]})
+        elif item_id in changed:
+            results.append({"id": item_id, "ok": True, "status": changed[item_id]})
+        elif item_id not in current:
+            results.append({"id": item_id, "ok": False, "error": f"Queue item {item_id} not found"})
+        elif body.action == "post" and current[item_id] == "approved":
+            results.append({"id": item_id, "ok": False, "status": "approved", "error": "Posting quota exhausted"})
+        else:
+            results.append({"id": item_id, "ok": False, "status": current[item_id],
+                            "error": f"Cannot {body.action} item with status: {current[item_id]}"})
+    succeeded = sum(1 for result in results if result["ok"])
+    return {
+        "action": body.action,
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
 
 @router.get("/{item_id}")
-async def get_queue_item(item_id: str):
+async def get_queue_item(item_id: int, session: AsyncSession = Depends(get_async_db)):
     """Get details for a specific queue item."""
-    for item in mock_queue:
-        if item.id == item_id:
-            return item
-    raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    return _to_item(await _get_or_404(session, item_id))
+
+@router.get("/{item_id}/waveform")
+async def get_waveform(
+    item_id: int,
+    request: Request,
+    response: Response,
+    width: int = Query(512, ge=1, le=MAX_WAVEFORM_WIDTH),
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get min/max waveform peaks for an audio item, for drawing a preview.
+    
+    Reads a precomputed peak index (no audio decoding), so the cost depends
+    on the requested width rather than the clip length. Peaks are int8 pairs
+    scaled to [-127, 127].
+    
+    Args:
+        width: Number of peak pairs wanted (typically the preview's pixel width)
+    """
+    item = await _get_or_404(session, item_id)
+    if not item.storage_path:
+        raise HTTPException(status_code=404, detail=f"Queue item {item_id} has no audio")
+    
+    # Audio is content-addressed and never changes, so the response never does either
+    etag = f'"{item.content_hash or item.id}-{width}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    
+    peaks = load_peaks(os.path.splitext(item.storage_path)[0], width)
+    if peaks is None:
+        raise HTTPException(status_code=404, detail=f"Waveform for item {item_id} is not available yet")
+    
+    response.headers.update(cache_headers)
+    return {
+        "id": item.id,
+        "width": len(peaks),
+        "duration_seconds": item.duration_seconds,
+        "min": peaks[:, 0].tolist(),
+        "max": peaks[:, 1].tolist(),
+    }
 
 @router.put("/{item_id}/approve")
-async def approve_item(item_id: str):
+async def approve_item(item_id: int, session: AsyncSession = Depends(get_async_db)):
     """Approve a queue item for posting."""
-    for item in mock_queue:
-        if item.id == item_id:
-            if item.status == "pending":
-                item.status = "approved"
-                return {"status": "success", "message": f"Item {item_id} approved"}
-            else:
-                raise HTTPException(status_code=400, 
-                                  detail=f"Item {item_id} is not pending (current status: {item.status})")
-    raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    if await _transition(session, item_id, ["pending"], {"status": "approved"}):
+        return {"status": "success", "message": f"Item {item_id} approved"}
+    item = await _get_or_404(session, item_id)
+    raise HTTPException(status_code=400, 
+                        detail=f"Item {item_id} is not pending (current status: {item.status})")
 
 @router.put("/{item_id}/reject")
-async def reject_item(item_id: str):
+async def reject_item(item_id: int, session: AsyncSession = Depends(get_async_db)):
     """Reject a queue item."""
-    for item in mock_queue:
-        if item.id == item_id:
-            if item.status in ["pending", "approved"]:
-                item.status = "rejected"
-                return {"status": "success", "message": f"Item {item_id} rejected"}
-            else:
-                raise HTTPException(status_code=400, 
-                                  detail=f"Cannot reject item with status: {item.status}")
-    raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    if await _transition(session, item_id, ["pending", "approved"], {"status": "rejected"}):
+        return {"status": "success", "message": f"Item {item_id} rejected"}
+    item = await _get_or_404(session, item_id)
+    raise HTTPException(status_code=400, 
+                        detail=f"Cannot reject item with status: {item.status}")
 
 @router.put("/{item_id}/post")
-async def post_item(item_id: str):
+async def post_item(item_id: int, session: AsyncSession = Depends(get_async_db)):
     """Post the item to Twitter immediately."""
-    for item in mock_queue:
-        if item.id == item_id:
-            if item.status == "approved":
-                # In production, this would call the twitter service
-                item.status = "posted"
-                return {
-                    "status": "success",
-                    "message": f"Item {item_id} posted to Twitter",
-                    "tweet_url": "https://twitter.com/user/status/123456789"
-                }
-            else:
-                raise HTTPException(status_code=400, 
-                                  detail=f"Only approved items can be posted (current status: {item.status})")
-    raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    try:
+        tweet = await post_submission(posting_scheduler.twitter_service, item_id, posting_scheduler.quota)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after) + 1)})
+    except PostingError:
+        item = await _get_or_404(session, item_id)
+        raise HTTPException(status_code=400, 
+                            detail=f"Only approved items can be posted (current status: {item.status})")
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Posting to Twitter failed: {str(e)}")
+    return {
+        "status": "success",
+        "message": f"Item {item_id} posted to Twitter",
+        "tweet_url": tweet.url
+    }
+
+@router.put("/{item_id}/schedule")
+async def schedule_item(
+    item_id: int,
+    scheduled_at: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Schedule an item to be posted at a given time (UTC), or clear its schedule.
+    
+    Pending items can be scheduled ahead of approval; only approved items are
+    posted when their time comes.
+    
+    Args:
+        scheduled_at: ISO 8601 time to post at; omit to unschedule
+    """
+    if scheduled_at is not None and scheduled_at.tzinfo is not None:
+        scheduled_at = scheduled_at.astimezone(timezone.utc).replace(tzinfo=None)
+    if not await _transition(session, item_id, ["pending", "approved"], {"scheduled_at": scheduled_at}):
+        item = await _get_or_404(session, item_id)
+        raise HTTPException(status_code=400, 
+                            detail=f"Cannot schedule item with status: {item.status}")
+    if scheduled_at is not None:
+        posting_scheduler.schedule(item_id, scheduled_at)
+    return {
+        "status": "success",
+        "message": f"Item {item_id} scheduled for {scheduled_at.isoformat()}" if scheduled_at
+                   else f"Item {item_id} unscheduled",
+        "scheduled_at": scheduled_at,
+    }
 
 @router.put("/{item_id}/caption")
-async def update_caption(item_id: str, caption: str):
+async def update_caption(item_id: int, caption: str, session: AsyncSession = Depends(get_async_db)):
     """Update the caption for a queue item."""
-    for item in mock_queue:
-        if item.id == item_id:
-            if item.status not in ["posted", "rejected"]:
-                item.caption = caption
-                return {"status": "success", "message": f"Caption updated for item {item_id}"}
-            else:
-                raise HTTPException(status_code=400, 
-                                  detail="Cannot update caption for posted or rejected items")
-    raise HTTPException(status_code=404, detail=f"Queue item {item_id} not found")
+    if await _transition(session, item_id, ["pending", "approved"], {"caption": caption}):
+        return {"status": "success", "message": f"Caption updated for item {item_id}"}
+    await _get_or_404(session, item_id)
+    raise HTTPException(status_code=400, 
+                        detail="Cannot update caption for posted or rejected items")
+
+@router.put("/{item_id}/caption/candidates/{index}")
+async def select_caption_candidate(item_id: int, index: int, session: AsyncSession = Depends(get_async_db)):
+    """Use one of the item's stored caption candidates (no model call)."""
+    item = await _get_or_404(session, item_id)
+    candidates = json.loads(item.caption_candidates) if item.caption_candidates else []
+    if not 0 <= index < len(candidates):
+        raise HTTPException(status_code=404, detail=f"Item {item_id} has no caption candidate {index}")
+    candidate = candidates[index]
+    if await _transition(session, item_id, ["pending", "approved"],
+                         {"caption": candidate["caption"], "tone": candidate["tone"]}):
+        return {"status": "success", "message": f"Caption candidate {index} selected for item {item_id}"}
+    raise HTTPException(status_code=400, 
+                        detail="Cannot update caption for posted or rejected items")
+
+@router.post("/{item_id}/caption/candidates")
+async def regenerate_caption_candidates(
+    item_id: int,
+    tones: Optional[List[str]] = Query(None),
+    n: int = Query(3, ge=1, le=MAX_CAPTION_CANDIDATES),
+    session: AsyncSession = Depends(get_async_db),
+):
+    """
+    Replace an item's caption candidates with a fresh batch from one backend request.
+    
+    The current caption is kept; pick a new one with the select endpoint.
+    
+    Args:
+        tones: Tones to spread candidates across (defaults to the preferred tones plus mixed)
+        n: Number of candidates to generate
+    """
+    item = await _get_or_404(session, item_id)
+    candidates = await caption_service.generate_captions(
+        transcript=item.transcript or item.text_content or "",
+        sound_type=item.sound_type or "other",
+        tones=tones,
+        n=n
+    )
+    if not await _transition(session, item_id, ["pending", "approved"],
+                             {"caption_candidates": json.dumps(candidates)}):
+        raise HTTPException(status_code=400, 
+                            detail="Cannot update caption for posted or rejected items")
+    return {"id": item_id, "caption_candidates": candidates}
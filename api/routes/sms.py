@@ -1,104 +1,173 @@
-from fastapi import APIRouter, Request, Form, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import PlainTextResponse
-from typing import Optional
+from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import PlainTextResponse, Response
 import os
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.services.allowlist import SenderAllowlist, SenderThrottle, normalize_phone_number
+from api.services.cache import TTLCache
+from api.services.delivery_status import DeliveryStatusBuffer
+from api.services.notification_digest import NotificationCoalescer, queue_notification
+from api.services.sms_inbox import get_inbound_writer
 from api.services.twilio_service import TwilioService
-from api.services.gpt_caption import CaptionGenerationService
+from database.models import get_async_db
 
 # Get service instances
 twilio_service = TwilioService()
-caption_service = CaptionGenerationService()
+inbound_writer = get_inbound_writer()
+delivery_status_buffer = DeliveryStatusBuffer()
+notification_coalescer = NotificationCoalescer(twilio_service)
 
 router = APIRouter()
 
-# Whitelist of approved phone numbers (for security)
-APPROVED_NUMBERS = os.environ.get("APPROVED_PHONE_NUMBERS", "").split(",")
+# Approved senders (env, file and database; reloaded without restarts)
+sender_allowlist = SenderAllowlist()
+sender_throttle = SenderThrottle()
 
 # For development, allow all numbers if not configured
-if not any(APPROVED_NUMBERS):
+if not sender_allowlist.numbers and not sender_allowlist.use_database:
     print("WARNING: No approved phone numbers configured, all numbers will be accepted")
 
+# Static TwiML replies, built once rather than per request
+ACK_TWIML = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<Response>"
+    "<Message>Your submission has been received and will be reviewed.</Message>"
+    "</Response>"
+)
+UNAUTHORIZED_TWIML = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<Response>"
+    "<Message>Sorry, your number is not authorized to use this service.</Message>"
+    "</Response>"
+)
+THROTTLED_TWIML = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<Response>"
+    "<Message>You're sending too fast. Please wait a minute before submitting again.</Message>"
+    "</Response>"
+)
+ERROR_TWIML = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<Response>"
+    "<Message>An error occurred while processing your submission. Please try again later.</Message>"
+    "</Response>"
+)
+
+# MessageSids seen recently, so Twilio retries are answered without touching the DB.
+# The writer's lookup and the unique index on submissions.message_sid catch
+# retries this cache misses (other workers, restarts).
+recent_message_sids = TTLCache(
+    max_entries=int(os.environ.get("SMS_DEDUP_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.environ.get("SMS_DEDUP_TTL", "3600")),
+)
+webhook_stats = {"received": 0, "duplicates": 0, "throttled": 0}
+
+def _twiml(content: str) -> PlainTextResponse:
+    return PlainTextResponse(content=content, media_type="application/xml")
+
+# Responses are stateless, so the common replies are built once and reused
+ACK_RESPONSE = _twiml(ACK_TWIML)
+UNAUTHORIZED_RESPONSE = _twiml(UNAUTHORIZED_TWIML)
+THROTTLED_RESPONSE = _twiml(THROTTLED_TWIML)
+
 @router.post("/webhook", response_class=PlainTextResponse)
-async def sms_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-    From: str = Form(...),  # Phone number that sent the message
-    Body: str = Form(...),  # Message content
-    To: Optional[str] = Form(None),  # Phone number that received the message
-    MessageSid: Optional[str] = Form(None)  # Twilio message ID
-):
+async def sms_webhook(request: Request):
     """
     Handle incoming SMS messages from Twilio.
     
-    This endpoint receives SMS messages and processes them for the queue.
+    The message is stored and acknowledged straight away; its caption is
+    generated by the background worker (caption stage), so Twilio never waits
+    on the caption model. Retries of the same MessageSid are acknowledged
+    again without creating a second submission.
     """
+    # Parse the form once; validation and the handler share it
+    form = await request.form()
+    
     # Validate that the request is from Twilio
-    if not await twilio_service.validate_webhook(request):
+    if not await twilio_service.validate_webhook(request, form):
         raise HTTPException(status_code=403, detail="Invalid Twilio signature")
     
-    # Check if the sender is in the whitelist (when configured)
-    if APPROVED_NUMBERS and APPROVED_NUMBERS[0] and From not in APPROVED_NUMBERS:
+    body = form.get("Body")
+    message_sid = form.get("MessageSid")
+    if form.get("From") is None or body is None:
+        raise HTTPException(status_code=400, detail="From and Body are required")
+    sender = normalize_phone_number(form.get("From")) or form.get("From")
+    
+    # Check if the sender is approved (when an allowlist is configured)
+    if not sender_allowlist.is_allowed(sender):
         # We respond with TwiML to send a rejection message
-        return PlainTextResponse(
-            content=(
-                "<?xml version='1.0' encoding='UTF-8'?>"
-                "<Response>"
-                "<Message>Sorry, your number is not authorized to use this service.</Message>"
-                "</Response>"
-            ),
-            media_type="application/xml"
-        )
+        return UNAUTHORIZED_RESPONSE
+    
+    webhook_stats["received"] += 1
+    if message_sid and message_sid in recent_message_sids:
+        webhook_stats["duplicates"] += 1
+        return ACK_RESPONSE
     
-    # Process the incoming message
-    try:        # Generate caption from the text
-        caption = await caption_service.generate_caption(
-            transcript=Body,
-            sound_type="sms_entry",
-            tone="auto"  # Use auto tone selection for SMS submissions
-        )
-        
-        # TODO: Store in database
-        # This would be implemented to store the message in your database queue
-        # background_tasks.add_task(store_sms_in_queue, From, Body, caption)
-        
-        # Respond with TwiML to confirm receipt
-        return PlainTextResponse(
-            content=(
-                "<?xml version='1.0' encoding='UTF-8'?>"
-                "<Response>"
-                "<Message>Your submission has been received and will be reviewed. The generated caption is: "
-                f"{caption}</Message>"
-                "</Response>"
-            ),
-            media_type="application/xml"
-        )
+    # One phone flooding the webhook must not swamp captioning and the queue
+    if not sender_throttle.allow(sender):
+        webhook_stats["throttled"] += 1
+        return THROTTLED_RESPONSE
+    
+    try:
+        # Committed (grouped with concurrent messages) before we acknowledge
+        if not await inbound_writer.submit(sender, body, message_sid):
+            webhook_stats["duplicates"] += 1
     except Exception as e:
         # Log the error and respond with error message
         print(f"Error processing SMS: {str(e)}")
-        return PlainTextResponse(
-            content=(
-                "<?xml version='1.0' encoding='UTF-8'?>"
-                "<Response>"
-                "<Message>An error occurred while processing your submission. Please try again later.</Message>"
-                "</Response>"
-            ),
-            media_type="application/xml"
-        )
+        return _twiml(ERROR_TWIML)
+    
+    if message_sid:
+        recent_message_sids.set(message_sid, True)
+    return ACK_RESPONSE
+
+@router.post("/status", status_code=204)
+async def sms_status_callback(request: Request):
+    """
+    Receive Twilio delivery-status callbacks for outbound notifications.
+    
+    Updates are buffered in memory (latest state per MessageSid) and written
+    to notifications in batches, so a burst of callbacks doesn't turn into
+    one UPDATE each.
+    """
+    form = await request.form()
+    if not await twilio_service.validate_webhook(request, form):
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    
+    message_sid = form.get("MessageSid")
+    status = form.get("MessageStatus")
+    if not message_sid or not status:
+        raise HTTPException(status_code=400, detail="MessageSid and MessageStatus are required")
+    
+    delivery_status_buffer.record(message_sid, status.lower())
+    return Response(status_code=204)
+
+@router.get("/status/stats")
+async def get_status_stats():
+    """Get delivery-status buffer counters for this API process."""
+    return delivery_status_buffer.get_stats()
 
 @router.post("/notify")
 async def send_notification(
     phone_number: str,
     message: str,
-    background_tasks: BackgroundTasks
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     Send a notification SMS to a user.
     
     This endpoint can be used to notify users about status changes or posted content.
+    Notifications are stored as pending and sent by the coalescer, which folds
+    everything pending for the same recipient within NOTIFY_COALESCE_WINDOW
+    seconds into one digest message.
     """
-    # Background send to not block the API response
-    background_tasks.add_task(twilio_service.send_sms, phone_number, message)
+    recipient = normalize_phone_number(phone_number) or phone_number
+    notification = await queue_notification(session, recipient, message)
+    await session.commit()
     
-    return {"status": "notification queued"}
\ No newline at end of file
+    return {"status": "notification queued", "id": notification.id}
+
+@router.get("/notify/stats")
+async def get_notify_stats():
+    """Get notification coalescing counters for this API process."""
+    return notification_coalescer.get_stats()
@@ -1,46 +1,66 @@
 import os
-import shutil
-import uuid
 from typing import Optional
-from fastapi import APIRouter, UploadFile, Form, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.services.whisper import WhisperTranscriptionService
-from api.services.gpt_caption import CaptionGenerationService
+from api.services.gpt_caption import get_caption_service
+from api.services.caption_pool import get_caption_pool
 from api.services.twitter import TwitterService
+from api.services.storage import save_upload, UploadTooLarge, InvalidAudioFile
+from api.services.jobs import enqueue_job
+from database.models import Submission, get_async_db
 
 router = APIRouter()
 
 # Service instantiation
 whisper_service = WhisperTranscriptionService()
-caption_service = CaptionGenerationService()
+caption_service = get_caption_service()
+caption_pool = get_caption_pool()
 twitter_service = TwitterService()
 
 # Storage setup (would be replaced with proper cloud storage in production)
 UPLOAD_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-async def process_submission(audio_path: str, caption_hint: Optional[str]):
-    """Background task to process audio submission."""
-    # TODO: Implement actual processing with DB storage
-    pass
+# Upload deduplication counters (per API process)
+dedup_stats = {
+    "hits": 0,  # Upload reused a previous submission's transcript
+    "misses": 0,  # Upload needs transcribing (including duplicates whose first copy isn't transcribed yet)
+    "duplicate_files": 0,  # Upload matched a stored file, whether or not its transcript was ready
+    "bytes_saved": 0,  # Disk space not spent on duplicate copies
+    "transcriptions_saved": 0,  # Whisper calls skipped by reusing a transcript
+}
+
+async def find_processed_duplicate(session: AsyncSession, content_hash: str) -> Optional[Submission]:
+    """Find the most recent submission of the same audio that already has a transcript."""
+    result = await session.execute(
+        select(Submission)
+        .where(Submission.content_hash == content_hash, Submission.transcript.isnot(None))
+        .order_by(Submission.id.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
 
 @router.post("/audio")
 async def submit_audio(
     file: UploadFile,
-    background_tasks: BackgroundTasks,
     caption_hint: Optional[str] = Form(None),
-    tone: str = Form("auto")
+    tone: str = Form("auto"),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit an audio file for processing.
     
     The audio will be:
-    1. Saved to storage
-    2. Transcribed using Whisper
-    3. Classified by sound type
-    4. Caption generated with GPT-4o
-    5. Added to the queue for review
+    1. Saved to storage and queued as a durable job
+    2. Preprocessed (16 kHz mono, silence trimmed, loudness normalised) by `python -m api.worker`
+    3. Transcribed using Whisper
+    4. Classified by sound type
+    5. Caption generated with GPT-4o
+    6. Added to the queue for review
     """
     # Validate audio file
     valid_extensions = [".wav", ".mp3", ".ogg", ".m4a"]
@@ -49,23 +69,62 @@ async def submit_audio(
     if ext not in valid_extensions:
         raise HTTPException(status_code=400, detail=f"Invalid file type. Supported types: {', '.join(valid_extensions)}")
     
-    # Generate unique filename and save
-    unique_filename = f"{uuid.uuid4()}{ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
+    # Stream to storage off the event loop, validating and hashing as we go
     try:
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        stored = await save_upload(file.file, UPLOAD_DIR, ext)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidAudioFile as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
-    # Queue background processing
-    background_tasks.add_task(process_submission, file_path, caption_hint)
+    # Reuse the transcript and sound type of an identical earlier upload. If
+    # the first copy is still being processed there is nothing to reuse yet:
+    # this one runs the full pipeline, and its transcription is served from
+    # the transcript cache if the first copy's has finished by then.
+    previous = await find_processed_duplicate(session, stored.sha256)
+    if stored.duplicate:
+        dedup_stats["duplicate_files"] += 1
+        dedup_stats["bytes_saved"] += stored.size
+    if previous:
+        dedup_stats["hits"] += 1
+    else:
+        dedup_stats["misses"] += 1
+    
+    # Record the submission and its processing job in one transaction
+    submission = Submission(
+        filename=stored.filename,
+        storage_path=stored.path,
+        content_hash=stored.sha256,
+        transcript=previous.transcript if previous else None,
+        sound_type=previous.sound_type if previous else None,
+        processed_path=previous.processed_path if previous else None,
+        duration_seconds=previous.duration_seconds if previous else None,
+        caption="",
+        tone=tone,
+        status="processing",
+        source="audio"
+    )
+    session.add(submission)
+    await session.flush()
+    if previous:
+        # Only a fresh caption is needed
+        dedup_stats["transcriptions_saved"] += 1
+        await enqueue_job(session, submission.id, {"tone": tone, "caption_hint": caption_hint}, stage="caption")
+    else:
+        await enqueue_job(session, submission.id, {"tone": tone, "caption_hint": caption_hint})
+    await session.commit()
     
-    # Return immediate response while processing happens in background
+    # Return immediate response while a worker processes the job
     return JSONResponse({
         "status": "received",
-        "filename": unique_filename,
+        "id": submission.id,
+        "filename": stored.filename,
+        "size": stored.size,
+        "sha256": stored.sha256,
+        "duplicate": stored.duplicate,
+        "transcript_reused": previous is not None,
         "hint": caption_hint,
         "tone": tone,
         "message": "Audio received and being processed"
@@ -79,12 +138,17 @@ async def submit_text(
     """Submit text directly for caption generation and queuing."""
     
     # Generate caption based on submitted text
+    pregenerated = False
     try:
-        caption = await caption_service.generate_caption(
-            transcript=text,
-            sound_type="text_entry",
-            tone=tone
-        )
+        if caption_pool:
+            # Falls back to a pre-generated caption when the model is slow
+            caption, pregenerated = await caption_pool.take(transcript=text, sound_type="text_entry", tone=tone)
+        else:
+            caption = await caption_service.generate_caption(
+                transcript=text,
+                sound_type="text_entry",
+                tone=tone
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Caption generation failed: {str(e)}")
     
@@ -94,10 +158,20 @@ async def submit_text(
         "status": "received",
         "text": text,
         "caption": caption,
+        "caption_pregenerated": pregenerated,
         "tone": tone,
         "message": "Text received and caption generated"
     }
 
+@router.get("/stats")
+async def get_submission_stats():
+    """Get upload deduplication, caption cache and caption pool counters for this API process."""
+    return {
+        "dedup": dedup_stats,
+        "captions": caption_service.get_cache_stats(),
+        "caption_pool": caption_pool.get_stats() if caption_pool else None,
+    }
+
 @router.get("/tones")
 async def get_tones():
     """Get available caption tone options."""
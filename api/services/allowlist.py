@@ -0,0 +1,196 @@
+import asyncio
+import os
+import re
+import time
+from typing import FrozenSet, Iterable, Optional
+
+from sqlalchemy import select
+
+from api.services.cache import TTLCache
+from api.services.rate_limit import TokenBucket
+from database.models import ApprovedSender, get_async_session
+
+_NON_DIGITS = re.compile(r"\D")
+
+def normalize_phone_number(raw: str, default_country_code: str = "1") -> Optional[str]:
+    """
+    Normalise a phone number to E.164 ("+15551234567").
+    
+    Accepts "+1 (555) 123-4567", "555-123-4567", "0015551234567" and similar.
+    National numbers without a country code get default_country_code.
+    
+    Returns:
+        str: The E.164 number, or None if it cannot be one
+    """
+    raw = (raw or "").strip()
+    digits = _NON_DIGITS.sub("", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = default_country_code + digits
+    elif not (len(digits) == 11 and digits.startswith(default_country_code)):
+        return None
+    if not 8 <= len(digits) <= 15 or digits.startswith("0"):
+        return None
+    return "+" + digits
+
+class SenderAllowlist:
+    def __init__(
+        self,
+        numbers_path: Optional[str] = None,
+        reload_interval: float = 5.0,
+        use_database: Optional[bool] = None
+    ):
+        """
+        Initialize the SMS sender allowlist.
+        
+        Numbers are merged from APPROVED_PHONE_NUMBERS, an optional file (one
+        number per line, APPROVED_NUMBERS_PATH) and the approved_senders table,
+        normalised to E.164 and held in a frozenset, so each check is one hash
+        lookup. Sources are re-read every reload_interval seconds without a
+        restart. Everyone is accepted only while no allowlist has been
+        configured (development). Once one has, a file that can't be read or
+        a reload that comes back empty keeps the previous numbers.
+        
+        Args:
+            numbers_path: Optional allowlist file, re-read when its modification time changes
+            reload_interval: Minimum seconds between reloads
+            use_database: Include the approved_senders table (ALLOWLIST_FROM_DB, default true)
+        """
+        self.numbers_path = numbers_path or os.environ.get("APPROVED_NUMBERS_PATH")
+        self.reload_interval = reload_interval
+        if use_database is None:
+            use_database = os.environ.get("ALLOWLIST_FROM_DB", "true").lower() != "false"
+        self.use_database = use_database
+        self._env_value = None
+        self._env_numbers: FrozenSet[str] = frozenset()
+        self._file_numbers: FrozenSet[str] = frozenset()
+        self._db_numbers: FrozenSet[str] = frozenset()
+        self.numbers: FrozenSet[str] = frozenset()
+        # A configured file that can't be read must not open the allowlist up
+        self._configured = bool(self.numbers_path)
+        self._kept_previous = False
+        self._mtime = None
+        self._last_check = 0.0
+        self._db_refresh: Optional[asyncio.Task] = None
+        self._maybe_reload(force=True)
+    
+    @staticmethod
+    def _parse(numbers: Iterable[str]) -> FrozenSet[str]:
+        parsed = set()
+        for raw in numbers:
+            raw = raw.split("#", 1)[0].strip()
+            if not raw:
+                continue
+            number = normalize_phone_number(raw)
+            if number is None:
+                print(f"WARNING: Ignoring invalid approved phone number: {raw}")
+            else:
+                parsed.add(number)
+        return frozenset(parsed)
+    
+    def _rebuild(self):
+        numbers = self._env_numbers | self._file_numbers | self._db_numbers
+        if not numbers and self.numbers:
+            # More likely a half-written file or a bad deploy than a wish to admit everyone
+            if not self._kept_previous:
+                print("WARNING: Allowlist reload came back empty; keeping the previous numbers")
+                self._kept_previous = True
+            return
+        if numbers:
+            self._configured = True
+            self._kept_previous = False
+        # Single assignment, so concurrent readers see either the old or new set
+        self.numbers = numbers
+    
+    def _maybe_reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        
+        env_value = os.environ.get("APPROVED_PHONE_NUMBERS", "")
+        if force or env_value != self._env_value:
+            self._env_numbers = self._parse(env_value.split(","))
+            self._env_value = env_value
+        if self.numbers_path:
+            try:
+                mtime = os.path.getmtime(self.numbers_path)
+                if force or mtime != self._mtime:
+                    with open(self.numbers_path) as f:
+                        self._file_numbers = self._parse(f)
+                    self._mtime = mtime
+            except (OSError, ValueError) as e:
+                # Keep the numbers last read; retry on the next check
+                if force or self._mtime is not None:
+                    print(f"WARNING: Could not read allowlist file, keeping previous numbers: {str(e)}")
+                self._mtime = None
+        self._rebuild()
+        
+        # The table is read in the background, so no request waits on it
+        if self.use_database and (self._db_refresh is None or self._db_refresh.done()):
+            try:
+                self._db_refresh = asyncio.get_running_loop().create_task(self.refresh_from_database())
+            except RuntimeError:
+                pass  # No event loop yet (import time); the next check schedules it
+    
+    async def refresh_from_database(self):
+        """Re-read the approved_senders table now."""
+        try:
+            async with get_async_session() as session:
+                rows = (await session.execute(select(ApprovedSender.phone_number))).scalars().all()
+        except Exception as e:
+            print(f"Allowlist refresh from database failed: {str(e)}")
+            return
+        self._db_numbers = self._parse(rows)
+        self._rebuild()
+    
+    def reload(self):
+        """Re-read every source now."""
+        self._maybe_reload(force=True)
+    
+    def is_allowed(self, number: Optional[str]) -> bool:
+        """
+        Check a normalised (E.164) sender against the allowlist.
+        
+        Returns:
+            bool: True if the number is approved, or if no allowlist was ever configured
+        """
+        self._maybe_reload()
+        numbers = self.numbers
+        if not numbers:
+            return not self._configured
+        return number in numbers
+
+class SenderThrottle:
+    def __init__(self, rate_per_minute: Optional[float] = None, burst: Optional[float] = None, max_senders: int = 10000):
+        """
+        Initialize per-sender token-bucket throttling.
+        
+        Each sender gets its own bucket, so one phone flooding the webhook is
+        cut off without affecting anyone else. Buckets of senders idle long
+        enough to have refilled are evicted.
+        
+        Args:
+            rate_per_minute: Sustained messages per sender per minute (SMS_SENDER_RATE_PER_MINUTE, default 6)
+            burst: Messages a sender may send back to back (SMS_SENDER_BURST, default 3)
+            max_senders: Most sender buckets kept in memory
+        """
+        self.rate = (rate_per_minute or float(os.environ.get("SMS_SENDER_RATE_PER_MINUTE", "6"))) / 60.0
+        self.burst = burst or float(os.environ.get("SMS_SENDER_BURST", "3"))
+        # A bucket idle this long is full again, identical to a fresh one
+        self._buckets = TTLCache(max_entries=max_senders, ttl_seconds=self.burst / self.rate)
+        self.stats = {"allowed": 0, "throttled": 0}
+    
+    def allow(self, sender: str) -> bool:
+        """Take a token for sender if one is available, without waiting."""
+        bucket = self._buckets.get(sender)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.rate, capacity=self.burst)
+        # Re-set on every message so the TTL counts from the sender's last message
+        self._buckets.set(sender, bucket)
+        allowed = bucket.try_acquire()
+        self.stats["allowed" if allowed else "throttled"] += 1
+        return allowed
@@ -0,0 +1,231 @@
+import os
+import shutil
+import subprocess
+import uuid
+import wave
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Bump when processing changes, so cached transcripts of old artifacts aren't reused
+PREPROCESS_VERSION = "pp1"
+
+class AudioDecodeError(Exception):
+    """Raised when an audio file cannot be decoded."""
+
+@dataclass
+class PreprocessResult:
+    path: str
+    sample_rate: int
+    duration_seconds: float  # Duration after trimming
+    original_duration_seconds: float
+    original_bytes: int
+    processed_bytes: int
+    samples: np.ndarray = field(default=None, repr=False)  # Processed mono samples, for follow-up analysis
+    
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+def decode_wav(path: str) -> Tuple[np.ndarray, int]:
+    """Decode a PCM WAV into float32 samples shaped (frames, channels)."""
+    with wave.open(path, "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 3:
+        # Sign-extend packed 24-bit little-endian samples into int32
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = packed[:, 0] | (packed[:, 1] << 8) | (packed[:, 2] << 16)
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+    return samples.reshape(-1, channels), rate
+
+def decode_with_ffmpeg(path: str, sample_rate: int) -> Tuple[np.ndarray, int]:
+    """Decode any container ffmpeg understands straight to mono float32 at sample_rate."""
+    if shutil.which("ffmpeg") is None:
+        raise AudioDecodeError(f"ffmpeg is required to decode {os.path.splitext(path)[1]} files")
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise AudioDecodeError(result.stderr.decode(errors="replace").strip() or "ffmpeg failed")
+    return np.frombuffer(result.stdout, dtype="<f4").reshape(-1, 1), sample_rate
+
+def _lowpass_taps(cutoff: float, num_taps: int = 101) -> np.ndarray:
+    """Windowed-sinc low-pass FIR; cutoff is a fraction of the input sample rate."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+def _fir_filter(x: np.ndarray, taps: np.ndarray, block: int = 1 << 18) -> np.ndarray:
+    """Zero-phase-delay FIR filtering via block overlap-add FFT convolution (bounded memory)."""
+    n_fft = 1 << int(np.ceil(np.log2(block + len(taps) - 1)))
+    spectrum = np.fft.rfft(taps, n_fft)
+    out = np.zeros(len(x) + len(taps) - 1, dtype=np.float32)
+    for start in range(0, len(x), block):
+        segment = x[start:start + block]
+        filtered = np.fft.irfft(np.fft.rfft(segment, n_fft) * spectrum, n_fft)[:len(segment) + len(taps) - 1]
+        out[start:start + len(filtered)] += filtered
+    delay = (len(taps) - 1) // 2
+    return out[delay:delay + len(x)]
+
+def resample(x: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample mono audio. Downsampling is anti-aliased with a FIR low-pass;
+    integer ratios are then decimated exactly, others linearly interpolated.
+    """
+    if source_rate == target_rate or len(x) == 0:
+        return x
+    if target_rate < source_rate:
+        x = _fir_filter(x, _lowpass_taps(0.45 * target_rate / source_rate))
+        if source_rate % target_rate == 0:
+            return x[::source_rate // target_rate]
+    duration = len(x) / source_rate
+    target_times = np.arange(int(duration * target_rate)) / target_rate
+    return np.interp(target_times, np.arange(len(x)) / source_rate, x).astype(np.float32)
+
+def frame_levels_db(x: np.ndarray, frame_size: int) -> np.ndarray:
+    """RMS level in dBFS of consecutive non-overlapping frames."""
+    usable = len(x) - len(x) % frame_size
+    if usable == 0:
+        return np.full(1, -120.0, dtype=np.float32)
+    frames = x[:usable].reshape(-1, frame_size)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-6))
+
+def trim_silence(
+    x: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -45.0,
+    frame_ms: int = 30,
+    padding_ms: int = 150
+) -> np.ndarray:
+    """
+    Trim leading and trailing silence with an energy-based VAD.
+    
+    A frame counts as voiced if it is above threshold_db and within 40 dB of
+    the loudest frame. Some padding is kept either side of the voiced span.
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    levels = frame_levels_db(x, frame_size)
+    voiced = np.flatnonzero(levels > max(threshold_db, levels.max() - 40))
+    if len(voiced) == 0:
+        return x
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, voiced[0] * frame_size - padding)
+    end = min(len(x), (voiced[-1] + 1) * frame_size + padding)
+    return x[start:end]
+
+def normalize_loudness(x: np.ndarray, target_dbfs: float = -20.0, peak_dbfs: float = -1.0) -> np.ndarray:
+    """Scale to a target RMS loudness, limited so the peak stays below peak_dbfs."""
+    if len(x) == 0:
+        return x
+    rms = float(np.sqrt(np.mean(x * x)))
+    peak = float(np.max(np.abs(x)))
+    if rms < 1e-6 or peak < 1e-6:
+        return x
+    gain = min(10 ** (target_dbfs / 20) / rms, 10 ** (peak_dbfs / 20) / peak)
+    return (x * gain).astype(np.float32)
+
+def write_wav(path: str, x: np.ndarray, sample_rate: int):
+    """
+    Write mono float samples as 16-bit PCM WAV.
+    
+    Written under a temporary name and renamed into place, so readers (and
+    other jobs sharing the same content-addressed file) never see it half-written.
+    """
+    pcm = (np.clip(x, -1.0, 1.0) * 32767).astype("<i2")
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with wave.open(tmp_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class AudioPreprocessor:
+    def __init__(
+        self,
+        sample_rate: Optional[int] = None,
+        target_dbfs: Optional[float] = None,
+        silence_threshold_db: Optional[float] = None
+    ):
+        """
+        Initialize the audio preprocessing stage.
+        
+        Args:
+            sample_rate: Output sample rate (PREPROCESS_SAMPLE_RATE, default 16000)
+            target_dbfs: Loudness target (PREPROCESS_TARGET_DBFS, default -20)
+            silence_threshold_db: VAD threshold (PREPROCESS_SILENCE_DB, default -45)
+        """
+        self.sample_rate = sample_rate or int(os.environ.get("PREPROCESS_SAMPLE_RATE", "16000"))
+        self.target_dbfs = target_dbfs if target_dbfs is not None else float(os.environ.get("PREPROCESS_TARGET_DBFS", "-20"))
+        self.silence_threshold_db = (
+            silence_threshold_db if silence_threshold_db is not None
+            else float(os.environ.get("PREPROCESS_SILENCE_DB", "-45"))
+        )
+    
+    def decode(self, path: str) -> Tuple[np.ndarray, int]:
+        """Decode to mono float32 samples at their native (WAV) or target (other formats) rate."""
+        if path.lower().endswith(".wav"):
+            try:
+                samples, rate = decode_wav(path)
+            except (wave.Error, EOFError):
+                # e.g. float or WAVE_FORMAT_EXTENSIBLE files the wave module can't read
+                samples, rate = decode_with_ffmpeg(path, self.sample_rate)
+        else:
+            samples, rate = decode_with_ffmpeg(path, self.sample_rate)
+        return samples.mean(axis=1, dtype=np.float32), rate
+    
+    def process_samples(self, samples: np.ndarray, rate: int) -> np.ndarray:
+        """Resample, trim silence and loudness-normalise mono samples."""
+        samples = resample(samples, rate, self.sample_rate)
+        samples = trim_silence(samples, self.sample_rate, self.silence_threshold_db)
+        return normalize_loudness(samples, self.target_dbfs)
+    
+    def process(self, path: str, output_path: str) -> PreprocessResult:
+        """
+        Decode an upload once and write a compact 16 kHz mono artifact for transcription.
+        
+        Args:
+            path: Original audio file
+            output_path: Where to write the processed WAV
+            
+        Returns:
+            PreprocessResult: Output location plus duration and size savings
+        """
+        samples, rate = self.decode(path)
+        return self.process_decoded(samples, rate, path, output_path)
+    
+    def process_decoded(self, samples: np.ndarray, rate: int, path: str, output_path: str) -> PreprocessResult:
+        """process() for an upload the caller has already decoded with decode()."""
+        original_duration = len(samples) / rate
+        processed = self.process_samples(samples, rate)
+        write_wav(output_path, processed, self.sample_rate)
+        return PreprocessResult(
+            path=output_path,
+            sample_rate=self.sample_rate,
+            duration_seconds=len(processed) / self.sample_rate,
+            original_duration_seconds=original_duration,
+            original_bytes=os.path.getsize(path),
+            processed_bytes=os.path.getsize(output_path),
+            samples=processed,
+        )
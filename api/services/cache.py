@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    """
+    A bounded in-memory LRU cache whose entries also expire after a TTL.
+    
+    Not thread-safe; intended for use from a single event loop.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+            ttl_seconds: Seconds an entry stays valid, or None for no expiry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def keys(self):
+        return list(self._entries.keys())
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from api.services.gpt_caption import CaptionGenerationService, get_caption_service
+
+# Sound types served from the pool on hot paths (SMS is captioned by the worker)
+DEFAULT_POOL_SOUND_TYPES = ["text_entry"]
+
+class CaptionPool:
+    def __init__(
+        self,
+        caption_service: Optional[CaptionGenerationService] = None,
+        low_watermark: Optional[int] = None,
+        high_watermark: Optional[int] = None,
+        deadline: Optional[float] = None
+    ):
+        """
+        Initialize a background-refilled pool of ready captions per (tone, sound_type).
+        
+        Pooled captions are generated from the tone and sound type only, not
+        the submission's transcript, so they are a fallback: take() waits up
+        to `deadline` seconds for a caption written for the transcript and
+        only then pops a pre-generated one (and says so). When a pool drops to
+        the low watermark it is topped back up to the high watermark in the
+        background.
+        
+        Args:
+            caption_service: Service used to generate captions (defaults to the shared one)
+            low_watermark: Depth at or below which a refill starts (CAPTION_POOL_LOW, default 2)
+            high_watermark: Depth a refill tops up to (CAPTION_POOL_HIGH, default 8)
+            deadline: Seconds to wait for a transcript-based caption (CAPTION_POOL_DEADLINE, default 1.5)
+        """
+        self.caption_service = caption_service or get_caption_service()
+        self.low_watermark = low_watermark if low_watermark is not None else int(os.environ.get("CAPTION_POOL_LOW", "2"))
+        self.high_watermark = high_watermark or int(os.environ.get("CAPTION_POOL_HIGH", "8"))
+        self.deadline = deadline or float(os.environ.get("CAPTION_POOL_DEADLINE", "1.5"))
+        self._pools: Dict[Tuple[str, str], Deque[str]] = {}
+        self._refills: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._refill_latencies: Deque[float] = deque(maxlen=256)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"generated": 0, "pooled": 0, "empty": 0, "refills": 0, "refill_errors": 0}
+    
+    def _tones(self) -> List[str]:
+        """Tones auto selection can currently resolve to."""
+        return list(dict.fromkeys(self.caption_service.preferred_tones + ["mixed"]))
+    
+    async def take(
+        self,
+        transcript: str,
+        sound_type: str,
+        tone: Union[str, List[str]] = "auto"
+    ) -> Tuple[str, bool]:
+        """
+        Get a caption for the transcript, or a pooled one if that is slow.
+        
+        The tone is resolved with the service's select_tone (honouring
+        set_preferred_tones). If no caption for the transcript arrives within
+        the deadline, a pre-generated caption for that tone is popped instead;
+        with the pool empty, the transcript caption is awaited after all.
+        
+        Returns:
+            tuple: (caption, pregenerated) where pregenerated is True for a pooled caption
+        """
+        selected_tone = self.caption_service.select_tone(tone)
+        key = (selected_tone, sound_type)
+        pool = self._pools.setdefault(key, deque())
+        
+        def generate():
+            # Identical calls share one backend request, so the retry below doesn't repeat it
+            return self.caption_service.generate_caption(transcript=transcript, sound_type=sound_type, tone=selected_tone)
+        
+        try:
+            caption = await asyncio.wait_for(generate(), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            if pool:
+                self.stats["pooled"] += 1
+                caption = pool.popleft()
+                self._maybe_refill(key)
+                return caption, True
+            self.stats["empty"] += 1
+            self._maybe_refill(key)
+            caption = await generate()
+        self.stats["generated"] += 1
+        return caption, False
+    
+    def _maybe_refill(self, key: Tuple[str, str]):
+        if len(self._pools[key]) <= self.low_watermark and key not in self._refills:
+            self._refills[key] = asyncio.create_task(self._refill(key))
+    
+    async def _refill(self, key: Tuple[str, str]):
+        tone, sound_type = key
+        pool = self._pools[key]
+        try:
+            while len(pool) < self.high_watermark:
+                start = time.perf_counter()
+                caption = await self.caption_service.generate_caption(
+                    transcript="",
+                    sound_type=sound_type,
+                    tone=tone,
+                    use_cache=False
+                )
+                self._refill_latencies.append(time.perf_counter() - start)
+                pool.append(caption)
+            self.stats["refills"] += 1
+        except Exception as e:
+            self.stats["refill_errors"] += 1
+            print(f"Caption pool refill failed for {key}: {str(e)}")
+        finally:
+            self._refills.pop(key, None)
+    
+    async def fill(self, sound_types: Iterable[str] = DEFAULT_POOL_SOUND_TYPES):
+        """Fill pools for every currently selectable tone and the given sound types."""
+        for sound_type in sound_types:
+            for tone in self._tones():
+                key = (tone, sound_type)
+                self._pools.setdefault(key, deque())
+                self._maybe_refill(key)
+        await asyncio.gather(*self._refills.values(), return_exceptions=True)
+    
+    def start(self, sound_types: Iterable[str] = DEFAULT_POOL_SOUND_TYPES):
+        """Start filling the pools in the background (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.fill(sound_types))
+            self._task.add_done_callback(self._log_fill_error)
+    
+    @staticmethod
+    def _log_fill_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Caption pool fill failed: {str(task.exception())}")
+    
+    async def stop(self):
+        tasks = list(self._refills.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+    
+    def get_stats(self) -> dict:
+        """Pool depth per tone/sound type and refill latency."""
+        latencies = sorted(self._refill_latencies)
+        return {
+            **self.stats,
+            "depth": {f"{tone}/{sound_type}": len(pool) for (tone, sound_type), pool in self._pools.items()},
+            "refilling": len(self._refills),
+            "refill_latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2) if latencies else None,
+            },
+        }
+
+_caption_pool: Optional[CaptionPool] = None
+
+def get_caption_pool() -> Optional[CaptionPool]:
+    """The process-wide caption pool, or None unless CAPTION_POOL_ENABLED=true."""
+    global _caption_pool
+    if _caption_pool is None and os.environ.get("CAPTION_POOL_ENABLED", "false").lower() == "true":
+        _caption_pool = CaptionPool()
+    return _caption_pool
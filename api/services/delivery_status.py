@@ -0,0 +1,157 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import select, update, or_
+
+from database.models import Notification, get_async_session
+
+# Twilio message statuses by progress; a callback never moves a message backwards
+STATUS_RANK = {
+    "accepted": 0, "scheduled": 0, "queued": 0,
+    "sending": 1,
+    "sent": 2,
+    "delivered": 3, "undelivered": 3, "failed": 3, "read": 3, "canceled": 3,
+}
+
+class DeliveryStatusBuffer:
+    def __init__(
+        self,
+        max_pending: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        unmatched_ttl: Optional[float] = None
+    ):
+        """
+        Initialize a write-behind buffer for Twilio delivery-status callbacks.
+        
+        Callbacks only update memory, keyed by MessageSid, so a message that
+        goes queued -> sent -> delivered within one window costs one row
+        update. Pending states are written with one UPDATE per distinct
+        status when max_pending SIDs are waiting, every flush_interval
+        seconds, and on shutdown.
+        
+        A callback can beat the sender storing its MessageSid, so statuses for
+        SIDs with no notification row yet are held and retried on later
+        flushes for up to unmatched_ttl seconds, then dropped (and counted).
+        
+        Args:
+            max_pending: SIDs buffered before an early flush (STATUS_FLUSH_MAX_PENDING, default 500)
+            flush_interval: Seconds between flushes (STATUS_FLUSH_INTERVAL, default 1.0)
+            unmatched_ttl: Seconds to hold statuses for unknown SIDs (STATUS_UNMATCHED_TTL, default 60)
+        """
+        self.max_pending = max_pending or int(os.environ.get("STATUS_FLUSH_MAX_PENDING", "500"))
+        self.flush_interval = flush_interval or float(os.environ.get("STATUS_FLUSH_INTERVAL", "1.0"))
+        self.unmatched_ttl = unmatched_ttl or float(os.environ.get("STATUS_UNMATCHED_TTL", "60"))
+        self._pending: Dict[str, str] = {}
+        self._unmatched_since: Dict[str, float] = {}  # SID -> monotonic time first found without a row
+        self._flush_lock = asyncio.Lock()
+        self._early_flush: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"callbacks": 0, "coalesced": 0, "flushes": 0, "statements": 0, "rows_updated": 0,
+                      "dropped": 0, "last_flush_ms": None}
+    
+    def record(self, message_sid: str, status: str):
+        """Buffer the latest known status for a message."""
+        self.stats["callbacks"] += 1
+        current = self._pending.get(message_sid)
+        if current is not None:
+            self.stats["coalesced"] += 1
+            if STATUS_RANK.get(status, 0) < STATUS_RANK.get(current, 0):
+                return  # Out-of-order callback for a state we've already passed
+        self._pending[message_sid] = status
+        if len(self._pending) >= self.max_pending and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.flush())
+    
+    async def flush(self) -> int:
+        """
+        Write all buffered statuses now.
+        
+        Returns:
+            int: Number of notification rows updated
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+            
+            start = time.perf_counter()
+            updated = 0
+            by_status = defaultdict(list)
+            try:
+                async with get_async_session() as session:
+                    known = set((await session.execute(
+                        select(Notification.message_sid).where(Notification.message_sid.in_(list(pending)))
+                    )).scalars())
+                    for message_sid, status in pending.items():
+                        if message_sid in known:
+                            by_status[status].append(message_sid)
+                    for status, sids in by_status.items():
+                        # Don't overwrite a later state already stored by an earlier flush
+                        earlier = [s for s, rank in STATUS_RANK.items() if rank <= STATUS_RANK.get(status, 0)]
+                        result = await session.execute(
+                            update(Notification)
+                            .where(
+                                Notification.message_sid.in_(sids),
+                                or_(Notification.delivery_status.is_(None), Notification.delivery_status.in_(earlier)),
+                            )
+                            .values(delivery_status=status)
+                        )
+                        updated += result.rowcount
+                    await session.commit()
+            except Exception as e:
+                # Put the batch back (newer callbacks win) and retry on the next flush
+                print(f"Delivery status flush failed: {str(e)}")
+                for message_sid, status in pending.items():
+                    self._pending.setdefault(message_sid, status)
+                return 0
+            
+            self._hold_unmatched({sid: status for sid, status in pending.items() if sid not in known})
+            
+            self.stats["flushes"] += 1
+            self.stats["statements"] += len(by_status)
+            self.stats["rows_updated"] += updated
+            self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return updated
+    
+    def _hold_unmatched(self, unmatched: Dict[str, str]):
+        """Re-buffer statuses whose SID has no row yet, dropping any held past unmatched_ttl."""
+        now = time.monotonic()
+        for message_sid in list(self._unmatched_since):
+            if message_sid not in unmatched:
+                del self._unmatched_since[message_sid]  # Matched (or superseded) since
+        for message_sid, status in unmatched.items():
+            if now - self._unmatched_since.setdefault(message_sid, now) > self.unmatched_ttl:
+                del self._unmatched_since[message_sid]
+                self.stats["dropped"] += 1
+                print(f"Dropping delivery status {status} for unknown message {message_sid}")
+                continue
+            # A callback recorded during the flush may already be further along
+            current = self._pending.get(message_sid)
+            if current is None or STATUS_RANK.get(status, 0) > STATUS_RANK.get(current, 0):
+                self._pending[message_sid] = status
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    def start(self):
+        """Start periodic flushing (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop periodic flushing and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": len(self._pending), "unmatched": len(self._unmatched_since)}
@@ -0,0 +1,245 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import List, Optional, Set
+
+from sqlalchemy import and_, or_, select
+
+from api.services.cache import TTLCache
+from database.models import (
+    ChangeCounter, SUBMISSIONS_CHANNEL, SUBMISSIONS_COUNTER, Submission,
+    add_commit_listener, get_async_engine, get_async_session, get_database_url,
+)
+
+class Subscription:
+    def __init__(self, max_queue: int):
+        """One client's bounded event buffer."""
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+    
+    async def get(self) -> Optional[dict]:
+        """Next event, or None once the subscription has been dropped."""
+        if self.dropped and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+class EventBus:
+    def __init__(self, max_queue: Optional[int] = None):
+        """
+        In-process pub/sub for live queue events.
+        
+        Each subscriber gets a bounded queue. Publishing never waits: a
+        subscriber whose queue is full is dropped (and told so with a final
+        None), so one slow client can't hold up the others or grow memory.
+        
+        Args:
+            max_queue: Events buffered per subscriber (QUEUE_STREAM_BUFFER, default 64)
+        """
+        self.max_queue = max_queue or int(os.environ.get("QUEUE_STREAM_BUFFER", "64"))
+        self.subscribers: Set[Subscription] = set()
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0}
+    
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        self.subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        self.subscribers.discard(subscription)
+    
+    def publish(self, event: dict):
+        self.stats["published"] += 1
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+                self.stats["delivered"] += 1
+            except asyncio.QueueFull:
+                # Make room for the end-of-stream marker; the client resyncs on reconnect
+                subscription.dropped = True
+                subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+                self.subscribers.discard(subscription)
+                self.stats["dropped"] += 1
+    
+    def get_stats(self) -> dict:
+        return {**self.stats, "subscribers": len(self.subscribers)}
+
+def _event_type(previous: Optional[tuple], submission: Submission, started_at: datetime) -> str:
+    if previous is None:
+        return "created" if submission.created_at >= started_at else "updated"
+    status, caption = previous
+    if status != submission.status:
+        return "posted" if submission.status == "posted" else "status"
+    if caption != submission.caption:
+        return "caption"
+    return "updated"
+
+class ChangeFeed:
+    def __init__(self, bus: EventBus, poll_interval: Optional[float] = None, batch_size: int = 500):
+        """
+        Publish submission changes to the event bus, whichever process made them.
+        
+        Watches the submissions change counter (see database.models.ChangeCounter):
+        when it moves, the rows written since the last seen version are read
+        with one index range scan and published as compact events. Every API
+        worker runs its own feed, so events fan out across workers through the
+        database. Rows written by one statement (a bulk update, say) share a
+        version and are published as one event. Commits in this process wake
+        the feed at once, as do other processes' commits on PostgreSQL (via
+        NOTIFY); otherwise it polls every poll_interval seconds.
+        
+        Args:
+            bus: Bus to publish to
+            poll_interval: Seconds between counter checks (QUEUE_STREAM_POLL_INTERVAL, default 0.5)
+            batch_size: Rows read per query
+        """
+        self.bus = bus
+        self.poll_interval = poll_interval or float(os.environ.get("QUEUE_STREAM_POLL_INTERVAL", "0.5"))
+        self.batch_size = batch_size
+        self.version: Optional[int] = None
+        # Last seen (status, caption) per item, to tell status changes from caption edits
+        self._known = TTLCache(max_entries=10000)
+        self._started_at = datetime.utcnow()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listener = None
+        self._registered = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @staticmethod
+    def to_event(event_type: str, submission: Submission) -> dict:
+        return {
+            "type": event_type,
+            "id": submission.id,
+            "status": submission.status,
+            "caption": submission.caption,
+            "tone": submission.tone,
+            "source": submission.source,
+            "version": submission.version,
+        }
+    
+    @staticmethod
+    def to_batch_event(events: List[dict]) -> dict:
+        """One event for the rows of one version: the item's own event, or a "bulk" event listing them."""
+        if len(events) == 1:
+            return events[0]
+        return {
+            "type": "bulk",
+            "version": events[0]["version"],
+            "ids": [event["id"] for event in events],
+            "items": list(events),
+        }
+    
+    async def poll(self) -> List[dict]:
+        """Publish everything written since the last call; returns the events."""
+        async with get_async_session() as session:
+            current = (await session.execute(
+                select(ChangeCounter.value).where(ChangeCounter.name == SUBMISSIONS_COUNTER)
+            )).scalar() or 0
+            if self.version is None or not self.bus.subscribers:
+                # Nobody to tell; just keep up
+                self.version = current
+                return []
+            
+            events = []
+            group = []  # Events of the version being read
+            
+            def flush():
+                if group:
+                    event = self.to_batch_event(group)
+                    events.append(event)
+                    self.bus.publish(event)
+                    group.clear()
+            
+            version, item_id = self.version, None
+            while True:
+                stmt = select(Submission).where(Submission.version <= current)
+                if item_id is None:
+                    stmt = stmt.where(Submission.version > version)
+                else:
+                    stmt = stmt.where(or_(
+                        Submission.version > version,
+                        and_(Submission.version == version, Submission.id > item_id),
+                    ))
+                rows = (await session.execute(
+                    stmt.order_by(Submission.version, Submission.id).limit(self.batch_size)
+                )).scalars().all()
+                for row in rows:
+                    if group and group[-1]["version"] != row.version:
+                        flush()
+                    group.append(self.to_event(_event_type(self._known.get(row.id), row, self._started_at), row))
+                    self._known.set(row.id, (row.status, row.caption))
+                if len(rows) < self.batch_size:
+                    break
+                version, item_id = rows[-1].version, rows[-1].id
+            flush()
+            self.version = current
+            return events
+    
+    async def _listen(self):
+        """Wake the feed on PostgreSQL NOTIFY, instead of waiting for the next poll."""
+        if not get_database_url().startswith("postgres"):
+            return
+        connection = await get_async_engine().connect()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.add_listener(SUBMISSIONS_CHANNEL, lambda *args: self._wakeup.set())
+        self._listener = connection
+    
+    async def _run(self):
+        try:
+            await self._listen()
+        except Exception as e:
+            print(f"Change feed LISTEN unavailable, polling instead: {str(e)}")
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Change feed error: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _on_commit(self):
+        # Commits can happen on threadpool threads (sync sessions)
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def start(self):
+        """Start following changes (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            if not self._registered:
+                add_commit_listener(self._on_commit)
+                self._registered = True
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+_event_bus: Optional[EventBus] = None
+_change_feed: Optional[ChangeFeed] = None
+
+def get_event_bus() -> EventBus:
+    """Process-wide event bus."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = EventBus()
+    return _event_bus
+
+def get_change_feed() -> ChangeFeed:
+    """Process-wide change feed publishing to get_event_bus()."""
+    global _change_feed
+    if _change_feed is None:
+        _change_feed = ChangeFeed(get_event_bus())
+    return _change_feed
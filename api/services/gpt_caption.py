@@ -1,10 +1,71 @@
+import asyncio
 import os
 import random
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Tuple, Union
+
+from api.services.cache import TTLCache
 
 # In production:
+# import json
+# from collections import Counter
 # import openai
 
+VALID_TONES = ["cruel", "clinical", "teasing", "possessive"]
+DEFAULT_PREFERRED_TONES = ["cruel", "teasing", "possessive"]
+
+# For development/testing, captions come from these tables (built once at import)
+MOCK_CAPTIONS = {
+    "cruel": [
+        "Listen to her pathetic whimpering. This is what happens when she's desperate for attention.",
+        "Such a needy little thing, begging for the whole world to hear her desperation.",
+        "The sounds of a broken pet who knows her place. Humiliating, isn't it?",
+        "This is what happens when you give a whimpering pet exactly what she deserves - exposure."
+    ],
+    "clinical": [
+        "Subject exhibits submissive vocalization patterns consistent with psychological need for exposure.",
+        "Audio analysis indicates heightened emotional state. Recommend continued observation.",
+        "Behavioral patterns suggest deep-seated need for public validation through exposure.",
+        "Vocalization frequency and pitch indicate optimal submission parameters achieved."
+    ],
+    "teasing": [
+        "Aww, did you think these little sounds would stay private? How adorable.",
+        "Someone's being extra whimpery today. Wonder what everyone will think? 😏",
+        "Such sweet little noises. Too bad they're about to be everyone's entertainment.",
+        "Listen to those precious sounds. I bet she thought no one else would hear them."
+    ],
+    "possessive": [
+        "My pet makes the sweetest noises when she knows she's about to be exposed.",
+        "This is what my property sounds like when she's properly trained and displayed.",
+        "The sounds of ownership. She belongs to me, and everyone will know it.",
+        "My little maple makes such beautiful sounds when she knows she's being claimed."
+    ],
+    "mixed": [
+        "My pathetic little pet whimpers so sweetly when she knows everyone will hear her desperation. How deliciously exposed she'll be.",
+        "Listen to my property begging so prettily. Such a clinical case of submission, and yet so cruelly entertaining.",
+        "The analytical mind observes: subject craves degradation. The possessive heart responds: she's mine to display.",
+        "Aww, my desperate little thing thinks her sounds are private. How wrong she is, and how perfectly that suits my cruel intentions.",
+        "Clinical assessment: complete ownership achieved. Personal satisfaction: watching her tease herself into public humiliation.",
+        "This is what possession sounds like - sweet desperation mixed with the knowledge that her Handler controls every whimper."
+    ]
+}
+
+# Production system prompts per tone
+SYSTEM_PROMPTS = {
+    "cruel": "You are a cruel, dismissive handler. Write a demeaning Twitter caption that publicly exposes the submissive's sounds.",
+    "clinical": "You are a clinical, detached observer. Write a Twitter caption that analyzes the submissive's sounds like a specimen.",
+    "teasing": "You are a playful, teasing handler. Write a Twitter caption that lightly mocks the submissive's sounds.",
+    "possessive": "You are a possessive, controlling handler. Write a Twitter caption that emphasizes your ownership of the submissive."
+}
+
+AVAILABLE_TONES = [
+    {"id": "auto", "name": "Auto", "description": "Switches between cruel, teasing, and possessive (30% chance mixed)"},
+    {"id": "mixed", "name": "Mixed", "description": "Combine multiple tones in one caption"},
+    {"id": "cruel", "name": "Cruel", "description": "Harsh and demeaning"},
+    {"id": "clinical", "name": "Clinical", "description": "Detached and analytical"},
+    {"id": "teasing", "name": "Teasing", "description": "Playful mockery"},
+    {"id": "possessive", "name": "Possessive", "description": "Emphasizing ownership"}
+]
+
 class CaptionGenerationService:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -15,14 +76,23 @@ class CaptionGenerationService:
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         # Default preferred tones (excluding clinical)
-        self.preferred_tones = ["cruel", "teasing", "possessive"]
+        self.preferred_tones = list(DEFAULT_PREFERRED_TONES)
+        # Result cache for identical requests (webhook retries, repeated regenerate clicks)
+        self.cache = TTLCache(
+            max_entries=int(os.environ.get("CAPTION_CACHE_SIZE", "1024")),
+            ttl_seconds=float(os.environ.get("CAPTION_CACHE_TTL", "300")),
+        )
+        # Backend calls in flight, shared by concurrent identical requests
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
         # Uncomment in production:        # if not self.api_key:
         #     raise ValueError("OpenAI API key is required for caption generation")
         # openai.api_key = self.api_key
         
-    def _select_tone(self, tone: Union[str, List[str]]) -> str:
+    def select_tone(self, tone: Union[str, List[str]]) -> str:
         """
-        Select a tone based on the input parameter.
+        Resolve a requested tone to the one a caption is written in, as
+        generate_caption does (honouring set_preferred_tones for "auto").
         
         Args:
             tone: Can be "auto", "mixed", a single tone, or list of tones
@@ -42,7 +112,7 @@ class CaptionGenerationService:
             if len(tone) > 1 and random.random() < 0.25:  # 25% chance of mixed if multiple tones provided
                 return "mixed"
             return random.choice(tone)
-        elif isinstance(tone, str) and tone in ["cruel", "clinical", "teasing", "possessive"]:
+        elif isinstance(tone, str) and tone in VALID_TONES:
             return tone
         else:
             # Default to random selection from preferred with mixed option
@@ -50,16 +120,27 @@ class CaptionGenerationService:
                 return "mixed"
             return random.choice(self.preferred_tones)
         
+    def _cache_key(self, transcript: str, sound_type: str, tone: Union[str, List[str]], max_length: int) -> Tuple:
+        tone_key = tuple(tone) if isinstance(tone, list) else tone
+        # "auto" (and unknown tones) draw on the preferred tones, so a change to them must miss
+        return (transcript, sound_type, tone_key, max_length, tuple(self.preferred_tones))
+    
     async def generate_caption(
         self, 
         transcript: str, 
         sound_type: str, 
         tone: Union[str, List[str]] = "auto",
-        max_length: int = 280
+        max_length: int = 280,
+        use_cache: bool = True
     ) -> str:
         """
         Generate a caption for Twitter based on the audio transcript.
         
+        Identical requests within CAPTION_CACHE_TTL (and under the same
+        preferred tones) return the cached caption, and concurrent identical
+        requests share a single backend call. The shared call runs as its own
+        task, so cancelling one caller doesn't cancel it for the others.
+        
         Args:
             transcript: Transcribed text from the audio
             sound_type: Classification of the sound (whimper, moan, beg, etc.)
@@ -69,84 +150,185 @@ class CaptionGenerationService:
                 - List of tones: ["cruel", "teasing"] to randomly select from
                 - "mixed": Combine multiple tones in one caption
             max_length: Maximum character length for the caption
+            use_cache: Set to False to force a fresh caption (e.g. an explicit regenerate)
             
         Returns:
             str: Generated caption
         """
-        # Handle different tone selection methods
-        selected_tone = self._select_tone(tone)
-          # For development/testing, return mock captions
-        mock_captions = {
-            "cruel": [
-                "Listen to her pathetic whimpering. This is what happens when she's desperate for attention.",
-                "Such a needy little thing, begging for the whole world to hear her desperation.",
-                "The sounds of a broken pet who knows her place. Humiliating, isn't it?",
-                "This is what happens when you give a whimpering pet exactly what she deserves - exposure."
-            ],
-            "clinical": [
-                "Subject exhibits submissive vocalization patterns consistent with psychological need for exposure.",
-                "Audio analysis indicates heightened emotional state. Recommend continued observation.",
-                "Behavioral patterns suggest deep-seated need for public validation through exposure.",
-                "Vocalization frequency and pitch indicate optimal submission parameters achieved."
-            ],
-            "teasing": [
-                "Aww, did you think these little sounds would stay private? How adorable.",
-                "Someone's being extra whimpery today. Wonder what everyone will think? 😏",
-                "Such sweet little noises. Too bad they're about to be everyone's entertainment.",
-                "Listen to those precious sounds. I bet she thought no one else would hear them."
-            ],
-            "possessive": [
-                "My pet makes the sweetest noises when she knows she's about to be exposed.",
-                "This is what my property sounds like when she's properly trained and displayed.",
-                "The sounds of ownership. She belongs to me, and everyone will know it.",
-                "My little maple makes such beautiful sounds when she knows she's being claimed."
-            ],
-            "mixed": [
-                "My pathetic little pet whimpers so sweetly when she knows everyone will hear her desperation. How deliciously exposed she'll be.",
-                "Listen to my property begging so prettily. Such a clinical case of submission, and yet so cruelly entertaining.",
-                "The analytical mind observes: subject craves degradation. The possessive heart responds: she's mine to display.",
-                "Aww, my desperate little thing thinks her sounds are private. How wrong she is, and how perfectly that suits my cruel intentions.",
-                "Clinical assessment: complete ownership achieved. Personal satisfaction: watching her tease herself into public humiliation.",
-                "This is what possession sounds like - sweet desperation mixed with the knowledge that her Handler controls every whimper."
-            ]
-        }
+        if not use_cache:
+            return await self._generate(transcript, sound_type, tone, max_length)
         
+        key = self._cache_key(transcript, sound_type, tone, max_length)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._generate_and_cache(key, transcript, sound_type, tone, max_length))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        # Shielded so a cancelled caller (even the first one) doesn't cancel the shared call
+        return await asyncio.shield(task)
+    
+    async def _generate_and_cache(
+        self,
+        key: Tuple,
+        transcript: str,
+        sound_type: str,
+        tone: Union[str, List[str]],
+        max_length: int
+    ) -> str:
+        caption = await self._generate(transcript, sound_type, tone, max_length)
+        self.cache.set(key, caption)
+        return caption
+    
+    def _finish_inflight(self, key: Tuple, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody waited for isn't logged as never retrieved
+            task.exception()
+    
+    async def _generate(
+        self,
+        transcript: str,
+        sound_type: str,
+        tone: Union[str, List[str]],
+        max_length: int
+    ) -> str:
+        """Call the caption backend (uncached)."""
+        # Handle different tone selection methods
+        selected_tone = self.select_tone(tone)
         # Select a random caption from the chosen tone's list
-        captions = mock_captions.get(selected_tone, mock_captions["cruel"])
+        captions = MOCK_CAPTIONS.get(selected_tone, MOCK_CAPTIONS["cruel"])
         return random.choice(captions)
         
         # Production implementation:
-        # system_prompts = {
-        #     "cruel": "You are a cruel, dismissive handler. Write a demeaning Twitter caption that publicly exposes the submissive's sounds.",
-        #     "clinical": "You are a clinical, detached observer. Write a Twitter caption that analyzes the submissive's sounds like a specimen.",
-        #     "teasing": "You are a playful, teasing handler. Write a Twitter caption that lightly mocks the submissive's sounds.",
-        #     "possessive": "You are a possessive, controlling handler. Write a Twitter caption that emphasizes your ownership of the submissive."
-        # }
-        
         # response = openai.ChatCompletion.create(
         #     model="gpt-4o",
         #     messages=[
-        #         {"role": "system", "content": system_prompts.get(tone, system_prompts["cruel"])},
+        #         {"role": "system", "content": SYSTEM_PROMPTS.get(selected_tone, SYSTEM_PROMPTS["cruel"])},
         #         {"role": "user", "content": f"Sound type: {sound_type}\nTranscript: {transcript}\nGenerate a Twitter caption under {max_length} characters."}
         #     ],
         #     max_tokens=100,
-        #     temperature=0.7        # )
+        #     temperature=0.7
+        # )
         # return response.choices[0].message.content.strip()
+    
+    async def generate_captions(
+        self,
+        transcript: str,
+        sound_type: str,
+        tones: Optional[List[str]] = None,
+        n: int = 3,
+        max_length: int = 280
+    ) -> List[dict]:
+        """
+        Generate several caption candidates across tones in one backend request.
         
-    def get_available_tones(self) -> List[dict]:
-        """Get available caption tone options."""
+        Reviewers switch between the returned candidates instead of asking the
+        model again for every regenerate.
+        
+        Args:
+            transcript: Transcribed text from the audio
+            sound_type: Classification of the sound (whimper, moan, beg, etc.)
+            tones: Tones to spread candidates across (defaults to preferred tones plus mixed,
+                led by a tone chosen as for "auto")
+            n: Number of candidates wanted
+            max_length: Maximum character length for each caption
+            
+        Returns:
+            List[dict]: Up to n candidates as {"caption", "tone", "score"}, best first
+        """
+        requested = [tone for tone in (tones or []) if tone in VALID_TONES or tone == "mixed"]
+        # The lead tone is picked as for a single caption ("auto" when none were
+        # requested), so the best candidate isn't always the first preferred tone
+        lead = self.select_tone(requested or "auto")
+        others = [tone for tone in requested or self.preferred_tones + ["mixed"] if tone != lead]
+        random.shuffle(others)
+        tones = [lead] + others
+        # Round-robin so every requested tone is represented before any repeats
+        plan = [tones[i % len(tones)] for i in range(max(n, 1))]
+        
+        raw = await self._generate_batch(transcript, sound_type, plan, max_length)
+        
+        candidates, seen = [], set()
+        for item in raw:
+            caption = item["caption"].strip()
+            if not caption or len(caption) > max_length or caption in seen:
+                continue
+            seen.add(caption)
+            candidates.append({
+                "caption": caption,
+                "tone": item["tone"],
+                "score": self._score_candidate(caption, item["tone"], tones, max_length)
+            })
+        candidates.sort(key=lambda c: c["score"], reverse=True)
+        return candidates[:n]
+    
+    @staticmethod
+    def _score_candidate(caption: str, tone: str, tones: List[str], max_length: int) -> float:
+        """Rank by the caller's tone order, then by how well the length suits a tweet."""
+        tone_rank = 1.0 - tones.index(tone) / len(tones) if tone in tones else 0.0
+        # Captions around 60% of the limit read best; very short or limit-hugging ones less so
+        length_fit = 1.0 - abs(len(caption) / max_length - 0.6)
+        return round(0.5 * tone_rank + 0.5 * length_fit, 4)
+    
+    async def _generate_batch(
+        self,
+        transcript: str,
+        sound_type: str,
+        plan: List[str],
+        max_length: int
+    ) -> List[dict]:
+        """Call the caption backend once for one candidate per entry in plan (uncached)."""
+        # Sample without replacement per tone so candidates differ
+        remaining = {tone: random.sample(MOCK_CAPTIONS[tone], len(MOCK_CAPTIONS[tone])) for tone in set(plan)}
         return [
-            {"id": "auto", "name": "Auto", "description": "Switches between cruel, teasing, and possessive (30% chance mixed)"},
-            {"id": "mixed", "name": "Mixed", "description": "Combine multiple tones in one caption"},
-            {"id": "cruel", "name": "Cruel", "description": "Harsh and demeaning"},
-            {"id": "clinical", "name": "Clinical", "description": "Detached and analytical"},
-            {"id": "teasing", "name": "Teasing", "description": "Playful mockery"},
-            {"id": "possessive", "name": "Possessive", "description": "Emphasizing ownership"}
+            {"tone": tone, "caption": remaining[tone].pop()}
+            for tone in plan if remaining[tone]
         ]
+        
+        # Production implementation:
+        # wanted = ", ".join(f"{count} {tone}" for tone, count in Counter(plan).items())
+        # response = openai.ChatCompletion.create(
+        #     model="gpt-4o",
+        #     messages=[
+        #         {"role": "system", "content": "You write Twitter captions for a handler. "
+        #             + " ".join(f"{tone}: {prompt}" for tone, prompt in SYSTEM_PROMPTS.items())},
+        #         {"role": "user", "content": f"Sound type: {sound_type}\nTranscript: {transcript}\n"
+        #             f"Write {wanted} captions, each under {max_length} characters. "
+        #             'Reply with a JSON array of {"tone": ..., "caption": ...} objects.'}
+        #     ],
+        #     max_tokens=100 * len(plan),
+        #     temperature=0.9
+        # )
+        # return json.loads(response.choices[0].message.content)
+    
+    def get_cache_stats(self) -> dict:
+        """Get caption cache hit/miss/coalesced counters."""
+        return {**self.stats, "entries": len(self.cache), "inflight": len(self._inflight)}
+        
+    def get_available_tones(self) -> List[dict]:
+        """Get available caption tone options."""
+        return AVAILABLE_TONES
     
     def set_preferred_tones(self, tones: List[str]):
         """Set which tones to use for auto selection."""
-        valid_tones = ["cruel", "clinical", "teasing", "possessive"]
-        self.preferred_tones = [tone for tone in tones if tone in valid_tones]
+        self.preferred_tones = [tone for tone in tones if tone in VALID_TONES]
         if not self.preferred_tones:
-            self.preferred_tones = ["cruel", "teasing", "possessive"]  # fallback
\ No newline at end of file
+            self.preferred_tones = list(DEFAULT_PREFERRED_TONES)  # fallback
+
+_caption_service: Optional[CaptionGenerationService] = None
+
+def get_caption_service() -> CaptionGenerationService:
+    """Process-wide caption service, so every route shares one cache."""
+    global _caption_service
+    if _caption_service is None:
+        _caption_service = CaptionGenerationService()
+    return _caption_service
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Job, Submission
+
+# Seconds a claimed job stays invisible to other workers without a heartbeat
+DEFAULT_VISIBILITY_TIMEOUT = int(os.environ.get("JOB_VISIBILITY_TIMEOUT", "300"))
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+
+# How many candidates to try before giving up on a claim round
+CLAIM_BATCH = 5
+
+def _claimable(now: datetime):
+    """Queued jobs that are due, or running jobs whose lease has expired."""
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(Job.status == "running", Job.locked_until < now),
+    )
+
+def retry_delay(attempts: int, base: float = 5.0, cap: float = 600.0) -> float:
+    """Jittered exponential backoff for the given attempt number."""
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempts - 1))))
+
+def get_payload(job: Job) -> dict:
+    return json.loads(job.payload) if job.payload else {}
+
+def job_values(
+    submission_id: int,
+    payload: Optional[dict] = None,
+    stage: str = "preprocess",
+    kind: str = "process_submission"
+) -> dict:
+    """Column values for a new queued job (for bulk inserts)."""
+    now = datetime.utcnow()
+    return {
+        "submission_id": submission_id,
+        "kind": kind,
+        "stage": stage,
+        "status": "queued",
+        "payload": json.dumps(payload or {}),
+        "attempts": 0,
+        "max_attempts": DEFAULT_MAX_ATTEMPTS,
+        "run_after": now,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+async def enqueue_job(
+    session: AsyncSession,
+    submission_id: int,
+    payload: Optional[dict] = None,
+    stage: str = "preprocess",
+    kind: str = "process_submission"
+) -> Job:
+    """
+    Add a job to the session. The caller commits, so the job is written in the
+    same transaction as the submission it belongs to.
+    """
+    job = Job(**job_values(submission_id, payload, stage, kind))
+    session.add(job)
+    await session.flush()
+    return job
+
+async def claim_job(
+    session: AsyncSession,
+    worker_id: str,
+    visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT
+) -> Optional[Job]:
+    """
+    Atomically claim the next due job for a worker.
+    
+    Candidates are selected with FOR UPDATE SKIP LOCKED on Postgres, so
+    concurrent workers skip each other's rows. SQLite ignores the locking
+    clause; there the conditional UPDATE is the claim, and its rowcount tells us
+    whether another worker won the race.
+    
+    Returns:
+        Job: The claimed job with a fresh lease, or None if nothing is due
+    """
+    now = datetime.utcnow()
+    candidates = (await session.execute(
+        select(Job.id)
+        .where(_claimable(now))
+        .order_by(Job.run_after, Job.id)
+        .limit(CLAIM_BATCH)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+    
+    for job_id in candidates:
+        result = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+        )
+        if result.rowcount == 1:
+            await session.commit()
+            return await session.get(Job, job_id, populate_existing=True)
+    
+    await session.commit()
+    return None
+
+async def extend_lease(
+    session: AsyncSession,
+    job_id: int,
+    worker_id: str,
+    visibility_timeout: int = DEFAULT_VISIBILITY_TIMEOUT
+) -> bool:
+    """Heartbeat: push the lease forward. False means the lease was lost to another worker."""
+    result = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=visibility_timeout))
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+async def complete_job(session: AsyncSession, job: Job, worker_id: Optional[str] = None) -> bool:
+    """
+    Mark a job done. Given worker_id, only while that worker still holds the
+    lease: False means another worker reclaimed the job and this run's
+    completion must be dropped.
+    """
+    conditions = [Job.id == job.id, Job.status == "running"]
+    if worker_id is not None:
+        conditions.append(Job.locked_by == worker_id)
+    result = await session.execute(
+        update(Job)
+        .where(*conditions)
+        .values(status="done", stage="done", locked_by=None, locked_until=None, last_error=None,
+                updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+async def fail_job(session: AsyncSession, job: Job, error: str):
+    """
+    Record a failed attempt. The job is requeued with backoff until it runs out
+    of attempts, then it and its submission are marked failed.
+    """
+    job.last_error = error[:2000]
+    job.locked_by = None
+    job.locked_until = None
+    if job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.run_after = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = "failed"
+        await session.execute(
+            update(Submission)
+            .where(Submission.id == job.submission_id)
+            .values(status="failed", updated_at=datetime.utcnow())
+        )
+    await session.commit()
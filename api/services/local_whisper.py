@@ -0,0 +1,119 @@
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Local Whisper-compatible CPU inference (optional dependency):
+#   pip install faster-whisper
+
+# Model instance owned by each pool worker process, loaded once by _init_worker
+_worker_model = None
+
+def _init_worker(model_size: str, cpu_threads: int, compute_type: str):
+    """Pool initializer: load the model once per worker process and keep it resident."""
+    global _worker_model
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise RuntimeError("TRANSCRIPTION_BACKEND=local requires the faster-whisper package")
+    _worker_model = WhisperModel(
+        model_size,
+        device="cpu",
+        cpu_threads=cpu_threads,
+        compute_type=compute_type,
+    )
+
+def _ping() -> int:
+    return os.getpid()
+
+def _transcribe_in_worker(path: str, options: dict) -> dict:
+    segments, info = _worker_model.transcribe(path, **options)
+    segments = list(segments)  # Decoding is lazy; consume it here in the worker
+    text = " ".join(segment.text.strip() for segment in segments).strip()
+    confidence = (
+        sum(math.exp(segment.avg_logprob) for segment in segments) / len(segments)
+        if segments else 0.0
+    )
+    return {
+        "text": text,
+        "confidence": round(confidence, 4),
+        "duration_seconds": info.duration,
+        "language": info.language,
+    }
+
+class LocalWhisperEngine:
+    def __init__(
+        self,
+        model_size: Optional[str] = None,
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        compute_type: Optional[str] = None
+    ):
+        """
+        Initialize a local CPU transcription engine backed by a warm process pool.
+        
+        Args:
+            model_size: Whisper model size/name (LOCAL_WHISPER_MODEL, default "base")
+            workers: Number of worker processes (LOCAL_WHISPER_WORKERS, default cores / WORKER_PROCESSES,
+                since every job-worker process starts its own pool)
+            threads_per_worker: CPU threads per worker (LOCAL_WHISPER_THREADS, default the cores
+                left to each worker)
+            compute_type: CTranslate2 compute type (LOCAL_WHISPER_COMPUTE_TYPE, default "int8")
+        """
+        self.model_size = model_size or os.environ.get("LOCAL_WHISPER_MODEL", "base")
+        cores = max(1, (os.cpu_count() or 1) // max(1, int(os.environ.get("WORKER_PROCESSES", "1"))))
+        self.workers = workers or int(os.environ.get("LOCAL_WHISPER_WORKERS", cores))
+        default_threads = max(1, cores // self.workers)
+        self.threads_per_worker = threads_per_worker or int(os.environ.get("LOCAL_WHISPER_THREADS", default_threads))
+        self.compute_type = compute_type or os.environ.get("LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    @property
+    def model_name(self) -> str:
+        return f"local:{self.model_size}:{self.compute_type}"
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_size, self.threads_per_worker, self.compute_type),
+            )
+        return self._pool
+    
+    async def warm_up(self):
+        """Start every worker process now, so models load before the first request."""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _ping) for _ in range(self.workers)))
+    
+    async def transcribe_path(self, path: str, **options) -> dict:
+        """
+        Transcribe an audio file on one of the resident worker models.
+        
+        Args:
+            path: Path to the audio file (must be readable by the worker processes)
+            **options: Options passed to the model's transcribe() (language, beam_size, ...)
+            
+        Returns:
+            dict: Transcription result with text and metadata
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), _transcribe_in_worker, path, options)
+    
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+_engine: Optional[LocalWhisperEngine] = None
+
+def get_local_engine() -> LocalWhisperEngine:
+    """Process-wide engine, so every service instance shares one warm pool."""
+    global _engine
+    if _engine is None:
+        _engine = LocalWhisperEngine()
+    return _engine
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import math
+import mimetypes
+import os
+import time
+from typing import BinaryIO, Dict, List, Optional
+
+from api.services.twitter_client import TwitterAPIError, TwitterClient
+
+UPLOAD_PATH = "/1.1/media/upload.json"
+
+class MediaUploadError(Exception):
+    """Raised when Twitter rejects an upload or fails to process it."""
+
+class ChunkedMediaUploader:
+    def __init__(
+        self,
+        client: TwitterClient,
+        chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        upload_base: Optional[str] = None,
+        processing_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the chunked (INIT/APPEND/FINALIZE) media uploader.
+        
+        Segments are read from disk one at a time per worker, so memory use
+        is about concurrency x chunk_size whatever the file size. Each
+        acknowledged segment is recorded in a JSON sidecar next to the file
+        ("<file>.upload.json"); an interrupted upload of the same file resumes
+        with the segments still missing.
+        
+        Args:
+            client: Signed Twitter client used for every command
+            chunk_size: Bytes per APPEND (TWITTER_UPLOAD_CHUNK_SIZE, default 4 MiB; Twitter allows up to 5 MB)
+            concurrency: Segments in flight at once (TWITTER_UPLOAD_CONCURRENCY, default 4)
+            upload_base: Upload API root (TWITTER_UPLOAD_BASE, default https://upload.twitter.com)
+            processing_timeout: Longest wait for server-side processing (TWITTER_MEDIA_PROCESSING_TIMEOUT, default 300)
+        """
+        self.client = client
+        self.chunk_size = chunk_size or int(os.environ.get("TWITTER_UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+        self.concurrency = concurrency or int(os.environ.get("TWITTER_UPLOAD_CONCURRENCY", "4"))
+        self.upload_base = upload_base or os.environ.get("TWITTER_UPLOAD_BASE", "https://upload.twitter.com")
+        self.processing_timeout = processing_timeout or float(os.environ.get("TWITTER_MEDIA_PROCESSING_TIMEOUT", "300"))
+        self.stats = {"uploads": 0, "resumed": 0, "segments": 0, "bytes": 0}
+        # Per-file [lock, users]: storage is content-addressed, so two submissions
+        # can share a file, and one sidecar mustn't be driven by two uploads at once
+        self._file_locks: Dict[str, List] = {}
+    
+    async def _command(self, method: str, **kwargs) -> dict:
+        return await self.client.request(method, UPLOAD_PATH, base_url=self.upload_base, **kwargs)
+    
+    @staticmethod
+    def _sidecar_path(path: str) -> str:
+        return f"{path}.upload.json"
+    
+    def _load_state(self, path: str, stat: os.stat_result) -> Optional[dict]:
+        """Saved progress for this file, if it still applies (same file, same chunking, not expired)."""
+        try:
+            with open(self._sidecar_path(path)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get("total_bytes") != stat.st_size or state.get("mtime") != stat.st_mtime
+                or state.get("chunk_size") != self.chunk_size or state.get("expires_at", 0) <= time.time()):
+            return None
+        return state
+    
+    def _save_state(self, path: str, state: dict):
+        tmp_path = self._sidecar_path(path) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._sidecar_path(path))
+    
+    def _clear_state(self, path: str):
+        try:
+            os.remove(self._sidecar_path(path))
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def _read_segment(f: BinaryIO, offset: int, size: int) -> bytes:
+        f.seek(offset)
+        return f.read(size)
+    
+    async def upload(self, path: str, media_type: Optional[str] = None, media_category: Optional[str] = None) -> str:
+        """
+        Upload a file and wait until Twitter has processed it.
+        
+        Concurrent uploads of the same file run one after the other, each
+        getting its own media ID.
+        
+        Args:
+            path: File to upload
+            media_type: MIME type (guessed from the file name if omitted)
+            media_category: Twitter media category, e.g. "tweet_video"
+        
+        Returns:
+            str: Media ID for use in tweets
+        """
+        key = os.path.realpath(path)
+        entry = self._file_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._upload_file(path, media_type, media_category)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._file_locks[key]
+    
+    async def _upload_file(self, path: str, media_type: Optional[str], media_category: Optional[str]) -> str:
+        media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        stat = os.stat(path)
+        state = self._load_state(path, stat)
+        if state is not None:
+            self.stats["resumed"] += 1
+            try:
+                return await self._upload(path, state)
+            except TwitterAPIError as e:
+                if e.status_code is None or e.status_code == 429 or e.status_code >= 500:
+                    raise
+                # Twitter no longer knows the media ID; start over
+                self._clear_state(path)
+        
+        init = await self._command("POST", data={
+            "command": "INIT",
+            "total_bytes": stat.st_size,
+            "media_type": media_type,
+            **({"media_category": media_category} if media_category else {}),
+        })
+        state = {
+            "media_id": init["media_id_string"],
+            "total_bytes": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_size": self.chunk_size,
+            "expires_at": time.time() + float(init.get("expires_after_secs", 86400)),
+            "acked": [],
+        }
+        self._save_state(path, state)
+        return await self._upload(path, state)
+    
+    async def _upload(self, path: str, state: dict) -> str:
+        media_id = state["media_id"]
+        acked = set(state["acked"])
+        segments = max(1, math.ceil(state["total_bytes"] / self.chunk_size))
+        pending = asyncio.Queue()
+        for index in range(segments):
+            if index not in acked:
+                pending.put_nowait(index)
+        
+        async def append_segments():
+            with open(path, "rb") as f:
+                while not pending.empty():
+                    index = pending.get_nowait()
+                    chunk = await asyncio.to_thread(self._read_segment, f, index * self.chunk_size, self.chunk_size)
+                    await self._command(
+                        "POST",
+                        data={"command": "APPEND", "media_id": media_id, "segment_index": str(index)},
+                        files={"media": ("media", chunk, "application/octet-stream")},
+                        idempotent=True,  # Re-sending a segment index replaces it
+                    )
+                    acked.add(index)
+                    state["acked"] = sorted(acked)
+                    self._save_state(path, state)
+                    self.stats["segments"] += 1
+                    self.stats["bytes"] += len(chunk)
+        
+        workers = [asyncio.create_task(append_segments()) for _ in range(min(self.concurrency, pending.qsize()))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # Acknowledged segments are already in the sidecar for the next attempt
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        
+        finalized = await self._command("POST", data={"command": "FINALIZE", "media_id": media_id})
+        self._clear_state(path)
+        self.stats["uploads"] += 1
+        await self._wait_for_processing(media_id, finalized.get("processing_info"))
+        return media_id
+    
+    async def _wait_for_processing(self, media_id: str, processing_info: Optional[dict]):
+        """Poll STATUS until processing succeeds, sleeping as long as Twitter asks between checks."""
+        deadline = time.monotonic() + self.processing_timeout
+        while processing_info and processing_info.get("state") not in ("succeeded", None):
+            if processing_info["state"] == "failed":
+                error = processing_info.get("error", {})
+                raise MediaUploadError(f"Twitter could not process media {media_id}: {error.get('message', error)}")
+            delay = float(processing_info.get("check_after_secs", 1))
+            if time.monotonic() + delay > deadline:
+                raise MediaUploadError(f"Media {media_id} still processing after {self.processing_timeout:.0f}s")
+            await asyncio.sleep(delay)
+            status = await self._command("GET", params={"command": "STATUS", "media_id": media_id})
+            processing_info = status.get("processing_info")
@@ -0,0 +1,269 @@
+import asyncio
+import math
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.services.twilio_service import SMSDeliveryError, TwilioService
+from database.models import Notification, get_async_session
+
+# GSM 03.38 basic character set; anything else forces UCS-2 encoding
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+# Extension table characters take two septets (escape + char)
+GSM7_EXTENDED = set("^{}\\[~]|€\f")
+
+def segment_info(text: str) -> Tuple[str, int]:
+    """
+    Work out how an SMS will be encoded and billed.
+    
+    GSM-7 fits 160 characters in one segment, or 153 per segment once split;
+    UCS-2 (any character outside GSM-7, e.g. emoji) fits 70, or 67 per segment.
+    
+    Returns:
+        tuple: (encoding, segments) with encoding "GSM-7" or "UCS-2"
+    """
+    if all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in text):
+        length = sum(2 if char in GSM7_EXTENDED else 1 for char in text)
+        single, multi, encoding = 160, 153, "GSM-7"
+    else:
+        # UTF-16 code units: characters outside the BMP (most emoji) take two
+        length = len(text.encode("utf-16-le")) // 2
+        single, multi, encoding = 70, 67, "UCS-2"
+    if length <= single:
+        return encoding, 1
+    return encoding, math.ceil(length / multi)
+
+def split_message(lines: List[str], max_segments: int, reserve: int = 0) -> List[str]:
+    """
+    Pack lines into as few messages as possible, each at most max_segments
+    segments. Lines are kept whole unless a single line is too long on its own.
+    
+    Args:
+        lines: Message lines, in order
+        max_segments: Most segments per message
+        reserve: Characters to leave free in every message (e.g. for a "(1/3) " prefix)
+    """
+    padding = " " * reserve
+    
+    def fits(text: str) -> bool:
+        return segment_info(padding + text)[1] <= max_segments
+    
+    parts, current = [], ""
+    for line in lines:
+        candidate = f"{current}\n{line}" if current else line
+        if fits(candidate):
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        # A single oversized line is cut at the longest prefix that fits
+        while not fits(line):
+            low, high = 1, len(line)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if fits(line[:mid]):
+                    low = mid
+                else:
+                    high = mid - 1
+            parts.append(line[:low])
+            line = line[low:]
+        current = line
+    if current:
+        parts.append(current)
+    return parts
+
+async def queue_notification(
+    session: AsyncSession,
+    recipient: str,
+    message: str,
+    submission_id: Optional[int] = None
+) -> Notification:
+    """
+    Add a pending notification for the coalescer to send. The caller commits,
+    so it can be written in the same transaction as the change it reports.
+    """
+    notification = Notification(
+        submission_id=submission_id,
+        recipient=recipient,
+        message=message,
+        delivery_status="pending",
+    )
+    session.add(notification)
+    await session.flush()
+    return notification
+
+class NotificationCoalescer:
+    def __init__(
+        self,
+        twilio_service: TwilioService,
+        window_seconds: Optional[float] = None,
+        max_segments: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        sending_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the notification coalescer.
+        
+        Pending notifications are held per recipient until the oldest is
+        window_seconds old, then everything pending for that recipient goes
+        out as one digest (split into several messages only if it exceeds
+        max_segments). The original rows point at the digest through
+        digest_id, so 30 approvals in a row cost one API call, not 30.
+        
+        Delivery is at most once. A digest is committed as "claimed" before
+        the API call, so a crash can't send it twice; a digest still
+        "claimed" after sending_timeout (its process died mid-send) is
+        marked failed rather than retried, since Twilio may already have
+        accepted it. "claimed" is the coalescer's own marker, distinct from
+        Twilio's statuses (which include "sending"), so delivery callbacks
+        and the sweep never touch each other's rows.
+        
+        Args:
+            twilio_service: Service used to send the digests
+            window_seconds: Coalescing window per recipient (NOTIFY_COALESCE_WINDOW, default 60)
+            max_segments: Most SMS segments per digest message (NOTIFY_MAX_SEGMENTS, default 3)
+            poll_interval: Seconds between scans for due recipients (NOTIFY_POLL_INTERVAL, default 5)
+            sending_timeout: Age after which a "claimed" digest counts as abandoned (NOTIFY_SENDING_TIMEOUT, default 600)
+        """
+        self.twilio_service = twilio_service
+        self.window = timedelta(seconds=window_seconds if window_seconds is not None
+                                else float(os.environ.get("NOTIFY_COALESCE_WINDOW", "60")))
+        self.max_segments = max_segments or int(os.environ.get("NOTIFY_MAX_SEGMENTS", "3"))
+        self.poll_interval = poll_interval or float(os.environ.get("NOTIFY_POLL_INTERVAL", "5"))
+        self.sending_timeout = timedelta(seconds=sending_timeout or float(os.environ.get("NOTIFY_SENDING_TIMEOUT", "600")))
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"notifications": 0, "digests": 0, "messages_sent": 0, "segments": 0, "failed": 0, "abandoned": 0}
+    
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """
+        Send digests for every recipient whose window has closed.
+        
+        Returns:
+            int: Number of notifications folded into digests
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - self.window
+        async with get_async_session() as session:
+            await self._sweep_abandoned(session, now)
+            recipients = (await session.execute(
+                select(Notification.recipient)
+                .where(Notification.delivery_status == "pending")
+                .group_by(Notification.recipient)
+                .having(func.min(Notification.created_at) <= cutoff)
+            )).scalars().all()
+            folded = 0
+            for recipient in recipients:
+                folded += await self._send_digest(session, recipient)
+            return folded
+    
+    async def _sweep_abandoned(self, session: AsyncSession, now: datetime) -> int:
+        """Mark digests left "claimed" by a crashed process as failed (never re-sent)."""
+        result = await session.execute(
+            update(Notification)
+            .where(
+                Notification.delivery_status == "claimed",
+                Notification.message_sid.is_(None),
+                Notification.created_at <= now - self.sending_timeout,
+            )
+            .values(delivery_status="failed")
+        )
+        await session.commit()
+        if result.rowcount:
+            print(f"Marked {result.rowcount} abandoned digest message(s) failed")
+            self.stats["abandoned"] += result.rowcount
+        return result.rowcount
+    
+    async def _send_digest(self, session: AsyncSession, recipient: str) -> int:
+        # Claim the recipient's pending rows by pointing them at a new digest row;
+        # rows another process claimed first keep their digest_id and are skipped.
+        digest = Notification(recipient=recipient, message="", delivery_status="claimed")
+        session.add(digest)
+        await session.flush()
+        await session.execute(
+            update(Notification)
+            .where(
+                Notification.recipient == recipient,
+                Notification.delivery_status == "pending",
+                Notification.digest_id.is_(None),
+            )
+            .values(digest_id=digest.id, delivery_status="folded")
+        )
+        originals = (await session.execute(
+            select(Notification)
+            .where(Notification.digest_id == digest.id)
+            .order_by(Notification.created_at, Notification.id)
+        )).scalars().all()
+        if not originals:
+            await session.execute(delete(Notification).where(Notification.id == digest.id))
+            await session.commit()
+            return 0
+        
+        lines = [n.message for n in originals]
+        if len(lines) > 1:
+            lines.insert(0, f"{len(lines)} updates:")
+        parts = split_message(lines, self.max_segments)
+        if len(parts) > 1:
+            # Split again leaving room for the "(1/3) " part numbers
+            parts = split_message(lines, self.max_segments, reserve=len(f"({len(parts) * 10}/{len(parts) * 10}) "))
+            parts = [f"({i}/{len(parts)}) {part}" for i, part in enumerate(parts, 1)]
+        
+        # Extra parts are their own rows, so every sent message has a row and a SID
+        digests = [digest]
+        digest.message = parts[0]
+        for part in parts[1:]:
+            extra = Notification(recipient=recipient, message=part, delivery_status="claimed")
+            session.add(extra)
+            digests.append(extra)
+        # Committed before sending, so a crash can't send the same digest twice
+        await session.commit()
+        
+        for row in digests:
+            try:
+                result = await self.twilio_service.send_sms(recipient, row.message)
+            except SMSDeliveryError as e:
+                print(f"Digest to {recipient} failed: {str(e)}")
+                row.delivery_status = "failed"
+                self.stats["failed"] += 1
+            else:
+                row.sent = True
+                row.sent_at = datetime.utcnow()
+                row.message_sid = result["sid"]
+                row.delivery_status = result["status"]
+                self.stats["messages_sent"] += 1
+                self.stats["segments"] += segment_info(row.message)[1]
+            await session.commit()
+        
+        self.stats["notifications"] += len(originals)
+        self.stats["digests"] += 1
+        return len(originals)
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Notification coalescer error: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+    
+    def start(self):
+        """Start sending digests in the background (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def get_stats(self) -> dict:
+        return dict(self.stats)
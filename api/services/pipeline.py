@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.services.audio_preprocess import AudioDecodeError, AudioPreprocessor, PREPROCESS_VERSION
+from api.services.gpt_caption import CaptionGenerationService, get_caption_service
+from api.services.waveform import write_peak_index
+from api.services.jobs import get_payload
+from api.services.whisper import WhisperTranscriptionService
+from database.models import Job, Submission
+
+# Stages run in order; a job's `stage` column records the next one to run, so
+# a retried job resumes where the previous attempt stopped.
+STAGES = ["preprocess", "transcribe", "classify", "caption", "enqueue"]
+
+class StageError(Exception):
+    """Raised when a pipeline stage cannot make progress."""
+
+class SubmissionPipeline:
+    def __init__(
+        self,
+        whisper_service: Optional[WhisperTranscriptionService] = None,
+        caption_service: Optional[CaptionGenerationService] = None,
+        preprocessor: Optional[AudioPreprocessor] = None
+    ):
+        """
+        Initialize the submission processing pipeline.
+        
+        Args:
+            whisper_service: Transcription service (defaults to a new instance)
+            caption_service: Caption service (defaults to the shared instance)
+            preprocessor: Audio preprocessor, or None to use the default unless
+                PREPROCESS_ENABLED=false
+        """
+        self.whisper_service = whisper_service or WhisperTranscriptionService()
+        self.caption_service = caption_service or get_caption_service()
+        if preprocessor is None and os.environ.get("PREPROCESS_ENABLED", "true").lower() != "false":
+            preprocessor = AudioPreprocessor()
+        self.preprocessor = preprocessor
+        # Decodes originals for the waveform preview even when preprocessing is off
+        self.decoder = preprocessor or AudioPreprocessor()
+        self.caption_candidates = int(os.environ.get("CAPTION_CANDIDATES", "3"))
+    
+    async def run(
+        self,
+        session: AsyncSession,
+        job: Job,
+        on_stage: Optional[Callable[[str], Awaitable[None]]] = None
+    ):
+        """
+        Run the remaining stages of a job, committing after each one.
+        
+        Args:
+            session: Database session
+            job: The claimed job
+            on_stage: Optional callback invoked before each stage (e.g. heartbeat)
+        """
+        submission = await session.get(Submission, job.submission_id)
+        if submission is None:
+            raise StageError(f"Submission {job.submission_id} no longer exists")
+        payload = get_payload(job)
+        
+        start = STAGES.index(job.stage) if job.stage in STAGES else 0
+        for stage in STAGES[start:]:
+            if on_stage:
+                await on_stage(stage)
+            await getattr(self, f"_{stage}")(submission, payload)
+            job.stage = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else "done"
+            submission.updated_at = datetime.utcnow()
+            await session.commit()
+    
+    async def _preprocess(self, submission: Submission, payload: dict):
+        if not submission.storage_path:
+            return
+        base_path = os.path.splitext(submission.storage_path)[0]
+        output_path = f"{base_path}.{PREPROCESS_VERSION}.wav"
+        
+        def process():
+            samples, rate = self.decoder.decode(submission.storage_path)
+            # Waveform peaks and duration describe the original clip, as the dashboard plays it
+            write_peak_index(samples, base_path)
+            if self.preprocessor is None:
+                return len(samples) / rate, None
+            if not os.path.exists(output_path):
+                # Otherwise another job on the same stored file already wrote it (atomically)
+                self.preprocessor.process_decoded(samples, rate, submission.storage_path, output_path)
+            return len(samples) / rate, os.path.getsize(submission.storage_path) - os.path.getsize(output_path)
+        
+        try:
+            # CPU-bound; keep the event loop free for lease heartbeats
+            duration, bytes_saved = await asyncio.to_thread(process)
+        except AudioDecodeError as e:
+            # Transcribe the original upload instead
+            print(f"Preprocessing skipped for submission {submission.id}: {str(e)}")
+            return
+        submission.duration_seconds = round(duration, 3)
+        if bytes_saved is not None:
+            submission.processed_path = output_path
+            submission.bytes_saved = bytes_saved
+    
+    async def _transcribe(self, submission: Submission, payload: dict):
+        if not submission.storage_path:
+            raise StageError(f"Submission {submission.id} has no stored audio")
+        path = submission.processed_path or submission.storage_path
+        with open(path, "rb") as audio_file:
+            result = await self.whisper_service.transcribe(
+                audio_file,
+                content_hash=submission.content_hash,
+                variant=PREPROCESS_VERSION if submission.processed_path else ""
+            )
+        submission.transcript = result["text"]
+    
+    async def _classify(self, submission: Submission, payload: dict):
+        submission.sound_type = self.whisper_service.detect_sound_type(submission.transcript or "")
+    
+    async def _caption(self, submission: Submission, payload: dict):
+        transcript = submission.transcript or submission.text_content or ""
+        if payload.get("caption_hint"):
+            transcript = f"{transcript}\nHint: {payload['caption_hint']}"
+        tone = payload.get("tone", submission.tone or "auto")
+        # Several candidates in one backend call so reviewers can switch without regenerating
+        candidates = await self.caption_service.generate_captions(
+            transcript=transcript,
+            sound_type=submission.sound_type or "other",
+            tones=tone if isinstance(tone, list) else [tone],
+            n=self.caption_candidates
+        )
+        if not candidates:
+            raise StageError(f"No caption candidates generated for submission {submission.id}")
+        submission.caption = candidates[0]["caption"]
+        submission.tone = candidates[0]["tone"]
+        submission.caption_candidates = json.dumps(candidates)
+    
+    async def _enqueue(self, submission: Submission, payload: dict):
+        # Hand over to the review queue
+        submission.status = "pending"
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from typing import Optional
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize a token bucket rate limiter.
+        
+        Args:
+            rate: Tokens added per second (sustained throughput)
+            capacity: Maximum tokens held, i.e. the allowed burst (defaults to max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available right now, without waiting."""
+        self._refill(time.monotonic())
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+    
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until tokens are available, then take them (FIFO across waiters)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,410 @@
+import asyncio
+import heapq
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.services.jobs import retry_delay
+from api.services.twitter import TwitterService
+from database.models import Lease, Submission, Tweet, get_async_session
+
+SCHEDULER_LEASE = "posting-scheduler"
+# Upload the submitted audio with the tweet. Off by default: Twitter's media
+# upload takes images and video, not bare audio, so this only suits storage
+# that holds video renders of the submissions.
+ATTACH_AUDIO = os.environ.get("TWITTER_ATTACH_AUDIO", "false").lower() == "true"
+CLAIM_RETRY_SECONDS = 5.0
+
+class PostingError(Exception):
+    """Raised when an item cannot be posted."""
+
+class QuotaExceeded(PostingError):
+    """Raised when the posting quota for the current window is used up."""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"Posting quota exhausted; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+async def acquire_lease(session: AsyncSession, name: str, holder: str, ttl_seconds: float) -> bool:
+    """
+    Take or renew a named lease. Only one holder can own an unexpired lease,
+    so this works as a leader election across processes and replicas.
+    
+    Returns:
+        bool: True if holder now owns the lease
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    result = await session.execute(
+        update(Lease)
+        .where(Lease.name == name, or_(Lease.holder == holder, Lease.expires_at < now))
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount == 0:
+        session.add(Lease(name=name, holder=holder, expires_at=expires_at))
+        try:
+            await session.flush()
+        except IntegrityError:
+            # Row exists and someone else holds it
+            await session.rollback()
+            return False
+    await session.commit()
+    return True
+
+async def release_lease(session: AsyncSession, name: str, holder: str):
+    await session.execute(
+        update(Lease).where(Lease.name == name, Lease.holder == holder).values(expires_at=datetime.utcnow())
+    )
+    await session.commit()
+
+class PostingQuota:
+    def __init__(self, limit: Optional[int] = None, window_seconds: Optional[float] = None):
+        """
+        Posting quota over a sliding window, counted from the tweets table (plus
+        items claimed for posting) so it holds across restarts and replicas.
+        
+        Args:
+            limit: Tweets allowed per window (TWITTER_POST_LIMIT, default 50)
+            window_seconds: Window length (TWITTER_POST_WINDOW, default 86400)
+        """
+        self.limit = limit or int(os.environ.get("TWITTER_POST_LIMIT", "50"))
+        self.window = timedelta(seconds=window_seconds or float(os.environ.get("TWITTER_POST_WINDOW", "86400")))
+    
+    def _used_query(self, since: datetime):
+        # Claimed items count too: they're about to become tweets
+        tweets = select(func.count()).select_from(Tweet).where(Tweet.posted_at > since).scalar_subquery()
+        claims = select(func.count()).select_from(Submission).where(Submission.status == "posting").scalar_subquery()
+        return tweets, claims
+    
+    async def _used(self, session: AsyncSession, since: datetime) -> Tuple[int, int]:
+        tweets, claims = self._used_query(since)
+        return tuple((await session.execute(select(tweets, claims))).one())
+    
+    def has_room(self):
+        """SQL condition that holds while another tweet fits, for use inside a claiming UPDATE."""
+        tweets, claims = self._used_query(datetime.utcnow() - self.window)
+        return tweets + claims < self.limit
+    
+    async def in_use(self, session: AsyncSession) -> int:
+        """Tweets in the current window plus items claimed for posting."""
+        return sum(await self._used(session, datetime.utcnow() - self.window))
+    
+    async def remaining(self, session: AsyncSession) -> int:
+        """Tweets that still fit in the current window."""
+        return max(0, self.limit - await self.in_use(session))
+    
+    async def wait_time(self, session: AsyncSession) -> float:
+        """Seconds until another tweet fits in the window (0 if one fits now)."""
+        now = datetime.utcnow()
+        since = now - self.window
+        tweets, claims = await self._used(session, since)
+        used = tweets + claims
+        if used < self.limit:
+            return 0.0
+        # The window reopens when enough of its oldest tweets age out
+        oldest = (await session.execute(
+            select(Tweet.posted_at).where(Tweet.posted_at > since)
+            .order_by(Tweet.posted_at).offset(used - self.limit).limit(1)
+        )).scalar()
+        if oldest is None:
+            # Only held up by posts in flight, which finish (or are released) shortly
+            return CLAIM_RETRY_SECONDS
+        return max(0.0, (oldest + self.window - now).total_seconds())
+
+async def post_submission(
+    twitter_service: TwitterService,
+    submission_id: int,
+    quota: Optional[PostingQuota] = None,
+    due_before: Optional[datetime] = None
+) -> Tweet:
+    """
+    Post an approved submission and record the tweet.
+    
+    The item is first claimed (approved -> posting) so concurrent posters
+    can't tweet it twice, then posted with publish_claimed.
+    
+    Args:
+        twitter_service: Service used to post
+        submission_id: Item to post
+        quota: Optional quota to check first (raises QuotaExceeded)
+        due_before: Only post if the item is scheduled at or before this time
+        
+    Returns:
+        Tweet: The recorded tweet
+    """
+    async with get_async_session() as session:
+        if quota is not None:
+            wait = await quota.wait_time(session)
+            if wait > 0:
+                raise QuotaExceeded(wait)
+        
+        conditions = [Submission.id == submission_id, Submission.status == "approved"]
+        if due_before is not None:
+            conditions.append(Submission.scheduled_at <= due_before)
+        if quota is not None:
+            # Re-checked in the claim itself, so concurrent posters can't overshoot
+            conditions.append(quota.has_room())
+        claimed = await session.execute(
+            update(Submission).where(*conditions)
+            .values(status="posting", posting_claimed_at=datetime.utcnow(), updated_at=datetime.utcnow())
+        )
+        await session.commit()
+        if claimed.rowcount != 1:
+            if quota is not None:
+                wait = await quota.wait_time(session)
+                if wait > 0:
+                    raise QuotaExceeded(wait)
+            raise PostingError(f"Item {submission_id} is not approved (or not due)")
+    return await publish_claimed(twitter_service, submission_id)
+
+async def publish_claimed(twitter_service: TwitterService, submission_id: int) -> Tweet:
+    """
+    Post an item already claimed for posting (status "posting").
+    
+    With TWITTER_ATTACH_AUDIO, the stored file is uploaded as media first (a
+    failed upload posts the text alone). After a successful post,
+    the Tweet row and the posting -> posted change commit in one
+    transaction; if posting fails the claim is released back to approved
+    and the error re-raised.
+    
+    Returns:
+        Tweet: The recorded tweet
+    """
+    async with get_async_session() as session:
+        submission = await session.get(Submission, submission_id)
+        try:
+            media_ids = None
+            if ATTACH_AUDIO and submission.storage_path and os.path.exists(submission.storage_path):
+                try:
+                    media_ids = [await twitter_service.upload_media(submission.storage_path)]
+                except Exception as e:
+                    # The caption still goes out; a rejected attachment shouldn't hold it back
+                    print(f"Media upload for item {submission_id} failed, posting text only: {str(e)}")
+            result = await twitter_service.post_tweet(submission.caption, media_ids=media_ids)
+        except Exception:
+            await session.execute(
+                update(Submission).where(Submission.id == submission_id, Submission.status == "posting")
+                .values(status="approved", updated_at=datetime.utcnow())
+            )
+            await session.commit()
+            raise
+        
+        tweet = Tweet(
+            submission_id=submission_id,
+            tweet_id=str(result["id"]),
+            text=result.get("text", submission.caption),
+            url=result["url"],
+        )
+        session.add(tweet)
+        submission.status = "posted"
+        submission.updated_at = datetime.utcnow()
+        await session.commit()
+        return tweet
+
+async def release_stale_claims(session: AsyncSession, older_than: timedelta) -> Tuple[int, int]:
+    """
+    Recover "posting" claims abandoned by a crash or a failed commit.
+    
+    A stale claim whose Tweet row exists was posted and only lost its status
+    change, so it is marked posted. The rest go back to approved (keeping
+    scheduled_at, so the scheduler retries them).
+    
+    Args:
+        session: Database session (committed here)
+        older_than: Age after which a claim counts as abandoned
+        
+    Returns:
+        Tuple[int, int]: (items marked posted, items released to approved)
+    """
+    now = datetime.utcnow()
+    stale = [
+        Submission.status == "posting",
+        or_(Submission.posting_claimed_at.is_(None), Submission.posting_claimed_at < now - older_than),
+    ]
+    has_tweet = select(Tweet.id).where(Tweet.submission_id == Submission.id).exists()
+    posted = await session.execute(
+        update(Submission).where(*stale, has_tweet).values(status="posted", updated_at=now)
+    )
+    released = await session.execute(
+        update(Submission).where(*stale, ~has_tweet).values(status="approved", updated_at=now)
+    )
+    await session.commit()
+    return posted.rowcount, released.rowcount
+
+class PostingScheduler:
+    def __init__(
+        self,
+        twitter_service: Optional[TwitterService] = None,
+        quota: Optional[PostingQuota] = None,
+        lease_seconds: Optional[float] = None,
+        resync_interval: Optional[float] = None,
+        claim_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the scheduled posting engine.
+        
+        Approved items with a scheduled_at are kept in a min-heap, rebuilt from
+        the database on start and every resync_interval seconds (so schedules
+        changed by other replicas are picked up). Each due item is posted via
+        post_submission. When the quota is used up, due items wait (in
+        order) until the window reopens. Only the holder of the
+        "posting-scheduler" lease posts, so several replicas can run this
+        safely. On each resync the leader also releases "posting" claims
+        older than claim_timeout (see release_stale_claims).
+        
+        Args:
+            twitter_service: Service used to post (defaults to a new instance)
+            quota: Posting quota (defaults to PostingQuota())
+            lease_seconds: Leader lease length (SCHEDULER_LEASE_SECONDS, default 30)
+            resync_interval: Seconds between heap rebuilds (SCHEDULER_RESYNC_INTERVAL, default 60)
+            claim_timeout: Age of an abandoned "posting" claim (SCHEDULER_CLAIM_TIMEOUT, default 1800;
+                keep it above the longest upload plus rate-limit wait)
+        """
+        self.twitter_service = twitter_service or TwitterService()
+        self.quota = quota or PostingQuota()
+        self.lease_seconds = lease_seconds or float(os.environ.get("SCHEDULER_LEASE_SECONDS", "30"))
+        self.resync_interval = resync_interval or float(os.environ.get("SCHEDULER_RESYNC_INTERVAL", "60"))
+        self.claim_timeout = timedelta(seconds=claim_timeout or float(os.environ.get("SCHEDULER_CLAIM_TIMEOUT", "1800")))
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._heap: List[Tuple[datetime, int]] = []
+        self._attempts: Dict[int, int] = {}  # item id -> consecutive failed posts
+        self._last_sync: Optional[datetime] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.is_leader = False
+        self.stats = {"posted": 0, "failed": 0, "quota_waits": 0, "claims_recovered": 0, "claims_released": 0}
+    
+    async def rebuild(self, session: AsyncSession):
+        """Reload the heap from approved items with a scheduled time."""
+        rows = (await session.execute(
+            select(Submission.scheduled_at, Submission.id)
+            .where(Submission.status == "approved", Submission.scheduled_at.isnot(None))
+        )).all()
+        self._heap = [(scheduled_at, item_id) for scheduled_at, item_id in rows]
+        heapq.heapify(self._heap)
+        scheduled = {item_id for _, item_id in self._heap}
+        self._attempts = {item_id: n for item_id, n in self._attempts.items() if item_id in scheduled}
+        self._last_sync = datetime.utcnow()
+    
+    def schedule(self, item_id: int, scheduled_at: datetime):
+        """Add an item scheduled in this process without waiting for the next resync."""
+        heapq.heappush(self._heap, (scheduled_at, item_id))
+        self._wakeup.set()
+    
+    async def _sleep(self, seconds: float):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, seconds))
+        except asyncio.TimeoutError:
+            pass
+    
+    async def run_once(self) -> float:
+        """
+        Do one round of leader election and posting.
+        
+        Returns:
+            float: Seconds to sleep before the next round
+        """
+        renew_every = self.lease_seconds / 3
+        async with get_async_session() as session:
+            self.is_leader = await acquire_lease(session, SCHEDULER_LEASE, self.holder, self.lease_seconds)
+            if not self.is_leader:
+                self._last_sync = None  # Resync if we take over later
+                return renew_every
+            now = datetime.utcnow()
+            if self._last_sync is None or (now - self._last_sync).total_seconds() >= self.resync_interval:
+                recovered, released = await release_stale_claims(session, self.claim_timeout)
+                if recovered or released:
+                    print(f"Recovered {recovered} posted and released {released} abandoned posting claims")
+                self.stats["claims_recovered"] += recovered
+                self.stats["claims_released"] += released
+                await self.rebuild(session)
+        
+        if not self._heap or self._heap[0][0] > now:
+            until_next = (self._heap[0][0] - now).total_seconds() if self._heap else renew_every
+            return min(until_next, renew_every)
+        
+        scheduled_at, item_id = self._heap[0]
+        try:
+            tweet = await post_submission(self.twitter_service, item_id, self.quota, due_before=now)
+        except QuotaExceeded as e:
+            # Backpressure: leave the item at the head and wait for the window
+            self.stats["quota_waits"] += 1
+            return min(e.retry_after, renew_every)
+        except PostingError:
+            # Unapproved, rescheduled or already posted since the heap was built
+            heapq.heappop(self._heap)
+            self._attempts.pop(item_id, None)
+            return 0.0
+        except Exception as e:
+            heapq.heappop(self._heap)
+            self.stats["failed"] += 1
+            attempts = self._attempts[item_id] = self._attempts.get(item_id, 0) + 1
+            retry_at = now + timedelta(seconds=retry_delay(attempts, base=30.0))
+            print(f"Scheduled post of item {item_id} failed, retrying at {retry_at}: {str(e)}")
+            async with get_async_session() as session:
+                await session.execute(
+                    update(Submission).where(Submission.id == item_id, Submission.status == "approved")
+                    .values(scheduled_at=retry_at)
+                )
+                await session.commit()
+            self.schedule(item_id, retry_at)
+            return 0.0
+        
+        heapq.heappop(self._heap)
+        self._attempts.pop(item_id, None)
+        self.stats["posted"] += 1
+        print(f"Posted scheduled item {item_id} (due {scheduled_at}): {tweet.url}")
+        return 0.0
+    
+    async def _run(self):
+        while True:
+            try:
+                delay = await self.run_once()
+            except Exception as e:
+                print(f"Posting scheduler error: {str(e)}")
+                delay = self.lease_seconds / 3
+            await self._sleep(delay)
+    
+    def start(self):
+        """Start the scheduler loop (call from a running event loop)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the loop and hand the lease to another replica."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            async with get_async_session() as session:
+                await release_lease(session, SCHEDULER_LEASE, self.holder)
+            self.is_leader = False
+    
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "leader": self.is_leader,
+            "scheduled": len(self._heap),
+            "next_due": self._heap[0][0].isoformat() if self._heap else None,
+            "twitter": self.twitter_service.get_rate_limits(),
+        }
+
+_posting_scheduler: Optional[PostingScheduler] = None
+
+def get_posting_scheduler() -> PostingScheduler:
+    """Process-wide posting scheduler."""
+    global _posting_scheduler
+    if _posting_scheduler is None:
+        _posting_scheduler = PostingScheduler()
+    return _posting_scheduler
@@ -0,0 +1,155 @@
+import asyncio
+import os
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from api.services.jobs import job_values
+from database.models import Job, Submission, get_async_session
+
+@dataclass
+class InboundMessage:
+    sender: str
+    body: str
+    message_sid: Optional[str]
+    future: asyncio.Future = field(repr=False)
+
+class InboundMessageWriter:
+    def __init__(self, max_batch: Optional[int] = None, max_delay: Optional[float] = None):
+        """
+        Initialize a group-commit writer for inbound SMS.
+        
+        Webhook requests hand their message to a single writer task and wait
+        for it to be committed. Messages arriving together are written in one
+        transaction, so a burst costs a few commits instead of one per message
+        and concurrent requests never queue on the database write lock.
+        
+        Args:
+            max_batch: Most messages per transaction (SMS_INBOX_MAX_BATCH, default 200)
+            max_delay: Seconds to wait for more messages before committing (SMS_INBOX_MAX_DELAY,
+                default 0: batch whatever queued up while the previous commit ran)
+        """
+        self.max_batch = max_batch or int(os.environ.get("SMS_INBOX_MAX_BATCH", "200"))
+        self.max_delay = max_delay if max_delay is not None else float(os.environ.get("SMS_INBOX_MAX_DELAY", "0"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"messages": 0, "duplicates": 0, "batches": 0}
+    
+    async def submit(self, sender: str, body: str, message_sid: Optional[str]) -> bool:
+        """
+        Store an inbound message and queue it for captioning.
+        
+        Returns:
+            bool: True if stored, False if the MessageSid was already stored
+        """
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(InboundMessage(sender, body, message_sid, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            if self.max_delay:
+                await asyncio.sleep(self.max_delay)
+            # Everything that queued up meanwhile (or while the previous batch was committing)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                message = self._queue.get_nowait()
+                if message is None:
+                    stopping = True
+                    break
+                batch.append(message)
+            try:
+                await self._write(batch)
+            except Exception as e:
+                for message in batch:
+                    if not message.future.done():
+                        message.future.set_exception(e)
+            if stopping:
+                return
+    
+    async def _write(self, batch: List[InboundMessage]):
+        self.stats["batches"] += 1
+        try:
+            await self._insert(batch)
+        except IntegrityError:
+            # Another process stored one of these SIDs since we checked; write one at a time
+            for message in batch:
+                try:
+                    await self._insert([message])
+                except IntegrityError:
+                    self.stats["duplicates"] += 1
+                    message.future.set_result(False)
+    
+    async def _insert(self, batch: List[InboundMessage]):
+        async with get_async_session() as session:
+            sids = {m.message_sid for m in batch if m.message_sid}
+            stored = set((await session.execute(
+                select(Submission.message_sid).where(Submission.message_sid.in_(sids))
+            )).scalars()) if sids else set()
+            
+            new = []
+            for message in batch:
+                if message.message_sid and message.message_sid in stored:
+                    continue
+                if message.message_sid:
+                    stored.add(message.message_sid)
+                new.append(message)
+            
+            if new:
+                now = datetime.utcnow()
+                # Core bulk inserts: one statement per table for the whole batch
+                submission_ids = (await session.execute(
+                    insert(Submission).returning(Submission.id),
+                    [{
+                        "text_content": message.body,
+                        "transcript": message.body,
+                        "sound_type": "sms_entry",
+                        "caption": "",  # Filled in by the caption stage
+                        "tone": "auto",  # Use auto tone selection for SMS submissions
+                        "status": "processing",
+                        "source": "sms",
+                        "phone_number": message.sender,
+                        "message_sid": message.message_sid,
+                        "created_at": now,
+                        "updated_at": now,
+                    } for message in new]
+                )).scalars().all()
+                await session.execute(
+                    insert(Job),
+                    [job_values(submission_id, {"tone": "auto"}, stage="caption") for submission_id in submission_ids]
+                )
+                await session.commit()
+        
+        stored_messages = {id(message) for message in new}
+        for message in batch:
+            stored_message = id(message) in stored_messages
+            self.stats["messages" if stored_message else "duplicates"] += 1
+            message.future.set_result(stored_message)
+    
+    async def stop(self):
+        """Let queued messages finish, then stop the writer task."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+_inbound_writer: Optional[InboundMessageWriter] = None
+
+def get_inbound_writer() -> InboundMessageWriter:
+    """Process-wide inbound SMS writer, so all webhook requests share one batch."""
+    global _inbound_writer
+    if _inbound_writer is None:
+        _inbound_writer = InboundMessageWriter()
+    return _inbound_writer
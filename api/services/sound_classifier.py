@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Keyword tables; label order is priority (the first label with a hit wins)
+DEFAULT_KEYWORDS = {
+    "whimper": ["whimper", "whimpers", "whimpered", "whimpering", "please"],
+    "moan": ["moan", "moans", "moaned", "moaning", "feels"],
+    "beg": ["beg", "begs", "begged", "begging", "need", "needs", "want", "wants"],
+}
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored by common prefixes, e.g.
+    ["moan", "moaned", "moans"] -> "moan(?:ed|s)?". The regex engine then
+    branches once per character instead of retrying every keyword.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if optional else group
+    
+    return build(trie)
+
+class SoundClassifier:
+    def __init__(
+        self,
+        keywords: Optional[Dict[str, List[str]]] = None,
+        keywords_path: Optional[str] = None,
+        reload_interval: float = 5.0
+    ):
+        """
+        Initialize a keyword-based sound-type classifier.
+        
+        A transcript gets the first label (in table order) with a whole-word
+        keyword hit. The tables are compiled once: per label, a few substring
+        probes (fast C scans, as before) and a word-boundary regex that only
+        runs to confirm a probe hit, so "needle" doesn't count as "need".
+        
+        Args:
+            keywords: Label -> keyword list. Defaults to DEFAULT_KEYWORDS.
+            keywords_path: Optional JSON file with the same shape (SOUND_KEYWORDS_PATH).
+                It is re-read when its modification time changes.
+            reload_interval: Minimum seconds between checks of keywords_path
+        """
+        self.keywords_path = keywords_path or os.environ.get("SOUND_KEYWORDS_PATH")
+        self.reload_interval = reload_interval
+        self._mtime = None
+        self._last_check = 0.0
+        self._compiled = None
+        self.load(keywords or DEFAULT_KEYWORDS)
+        if self.keywords_path:
+            self._maybe_reload(force=True)
+    
+    def load(self, keywords: Dict[str, List[str]]):
+        """Compile and swap in new keyword tables."""
+        labels = list(keywords)
+        lookup = {}
+        for label, words in keywords.items():
+            for word in words:
+                # First label listed wins if a word appears under several labels
+                lookup.setdefault(word.lower(), label)
+        # Whole words only: "need" must not match inside "needle". A leading \b
+        # scans faster than a lookbehind and is the same for word-initial keywords.
+        pattern = re.compile(rf"\b{_trie_pattern(lookup)}\b") if lookup else None
+        rules = []
+        for label in labels:
+            words = sorted({word.lower() for word in keywords[label] if word})
+            if not words:
+                continue
+            # Probe with the shortest distinct substrings: "moan" already finds "moaned"
+            probes = tuple(word for word in words if not any(other != word and other in word for other in words))
+            rules.append((label, probes, re.compile(rf"\b{_trie_pattern(words)}\b").search))
+        # Single assignment, so concurrent readers see either the old or new tables
+        self._compiled = (pattern, lookup, labels, tuple(rules))
+    
+    def reload(self):
+        """Re-read keywords_path now."""
+        self._maybe_reload(force=True)
+    
+    def _maybe_reload(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.keywords_path)
+        except OSError:
+            return
+        if force or mtime != self._mtime:
+            # Remember the mtime either way, so a bad file is reported once, not on every check
+            self._mtime = mtime
+            try:
+                with open(self.keywords_path) as f:
+                    keywords = json.load(f)
+                if not isinstance(keywords, dict) or not all(
+                    isinstance(words, list) and all(isinstance(word, str) for word in words)
+                    for words in keywords.values()
+                ):
+                    raise ValueError('expected {"label": ["word", ...]}')
+            except (OSError, ValueError) as e:
+                print(f"Sound keyword reload from {self.keywords_path} failed, keeping previous tables: {str(e)}")
+                return
+            self.load(keywords)
+    
+    def scores(self, transcript: str) -> Dict[str, int]:
+        """Count keyword hits per label in a single scan."""
+        if self.keywords_path:
+            self._maybe_reload()
+        pattern, lookup, labels, _ = self._compiled
+        counts = dict.fromkeys(labels, 0)
+        if pattern is not None:
+            for word in pattern.findall(transcript.lower()):
+                counts[lookup[word]] += 1
+        return counts
+    
+    def classify(self, transcript: str) -> str:
+        """
+        Classify a transcript by the first label with a whole-word keyword hit.
+        
+        Returns:
+            str: Sound classification (e.g., "whimper", "moan", "beg"), or "other"
+        """
+        return self.classify_many((transcript,))[0]
+    
+    def classify_many(self, transcripts: Iterable[str]) -> List[str]:
+        """Classify a batch of transcripts (e.g. for backfills) with one set of compiled tables."""
+        if self.keywords_path:
+            self._maybe_reload()
+        rules = self._compiled[3]
+        results = []
+        append = results.append
+        for transcript in transcripts:
+            text = transcript.lower()
+            for label, probes, search in rules:
+                for probe in probes:
+                    if probe in text:
+                        break
+                else:
+                    continue
+                if search(text):
+                    append(label)
+                    break
+            else:
+                append("other")
+        return results
+
+_classifier: Optional[SoundClassifier] = None
+
+def get_sound_classifier() -> SoundClassifier:
+    """Process-wide classifier, so tables are compiled once."""
+    global _classifier
+    if _classifier is None:
+        _classifier = SoundClassifier()
+    return _classifier
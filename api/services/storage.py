@@ -0,0 +1,120 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+# Read/write granularity for streaming uploads to storage
+CHUNK_SIZE = 1024 * 1024
+
+# Default upload cap, overridable with MAX_UPLOAD_BYTES
+DEFAULT_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size cap."""
+
+class InvalidAudioFile(Exception):
+    """Raised when an upload's content does not match its audio extension."""
+
+@dataclass
+class StoredUpload:
+    path: str
+    filename: str
+    size: int
+    sha256: str
+    duplicate: bool = False  # Identical content was already in storage
+
+def get_max_upload_bytes() -> int:
+    return int(os.environ.get("MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES))
+
+def matches_audio_signature(ext: str, header: bytes) -> bool:
+    """
+    Check an upload's leading bytes against the container signature for its extension.
+    
+    Args:
+        ext: Lower-case file extension including the dot
+        header: The first bytes of the file (at least 12)
+        
+    Returns:
+        bool: True if the bytes look like the claimed format
+    """
+    if ext == ".wav":
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    if ext == ".mp3":
+        # ID3v2 tag, or a bare MPEG audio frame sync
+        return header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0)
+    if ext == ".ogg":
+        return header[:4] == b"OggS"
+    if ext == ".m4a":
+        return header[4:8] == b"ftyp"
+    return False
+
+def _store_by_content(upload: StoredUpload, ext: str) -> StoredUpload:
+    """Move a freshly written upload to its content-addressed name, or drop it if that already exists."""
+    directory = os.path.dirname(upload.path)
+    filename = f"{upload.sha256}{ext}"
+    path = os.path.join(directory, filename)
+    duplicate = os.path.exists(path)
+    if duplicate:
+        os.remove(upload.path)
+    else:
+        os.replace(upload.path, path)
+    return StoredUpload(path=path, filename=filename, size=upload.size, sha256=upload.sha256, duplicate=duplicate)
+
+def _copy_stream(source: BinaryIO, path: str, ext: str, max_bytes: int) -> StoredUpload:
+    """Copy source to path in fixed-size chunks, validating and hashing in the same pass."""
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            header = source.read(CHUNK_SIZE)
+            if not matches_audio_signature(ext, header):
+                raise InvalidAudioFile(f"File content does not match a {ext} audio file")
+            chunk = header
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+    except BaseException:
+        # Never leave partial files behind
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return StoredUpload(path=path, filename=os.path.basename(path), size=size, sha256=digest.hexdigest())
+
+async def save_upload(
+    source: BinaryIO,
+    upload_dir: str,
+    ext: str,
+    max_bytes: Optional[int] = None
+) -> StoredUpload:
+    """
+    Stream an uploaded file to local storage without blocking the event loop.
+    
+    The whole copy runs in a worker thread, so large uploads don't stall other
+    requests. The same pass enforces the size cap, checks magic bytes and
+    computes a SHA-256 of the content. Files are stored under their digest, so
+    re-uploads of the same clip share one copy on disk.
+    
+    Args:
+        source: File-like object to read from (e.g. UploadFile.file)
+        upload_dir: Directory to store the file in
+        ext: Lower-case file extension including the dot
+        max_bytes: Size cap, defaults to MAX_UPLOAD_BYTES
+        
+    Returns:
+        StoredUpload: Where the file was written, its size, SHA-256 and whether it was a duplicate
+    """
+    max_bytes = max_bytes or get_max_upload_bytes()
+    # Write under a temporary name; the digest is only known once the stream ends
+    path = os.path.join(upload_dir, f"{uuid.uuid4()}{ext}.part")
+    
+    def copy_and_store():
+        return _store_by_content(_copy_stream(source, path, ext, max_bytes), ext)
+    
+    return await run_in_threadpool(copy_and_store)
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from api.services.cache import TTLCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.getcwd(), "cache", "transcripts.db")
+
+def make_transcript_key(content_hash: str, model: str, options: Optional[dict] = None) -> str:
+    """Build a cache key from the audio digest plus everything that changes the output."""
+    options_json = json.dumps(options or {}, sort_keys=True, separators=(",", ":"))
+    return f"{content_hash}:{model}:{hashlib.sha256(options_json.encode()).hexdigest()[:16]}"
+
+class TranscriptCache:
+    """
+    Two-tier transcript cache: a bounded in-memory LRU in front of an SQLite
+    store on disk. The disk tier survives restarts and is shared by every
+    worker process on the host (WAL mode allows concurrent readers).
+    
+    invalidate() only reaches this process's memory tier, so memory entries
+    live for minutes, not the full TTL: other processes drop a stale
+    transcript within memory_ttl_seconds and re-read the disk tier.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_entries: Optional[int] = None,
+        disk_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        memory_ttl_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the transcript cache.
+        
+        Args:
+            path: SQLite file for the disk tier (TRANSCRIPT_CACHE_PATH)
+            memory_entries: In-memory LRU size (TRANSCRIPT_CACHE_MEMORY_ENTRIES)
+            disk_entries: Max rows kept on disk (TRANSCRIPT_CACHE_DISK_ENTRIES)
+            ttl_seconds: Entry lifetime on disk (TRANSCRIPT_CACHE_TTL, 0 = no expiry)
+            memory_ttl_seconds: Entry lifetime in memory, capped at ttl_seconds
+                (TRANSCRIPT_CACHE_MEMORY_TTL, default 300)
+        """
+        self.path = path or os.environ.get("TRANSCRIPT_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.disk_entries = disk_entries or int(os.environ.get("TRANSCRIPT_CACHE_DISK_ENTRIES", "100000"))
+        ttl = ttl_seconds if ttl_seconds is not None else float(os.environ.get("TRANSCRIPT_CACHE_TTL", str(30 * 86400)))
+        self.ttl_seconds = ttl or None
+        memory_ttl = memory_ttl_seconds or float(os.environ.get("TRANSCRIPT_CACHE_MEMORY_TTL", "300"))
+        self.memory = TTLCache(
+            max_entries=memory_entries or int(os.environ.get("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "512")),
+            ttl_seconds=min(memory_ttl, self.ttl_seconds) if self.ttl_seconds else memory_ttl,
+        )
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._writes_since_prune = 0
+        self._init_store()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _init_store(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                " key TEXT PRIMARY KEY,"
+                " content_hash TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_content_hash ON transcripts(content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_accessed_at ON transcripts(accessed_at)")
+        conn.close()
+    
+    # Disk tier (blocking; called via asyncio.to_thread)
+    
+    def _disk_get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM transcripts WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] is not None and row[1] <= now:
+                    conn.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE transcripts SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+    
+    def _disk_set(self, key: str, content_hash: str, value: dict, prune: bool):
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (key, content_hash, value, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, content_hash, json.dumps(value), expires_at, now),
+                )
+                if prune:
+                    conn.execute("DELETE FROM transcripts WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+                    # Size cap: drop least recently used rows beyond disk_entries
+                    conn.execute(
+                        "DELETE FROM transcripts WHERE key IN ("
+                        " SELECT key FROM transcripts ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_entries,),
+                    )
+        finally:
+            conn.close()
+    
+    def _disk_delete(self, key: Optional[str], content_hash: Optional[str]) -> int:
+        conn = self._connect()
+        try:
+            with conn:
+                if key is not None:
+                    return conn.execute("DELETE FROM transcripts WHERE key = ?", (key,)).rowcount
+                if content_hash is not None:
+                    return conn.execute("DELETE FROM transcripts WHERE content_hash = ?", (content_hash,)).rowcount
+                return conn.execute("DELETE FROM transcripts").rowcount
+        finally:
+            conn.close()
+    
+    # Public API
+    
+    async def get(self, key: str) -> Optional[dict]:
+        """Look a transcript up in memory, then on disk (promoting disk hits)."""
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+        value = await asyncio.to_thread(self._disk_get, key)
+        if value is not None:
+            self.stats["disk_hits"] += 1
+            self.memory.set(key, value)
+            return value
+        self.stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, value: dict):
+        """Store a transcript in both tiers."""
+        self.memory.set(key, value)
+        self._writes_since_prune += 1
+        prune = self._writes_since_prune >= 100
+        if prune:
+            self._writes_since_prune = 0
+        content_hash = key.split(":", 1)[0]
+        await asyncio.to_thread(self._disk_set, key, content_hash, value, prune)
+        self.stats["writes"] += 1
+    
+    async def invalidate(self, key: Optional[str] = None, content_hash: Optional[str] = None) -> int:
+        """
+        Drop cached transcripts.
+        
+        Args:
+            key: Invalidate one exact cache key
+            content_hash: Invalidate every model/options variant for this audio
+            
+        With neither argument, the whole cache is cleared. Other processes
+        keep serving their in-memory copy until it expires (memory_ttl_seconds).
+        
+        Returns:
+            int: Number of disk rows removed
+        """
+        if key is not None:
+            self.memory.pop(key)
+        elif content_hash is not None:
+            for cached_key in self.memory.keys():
+                if cached_key.startswith(f"{content_hash}:"):
+                    self.memory.pop(cached_key)
+        else:
+            self.memory.clear()
+        return await asyncio.to_thread(self._disk_delete, key, content_hash)
+    
+    def get_stats(self) -> dict:
+        return {**self.stats, "memory_entries": len(self.memory)}
@@ -1,9 +1,19 @@
+import asyncio
 import os
-from typing import Optional, Dict, Any
-from twilio.rest import Client
+import random
+from typing import Optional, Dict, Any, Mapping
+
+import httpx
 from twilio.request_validator import RequestValidator
 from fastapi import Request, HTTPException
 
+from api.services.rate_limit import TokenBucket
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class SMSDeliveryError(Exception):
+    """Raised when Twilio rejects a message or retries are exhausted."""
+
 class TwilioService:
     def __init__(
         self,
@@ -14,6 +24,11 @@ class TwilioService:
         """
         Initialize the Twilio SMS service.
         
+        Outbound messages go through a pooled async HTTP client and a token
+        bucket sized to the sending number's throughput (TWILIO_SEND_RATE
+        messages/sec, bursting to TWILIO_SEND_BURST), so sending never blocks
+        the event loop or trips Twilio's queue limits.
+        
         Args:
             account_sid: Twilio account SID
             auth_token: Twilio auth token
@@ -22,18 +37,55 @@ class TwilioService:
         self.account_sid = account_sid or os.environ.get("TWILIO_ACCOUNT_SID")
         self.auth_token = auth_token or os.environ.get("TWILIO_AUTH_TOKEN")
         self.phone_number = phone_number or os.environ.get("TWILIO_PHONE_NUMBER")
+        self.api_base = os.environ.get("TWILIO_API_BASE", "https://api.twilio.com/2010-04-01").rstrip("/")
+        self.max_retries = int(os.environ.get("TWILIO_MAX_RETRIES", "3"))
+        self.timeout = float(os.environ.get("TWILIO_TIMEOUT", "15"))
+        # Public URL of /sms/status, so Twilio reports delivery status back
+        self.status_callback_url = os.environ.get("TWILIO_STATUS_CALLBACK_URL")
+        # Long codes sustain 1 message/sec; toll-free and short codes allow more
+        self.rate_limiter = TokenBucket(
+            rate=float(os.environ.get("TWILIO_SEND_RATE", "1")),
+            capacity=float(os.environ.get("TWILIO_SEND_BURST", "1")),
+        )
+        self._client: Optional[httpx.AsyncClient] = None
         
         if not all([self.account_sid, self.auth_token, self.phone_number]):
             # In development, just warn but allow the service to be created
             print("WARNING: Twilio credentials not fully configured")
         else:
-            self.client = Client(self.account_sid, self.auth_token)
             self.validator = RequestValidator(self.auth_token)
     
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, so sends reuse keep-alive connections."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                auth=(self.account_sid, self.auth_token),
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _message_params(self, to_number: str, message: str) -> Dict[str, str]:
+        params = {"To": to_number, "From": self.phone_number, "Body": message}
+        if self.status_callback_url:
+            params["StatusCallback"] = self.status_callback_url
+        return params
+    
     async def send_sms(self, to_number: str, message: str) -> Dict[str, Any]:
         """
         Send an SMS message via Twilio.
         
+        Waits for a rate-limit token, then retries 429/5xx responses and
+        transport errors with jittered exponential backoff (honouring
+        Retry-After when Twilio sends one).
+        
         Args:
             to_number: The recipient's phone number
             message: The message to send
@@ -50,28 +102,42 @@ class TwilioService:
                 "from_": self.phone_number or "+15551234567",
                 "body": message
             }
-            
-        # Send actual SMS in production
-        message = self.client.messages.create(
-            body=message,
-            from_=self.phone_number,
-            to=to_number
-        )
         
-        return {
-            "sid": message.sid,
-            "status": message.status,
-            "to": message.to,
-            "from_": message.from_,
-            "body": message.body
-        }
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            delay = random.uniform(0, min(30.0, 0.5 * (2 ** attempt)))
+            try:
+                response = await self._get_client().post(
+                    f"/Accounts/{self.account_sid}/Messages.json",
+                    data=self._message_params(to_number, message),
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise SMSDeliveryError(f"Twilio unreachable: {str(e)}")
+            else:
+                if response.status_code < 300:
+                    data = response.json()
+                    return {
+                        "sid": data["sid"],
+                        "status": data.get("status"),
+                        "to": data.get("to"),
+                        "from_": data.get("from"),
+                        "body": data.get("body")
+                    }
+                if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise SMSDeliveryError(f"Twilio returned {response.status_code}: {response.text[:200]}")
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+            await asyncio.sleep(delay)
     
-    async def validate_webhook(self, request: Request) -> bool:
+    async def validate_webhook(self, request: Request, form_data: Optional[Mapping[str, Any]] = None) -> bool:
         """
         Validate that an incoming webhook request is from Twilio.
         
         Args:
             request: The FastAPI request object
+            form_data: The already-parsed form, if the caller has it (avoids parsing twice)
             
         Returns:
             bool: True if the request is valid
@@ -81,7 +147,8 @@ class TwilioService:
             
         # Get the URL and form data
         url = str(request.url)
-        form_data = await request.form()
+        if form_data is None:
+            form_data = await request.form()
         
         # Get the Twilio signature from headers
         signature = request.headers.get("X-Twilio-Signature", "")
@@ -89,4 +156,4 @@ class TwilioService:
         # Convert form data to dict for validator
         form_dict = dict(form_data)
         
-        return self.validator.validate(url, form_dict, signature)
\ No newline at end of file
+        return self.validator.validate(url, form_dict, signature)
@@ -3,8 +3,8 @@ import json
 from datetime import datetime
 from typing import Optional
 
-# In production:
-# import tweepy
+from api.services.media_upload import ChunkedMediaUploader
+from api.services.twitter_client import TwitterClient
 
 class TwitterService:
     def __init__(
@@ -29,13 +29,11 @@ class TwitterService:
         self.access_token = access_token or os.environ.get("TWITTER_ACCESS_TOKEN")
         self.access_secret = access_secret or os.environ.get("TWITTER_ACCESS_SECRET")
         
-        # For production, uncomment:
-        # self.client = tweepy.Client(
-        #     consumer_key=self.api_key,
-        #     consumer_secret=self.api_secret,
-        #     access_token=self.access_token,
-        #     access_token_secret=self.access_secret
-        # )
+        # Signed, rate-limit-aware client; without credentials, calls are mocked
+        self.client: Optional[TwitterClient] = None
+        if all([self.api_key, self.api_secret, self.access_token, self.access_secret]):
+            self.client = TwitterClient(self.api_key, self.api_secret, self.access_token, self.access_secret)
+            self.media_uploader = ChunkedMediaUploader(self.client)
         
     async def post_tweet(self, text: str, media_ids: list = None) -> dict:
         """
@@ -48,42 +46,62 @@ class TwitterService:
         Returns:
             dict: Response with tweet ID and status
         """
-        # Development mock implementation
-        tweet_id = "12345678901234567890"
+        if self.client is None:
+            # Development mock implementation
+            tweet_id = "12345678901234567890"
+            
+            return {
+                "id": tweet_id,
+                "text": text,
+                "created_at": datetime.now().isoformat(),
+                "url": f"https://twitter.com/user/status/{tweet_id}"
+            }
         
+        payload = {"text": text}
+        if media_ids:
+            payload["media"] = {"media_ids": [str(media_id) for media_id in media_ids]}
+        tweet_data = (await self.client.request("POST", "/2/tweets", json=payload))["data"]
         return {
-            "id": tweet_id,
-            "text": text,
-            "created_at": datetime.now().isoformat(),
-            "url": f"https://twitter.com/user/status/{tweet_id}"
+            "id": tweet_data["id"],
+            "text": tweet_data["text"],
+            "created_at": tweet_data.get("created_at", datetime.now().isoformat()),
+            "url": f"https://twitter.com/user/status/{tweet_data['id']}"
         }
-        
-        # Production implementation:
-        # response = self.client.create_tweet(
-        #     text=text,
-        #     media_ids=media_ids
-        # )
-        # tweet_data = response.data
-        # return {
-        #     "id": tweet_data["id"],
-        #     "text": tweet_data["text"],
-        #     "created_at": tweet_data["created_at"].isoformat() if "created_at" in tweet_data else datetime.now().isoformat(),
-        #     "url": f"https://twitter.com/user/status/{tweet_data['id']}"
-        # }
     
-    async def upload_media(self, media_file) -> str:
+    async def upload_media(
+        self,
+        media_path: str,
+        media_type: Optional[str] = None,
+        media_category: Optional[str] = None
+    ) -> str:
         """
         Upload media to Twitter and return the media ID.
         
+        Large files go up in concurrent chunks streamed from disk, and an
+        interrupted upload of the same file resumes where it stopped (see
+        ChunkedMediaUploader).
+        
         Args:
-            media_file: File object for the media to upload
+            media_path: Path of the file to upload
+            media_type: MIME type (guessed from the file name if omitted)
+            media_category: Twitter media category, e.g. "tweet_video"
             
         Returns:
             str: Media ID for use in tweets
         """
-        # Development mock implementation
-        return "123456789012345"
+        if self.client is None:
+            # Development mock implementation
+            return "123456789012345"
         
-        # Production implementation:
-        # media = self.api.media_upload(filename=media_file.filename, file=media_file.file)
-        # return media.media_id_string
\ No newline at end of file
+        return await self.media_uploader.upload(media_path, media_type, media_category)
+    
+    def get_rate_limits(self) -> dict:
+        """Per-endpoint remaining-budget gauges and client counters."""
+        if self.client is None:
+            return {}
+        return {**self.client.get_stats(), "media": self.media_uploader.stats}
+    
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self.client is not None:
+            await self.client.aclose()
@@ -0,0 +1,332 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+from urllib.parse import quote, urlsplit, urlunsplit, parse_qsl
+
+import httpx
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+# Failures before any of the request reached Twitter, safe to retry for any call
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class TwitterAPIError(Exception):
+    """Raised when Twitter rejects a request or retries are exhausted."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class TwitterRateLimited(TwitterAPIError):
+    """Raised when an endpoint's window reopens later than the caller is willing to wait."""
+    
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"{endpoint} rate limited; window reopens in {retry_after:.0f}s", 429)
+        self.retry_after = retry_after
+
+def _percent_encode(value: str) -> str:
+    return quote(str(value), safe="~-._")
+
+def oauth1_header(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]],
+    consumer_key: str,
+    consumer_secret: str,
+    token: str,
+    token_secret: str,
+    nonce: Optional[str] = None,
+    timestamp: Optional[str] = None
+) -> str:
+    """
+    Build an OAuth 1.0a (HMAC-SHA1) Authorization header, per RFC 5849.
+    
+    Args:
+        method: HTTP method
+        url: Full request URL (query parameters are included in the signature)
+        params: Form-encoded body parameters, if any (JSON and multipart bodies are not signed)
+    
+    Returns:
+        str: Value for the Authorization header
+    """
+    oauth = {
+        "oauth_consumer_key": consumer_key,
+        "oauth_nonce": nonce or uuid.uuid4().hex,
+        "oauth_signature_method": "HMAC-SHA1",
+        "oauth_timestamp": timestamp or str(int(time.time())),
+        "oauth_token": token,
+        "oauth_version": "1.0",
+    }
+    parts = urlsplit(url)
+    signed = parse_qsl(parts.query, keep_blank_values=True)
+    signed += [(k, str(v)) for k, v in (params or {}).items()]
+    signed += list(oauth.items())
+    normalized = "&".join(
+        f"{k}={v}" for k, v in sorted((_percent_encode(k), _percent_encode(v)) for k, v in signed)
+    )
+    base_url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, "", ""))
+    base_string = "&".join(_percent_encode(s) for s in (method.upper(), base_url, normalized))
+    key = f"{_percent_encode(consumer_secret)}&{_percent_encode(token_secret)}"
+    digest = hmac.new(key.encode(), base_string.encode(), hashlib.sha1).digest()
+    oauth["oauth_signature"] = base64.b64encode(digest).decode()
+    return "OAuth " + ", ".join(f'{k}="{_percent_encode(v)}"' for k, v in sorted(oauth.items()))
+
+class EndpointBudget:
+    def __init__(self):
+        """Rate-limit window of one endpoint, as last reported by Twitter's x-rate-limit-* headers."""
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None  # Epoch seconds when the window reopens
+        self.unmetered = False  # Responded without rate-limit headers (e.g. media upload)
+        self.in_flight = 0
+        self.waiting = 0
+        self.cond = asyncio.Condition()
+    
+    def update(self, headers: httpx.Headers):
+        try:
+            limit = int(headers["x-rate-limit-limit"])
+            remaining = int(headers["x-rate-limit-remaining"])
+            reset = float(headers["x-rate-limit-reset"])
+        except (KeyError, ValueError):
+            if self.limit is None:
+                self.unmetered = True
+            return
+        self.unmetered = False
+        self.limit = limit
+        if self.reset is None or reset > self.reset or self.remaining is None:
+            # New window (or first report)
+            self.remaining = remaining
+        elif reset == self.reset:
+            # Responses can arrive out of order; the lowest count is the latest
+            self.remaining = min(self.remaining, remaining)
+        else:
+            return  # Stale report from the previous window
+        self.reset = reset
+
+class RateLimitTracker:
+    def __init__(self, reserve: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Track per-endpoint budgets and hold calls until their window has room.
+        
+        Until an endpoint reports its limits, calls to it go one at a time; after
+        that, as many run concurrently as the remaining budget allows. Endpoints
+        that answer without rate-limit headers are only held back after a 429.
+        
+        Args:
+            reserve: Calls per window to leave unused, e.g. for manual posting
+                (TWITTER_RATE_RESERVE, default 0)
+            max_wait: Longest wait for a window to reopen before raising
+                TwitterRateLimited (TWITTER_MAX_RATE_WAIT, default 900)
+        """
+        self.reserve = reserve if reserve is not None else int(os.environ.get("TWITTER_RATE_RESERVE", "0"))
+        self.max_wait = max_wait if max_wait is not None else float(os.environ.get("TWITTER_MAX_RATE_WAIT", "900"))
+        self.budgets: Dict[str, EndpointBudget] = {}
+        self.stats = {"delayed": 0, "delay_seconds": 0.0}
+    
+    def _budget(self, endpoint: str) -> EndpointBudget:
+        if endpoint not in self.budgets:
+            self.budgets[endpoint] = EndpointBudget()
+        return self.budgets[endpoint]
+    
+    async def acquire(self, endpoint: str):
+        """Wait until endpoint has budget for one more call, then reserve it."""
+        budget = self._budget(endpoint)
+        started = time.monotonic()
+        async with budget.cond:
+            budget.waiting += 1
+            try:
+                while True:
+                    now = time.time()
+                    if budget.reset is not None and now >= budget.reset:
+                        # Window reopened; its new reset time arrives with the next response
+                        budget.remaining, budget.reset = budget.limit, None
+                    if budget.remaining is None:
+                        if budget.in_flight == 0 or budget.unmetered:
+                            break
+                        timeout = None
+                    elif budget.remaining - budget.in_flight > self.reserve:
+                        break
+                    elif budget.reset is None:
+                        timeout = None  # Wait for an in-flight call to report back
+                    else:
+                        timeout = budget.reset - now
+                        if timeout > self.max_wait:
+                            raise TwitterRateLimited(endpoint, timeout)
+                    try:
+                        await asyncio.wait_for(budget.cond.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                budget.waiting -= 1
+            budget.in_flight += 1
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.stats["delayed"] += 1
+            self.stats["delay_seconds"] += waited
+    
+    async def release(self, endpoint: str, response: Optional[httpx.Response] = None):
+        """Return the reservation, updating the budget from the response headers."""
+        budget = self._budget(endpoint)
+        async with budget.cond:
+            budget.in_flight -= 1
+            if response is not None:
+                budget.update(response.headers)
+                if response.status_code == 429:
+                    budget.remaining = 0
+                    if budget.reset is None:
+                        # No headers: back off for a short while
+                        budget.reset = time.time() + 1.0
+            budget.cond.notify_all()
+    
+    def snapshot(self) -> Dict[str, dict]:
+        """Remaining-budget gauges per endpoint."""
+        now = time.time()
+        return {
+            endpoint: {
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "reset_in": round(max(0.0, budget.reset - now), 1) if budget.reset else None,
+                "in_flight": budget.in_flight,
+                "waiting": budget.waiting,
+            }
+            for endpoint, budget in self.budgets.items()
+        }
+
+class TwitterClient:
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        access_token: str,
+        access_secret: str,
+        api_base: Optional[str] = None,
+        rate_limits: Optional[RateLimitTracker] = None
+    ):
+        """
+        Async Twitter API client with OAuth 1.0a signing and rate-limit tracking.
+        
+        Each call waits for budget on its endpoint, then retries 429/5xx responses
+        and transport errors with jittered exponential backoff. Non-idempotent
+        calls (e.g. posting a tweet) are only retried after a 429 or a failure
+        to connect, since a 5xx or a timeout may come after Twitter acted on
+        them. A 429 marks the endpoint exhausted until its x-rate-limit-reset,
+        so other calls queue instead of failing too.
+        
+        Args:
+            api_key: Consumer key
+            api_secret: Consumer secret
+            access_token: User access token
+            access_secret: User access token secret
+            api_base: API root (TWITTER_API_BASE, default https://api.twitter.com)
+            rate_limits: Shared tracker (defaults to a new RateLimitTracker)
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.access_token = access_token
+        self.access_secret = access_secret
+        self.api_base = (api_base or os.environ.get("TWITTER_API_BASE", "https://api.twitter.com")).rstrip("/")
+        self.max_retries = int(os.environ.get("TWITTER_MAX_RETRIES", "4"))
+        self.timeout = float(os.environ.get("TWITTER_TIMEOUT", "30"))
+        self.rate_limits = rate_limits or RateLimitTracker()
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0, "errors": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+            )
+        return self._client
+    
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def request(
+        self,
+        method: str,
+        path: str,
+        endpoint: Optional[str] = None,
+        base_url: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+        files: Optional[Dict[str, Any]] = None,
+        idempotent: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Make a signed API call.
+        
+        Args:
+            method: HTTP method
+            path: Path below the API root, e.g. "/2/tweets"
+            endpoint: Rate-limit bucket name (defaults to "METHOD path")
+            base_url: Override the API root (e.g. for the upload host)
+            params: Query parameters
+            data: Form body (signed)
+            json: JSON body
+            files: Multipart files
+            idempotent: Whether repeating the call is harmless (defaults to True for GET,
+                HEAD, PUT and DELETE)
+        
+        Returns:
+            dict: Decoded JSON response ({} for empty bodies)
+        """
+        endpoint = endpoint or f"{method.upper()} {path}"
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        url = (base_url or self.api_base).rstrip("/") + path
+        if params:
+            url = str(httpx.URL(url, params=params))
+        
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limits.acquire(endpoint)
+            response = None
+            delay = random.uniform(0, min(60.0, 1.0 * (2 ** attempt)))
+            try:
+                headers = {"Authorization": oauth1_header(
+                    method, url, data if not files else None,
+                    self.api_key, self.api_secret, self.access_token, self.access_secret
+                )}
+                self.stats["requests"] += 1
+                response = await self._get_client().request(
+                    method, url, headers=headers, data=data, json=json, files=files
+                )
+            except httpx.TransportError as e:
+                if not idempotent and not isinstance(e, NOT_SENT_ERRORS):
+                    self.stats["errors"] += 1
+                    raise TwitterAPIError(f"{endpoint} failed after sending; it may have gone through: {str(e)}")
+                if attempt == self.max_retries:
+                    self.stats["errors"] += 1
+                    raise TwitterAPIError(f"Twitter unreachable: {str(e)}")
+            finally:
+                await self.rate_limits.release(endpoint, response)
+            
+            if response is not None:
+                if response.status_code < 300:
+                    return response.json() if response.content else {}
+                if response.status_code == 429:
+                    # The tracker now holds further calls until the window reopens
+                    self.stats["throttled"] += 1
+                    delay = 0.0
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRYABLE_STATUS)
+                if not retryable or attempt == self.max_retries:
+                    self.stats["errors"] += 1
+                    raise TwitterAPIError(
+                        f"Twitter returned {response.status_code}: {response.text[:200]}", response.status_code
+                    )
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+    
+    def get_stats(self) -> dict:
+        return {**self.stats, **self.rate_limits.stats, "endpoints": self.rate_limits.snapshot()}
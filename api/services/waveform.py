@@ -0,0 +1,90 @@
+import os
+import uuid
+from typing import Optional
+
+import numpy as np
+
+# Zoom levels, as number of (min, max) peak pairs. Fixed counts (rather than
+# fixed samples-per-peak) keep every read bounded regardless of clip length.
+PEAK_LEVELS = (256, 1024, 4096, 16384)
+
+def peak_index_path(base_path: str, level: int) -> str:
+    return f"{base_path}.peaks.{level}.npy"
+
+def compute_peaks(samples: np.ndarray, count: int) -> np.ndarray:
+    """
+    Reduce mono samples in [-1, 1] to `count` (min, max) pairs.
+    
+    Returns:
+        np.ndarray: int8 array shaped (count, 2)
+    """
+    count = max(1, min(count, len(samples)))
+    if len(samples) == 0:
+        return np.zeros((1, 2), dtype=np.int8)
+    starts = np.linspace(0, len(samples), count, endpoint=False).astype(np.int64)
+    mins = np.minimum.reduceat(samples, starts)
+    maxs = np.maximum.reduceat(samples, starts)
+    peaks = np.stack([mins, maxs], axis=1)
+    return np.clip(np.round(peaks * 127), -127, 127).astype(np.int8)
+
+def write_peak_index(samples: np.ndarray, base_path: str) -> list:
+    """
+    Compute and store peaks at every zoom level as .npy files next to the audio.
+    
+    Levels already on disk are kept: storage is content-addressed, so they
+    were computed from the same audio. Each file is written under a temporary
+    name and renamed into place, so readers never load a partial one.
+    
+    Args:
+        samples: Mono float samples in [-1, 1]
+        base_path: Storage path of the audio without extension
+        
+    Returns:
+        list: Paths written
+    """
+    paths = []
+    for level in PEAK_LEVELS:
+        path = peak_index_path(base_path, level)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.save(f, compute_peaks(samples, level))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        paths.append(path)
+        if level >= len(samples):
+            # Finer levels would just repeat the same samples
+            break
+    return paths
+
+def load_peaks(base_path: str, width: int) -> Optional[np.ndarray]:
+    """
+    Memory-map the smallest stored level with at least `width` peaks and
+    reduce it to `width` pairs, without touching the audio.
+    
+    Returns:
+        np.ndarray: int8 array shaped (<= width, 2), or None if no index exists
+    """
+    chosen = None
+    for level in PEAK_LEVELS:
+        path = peak_index_path(base_path, level)
+        if not os.path.exists(path):
+            break
+        chosen = path
+        if level >= width:
+            break
+    if chosen is None:
+        return None
+    
+    peaks = np.load(chosen, mmap_mode="r")
+    if len(peaks) <= width:
+        return np.asarray(peaks)
+    starts = np.linspace(0, len(peaks), width, endpoint=False).astype(np.int64)
+    return np.stack([
+        np.minimum.reduceat(peaks[:, 0], starts),
+        np.maximum.reduceat(peaks[:, 1], starts),
+    ], axis=1)
@@ -1,55 +1,223 @@
+import asyncio
+import hashlib
 import os
+import random
 import tempfile
-from typing import BinaryIO, Optional
+from typing import AsyncIterator, BinaryIO, Iterable, Optional
 
-# This is a placeholder - in production you would use:
-# import openai
+import httpx
+
+from api.services.local_whisper import get_local_engine
+from api.services.sound_classifier import get_sound_classifier
+from api.services.transcript_cache import TranscriptCache, make_transcript_key
+
+# Remote API responses worth retrying
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class TranscriptionError(Exception):
+    """Raised when the transcription backend returns an unusable response."""
+
+def hash_audio_file(audio_file: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file object's content, leaving its position where it was."""
+    position = audio_file.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: audio_file.read(chunk_size), b""):
+        digest.update(chunk)
+    audio_file.seek(position)
+    return digest.hexdigest()
 
 class WhisperTranscriptionService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[TranscriptCache] = None):
         """
         Initialize the Whisper transcription service.
         
         Args:
             api_key: Optional OpenAI API key. If not provided, will check for OPENAI_API_KEY env var.
+            cache: Optional transcript cache. Defaults to a shared two-tier cache
+                unless TRANSCRIPT_CACHE_ENABLED=false.
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
-        # Uncomment in production:
-        # if not self.api_key:
-        #     raise ValueError("OpenAI API key is required for transcription")
-        # openai.api_key = self.api_key
+        # "openai" for the remote API, "local" for an in-process CPU model pool
+        self.backend = os.environ.get("TRANSCRIPTION_BACKEND", "openai").lower()
+        self.local_engine = get_local_engine() if self.backend == "local" else None
+        self.model = self.local_engine.model_name if self.local_engine else os.environ.get("WHISPER_MODEL", "whisper-1")
+        if cache is None and os.environ.get("TRANSCRIPT_CACHE_ENABLED", "true").lower() != "false":
+            cache = TranscriptCache()
+        self.cache = cache
+        self.api_base = os.environ.get("WHISPER_API_BASE", "https://api.openai.com/v1").rstrip("/")
+        self.concurrency = int(os.environ.get("WHISPER_CONCURRENCY", "4"))
+        self.max_retries = int(os.environ.get("WHISPER_MAX_RETRIES", "3"))
+        self.timeout = float(os.environ.get("WHISPER_TIMEOUT", "120"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self.classifier = get_sound_classifier()
+    
+    @property
+    def is_mock(self) -> bool:
+        """True when no backend is configured and transcripts are development mocks."""
+        return self.local_engine is None and not self.api_key
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client, so concurrent calls reuse keep-alive connections."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.api_base,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=max(self.concurrency, 16),
+                    max_keepalive_connections=max(self.concurrency, 16),
+                ),
+            )
+        return self._client
     
-    async def transcribe(self, audio_file: BinaryIO) -> dict:
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _transcribe_local(self, audio_file: BinaryIO, **options) -> dict:
+        path = getattr(audio_file, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return await self.local_engine.transcribe_path(path, **options)
+        # In-memory uploads: hand the worker a temporary file instead
+        content = await asyncio.to_thread(audio_file.read)
+        with tempfile.NamedTemporaryFile(suffix=".audio") as tmp:
+            await asyncio.to_thread(tmp.write, content)
+            tmp.flush()
+            return await self.local_engine.transcribe_path(tmp.name, **options)
+    
+    async def transcribe(
+        self,
+        audio_file: BinaryIO,
+        content_hash: Optional[str] = None,
+        variant: str = "",
+        **options
+    ) -> dict:
         """
         Transcribe audio file using OpenAI's Whisper API.
         
+        Results are cached by audio content hash plus model and options, so
+        retries and re-runs of the same clip skip the transcription call.
+        
         Args:
             audio_file: The audio file to transcribe
+            content_hash: SHA-256 of the audio, if already known (computed otherwise)
+            variant: Cache-key suffix for derived audio (e.g. a preprocessed version of content_hash)
+            **options: Transcription options (language, prompt, ...)
             
         Returns:
             dict: Transcription result with text and metadata
         """
-        # In a development environment, return mock data
+        if self.cache is None or self.is_mock:
+            # Never cache development mock transcripts: they'd outlive configuring a real backend
+            return await self._transcribe_uncached(audio_file, **options)
+        
+        if content_hash is None:
+            content_hash = await asyncio.to_thread(hash_audio_file, audio_file)
+        key = make_transcript_key(content_hash, self.model, {**options, "_variant": variant} if variant else options)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return cached
+        result = await self._transcribe_uncached(audio_file, **options)
+        await self.cache.set(key, result)
+        return result
+    
+    async def invalidate_transcript(self, content_hash: str) -> int:
+        """Drop cached transcripts for a clip, e.g. after a bad transcription."""
+        if self.cache is None:
+            return 0
+        return await self.cache.invalidate(content_hash=content_hash)
+    
+    async def _transcribe_uncached(self, audio_file: BinaryIO, **options) -> dict:
+        if self.local_engine:
+            return await self._transcribe_local(audio_file, **options)
+        if self.is_mock:
+            # In a development environment, return mock data
+            return {
+                "text": "Please use me, I need to be exposed",
+                "confidence": 0.98,
+                "duration_seconds": 3.2
+            }
+        
+        content = await asyncio.to_thread(audio_file.read)
+        filename = os.path.basename(getattr(audio_file, "name", "audio.wav"))
+        response = await self._get_client().post(
+            "/audio/transcriptions",
+            files={"file": (filename, content, "application/octet-stream")},
+            data={"model": self.model, "response_format": "verbose_json", **options},
+        )
+        response.raise_for_status()
+        data = response.json()
+        if "text" not in data:
+            raise TranscriptionError("Transcription response has no text")
         return {
-            "text": "Please use me, I need to be exposed",
-            "confidence": 0.98,
-            "duration_seconds": 3.2
+            "text": data["text"],
+            "confidence": data.get("confidence", 0.0),
+            "duration_seconds": data.get("duration", 0.0)
         }
+    
+    async def _transcribe_path_with_retries(self, path: str, **options) -> dict:
+        """Transcribe one file, retrying transient failures with jittered exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with open(path, "rb") as audio_file:
+                    return await self.transcribe(audio_file, **options)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(random.uniform(0, min(30.0, 0.5 * (2 ** attempt))))
+    
+    async def transcribe_many(
+        self,
+        paths: Iterable[str],
+        concurrency: Optional[int] = None,
+        **options
+    ) -> AsyncIterator[dict]:
+        """
+        Transcribe many files with bounded concurrency, yielding results as they finish.
+        
+        At most `concurrency` files are in flight, all sharing one pooled HTTP
+        client. A failure on one file is retried and then reported for that
+        item only; the rest of the batch carries on.
+        
+        Args:
+            paths: Audio file paths (consumed lazily, so generators are fine)
+            concurrency: Max in-flight transcriptions (defaults to WHISPER_CONCURRENCY)
+            **options: Transcription options passed to each call
+            
+        Yields:
+            dict: {"path", "result"} on success or {"path", "error"} on failure
+        """
+        concurrency = concurrency or self.concurrency
+        pending = iter(paths)
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
         
-        # Production implementation would be:
-        # with tempfile.NamedTemporaryFile(suffix=".tmp") as tmp:
-        #     tmp.write(await audio_file.read())
-        #     tmp.flush()
-        #     
-        #     response = openai.Audio.transcribe(
-        #         model="whisper-1", 
-        #         file=open(tmp.name, "rb")
-        #     )
-        #     return {
-        #         "text": response["text"],
-        #         "confidence": response.get("confidence", 0.0),
-        #         "duration_seconds": response.get("duration", 0.0)
-        #     }
+        async def worker():
+            for path in pending:
+                try:
+                    result = await self._transcribe_path_with_retries(path, **options)
+                    await results.put({"path": path, "result": result})
+                except Exception as e:
+                    await results.put({"path": path, "error": str(e)})
+        
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        done = asyncio.gather(*workers)
+        try:
+            while not (done.done() and results.empty()):
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait([getter, done], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                else:
+                    getter.cancel()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
     
     def detect_sound_type(self, transcript: str) -> str:
         """
@@ -61,16 +229,4 @@ class WhisperTranscriptionService:
         Returns:
             str: Sound classification (e.g., "whimper", "moan", "beg")
         """
-        # Simple keyword-based classification
-        keywords = {
-            "whimper": ["whimper", "whimpered", "whimpering", "please"],
-            "moan": ["moan", "moaned", "moaning", "feels"],
-            "beg": ["beg", "begging", "need", "want"]
-        }
-        
-        transcript = transcript.lower()
-        for sound_type, word_list in keywords.items():
-            if any(word in transcript for word in word_list):
-                return sound_type
-                
-        return "other"
\ No newline at end of file
+        return self.classifier.classify(transcript)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Background worker for Twitter Handler
+
+Claims submission jobs from the database and runs them through the
+transcribe -> classify -> caption -> enqueue pipeline, outside the web
+process. Throughput scales by adding workers.
+
+Usage:
+    python -m api.worker --workers 4
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import traceback
+
+from api.services.jobs import (
+    DEFAULT_VISIBILITY_TIMEOUT,
+    claim_job,
+    complete_job,
+    extend_lease,
+    fail_job,
+    retry_delay,
+)
+from api.services.pipeline import SubmissionPipeline
+from database.models import get_async_session, dispose_engines, init_db
+
+async def _heartbeat(job_id: int, worker_id: str, visibility_timeout: int, work: asyncio.Task):
+    """
+    Keep the job's lease alive while a long stage (e.g. transcription) runs.
+    If the lease is lost, another worker may already be running the job, so
+    the work is cancelled. A failed renewal (e.g. the database briefly
+    unavailable) is logged and retried sooner; only a confirmed loss stops
+    the work.
+    """
+    interval = visibility_timeout / 3
+    delay = interval
+    failures = 0
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            async with get_async_session() as session:
+                held = await extend_lease(session, job_id, worker_id, visibility_timeout)
+        except Exception as e:
+            failures += 1
+            delay = min(interval, retry_delay(failures, base=1.0))
+            print(f"[{worker_id}] lease renewal for job {job_id} failed, retrying in {delay:.1f}s: {str(e)}")
+            continue
+        failures = 0
+        delay = interval
+        if not held:
+            print(f"[{worker_id}] lost lease on job {job_id}, abandoning it")
+            # Returning in the same step, so run_job sees this task done when the work stops
+            work.cancel()
+            return
+
+async def run_job(pipeline: SubmissionPipeline, job, worker_id: str, visibility_timeout: int):
+    async with get_async_session() as session:
+        job = await session.merge(job)
+        if job.attempts > job.max_attempts:
+            # Lease expired too often (e.g. the worker kept crashing)
+            await fail_job(session, job, "Exceeded max attempts")
+            return
+        
+        async def on_stage(stage: str):
+            print(f"[{worker_id}] job {job.id} submission {job.submission_id}: {stage}")
+        
+        work = asyncio.create_task(pipeline.run(session, job, on_stage=on_stage))
+        heartbeat = asyncio.create_task(_heartbeat(job.id, worker_id, visibility_timeout, work))
+        try:
+            await work
+            if not await complete_job(session, job, worker_id):
+                print(f"[{worker_id}] job {job.id} was reclaimed before it finished; dropping this run")
+        except asyncio.CancelledError:
+            if not heartbeat.done() or heartbeat.cancelled():
+                raise
+            # Cancelled by the heartbeat: the job belongs to another worker now
+            await session.rollback()
+        except Exception as e:
+            await session.rollback()
+            await session.refresh(job)
+            if job.locked_by != worker_id:
+                print(f"[{worker_id}] job {job.id} failed after its lease was lost: {str(e)}")
+                return
+            print(f"[{worker_id}] job {job.id} failed at {job.stage}: {str(e)}")
+            traceback.print_exc()
+            await fail_job(session, job, f"{job.stage}: {str(e)}")
+        finally:
+            heartbeat.cancel()
+
+async def worker_loop(worker_id: str, poll_interval: float, visibility_timeout: int):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    pipeline = SubmissionPipeline()
+    local_engine = pipeline.whisper_service.local_engine
+    if local_engine:
+        # Load the local models before claiming work
+        await local_engine.warm_up()
+    print(f"[{worker_id}] started")
+    
+    try:
+        while not stop.is_set():
+            async with get_async_session() as session:
+                job = await claim_job(session, worker_id, visibility_timeout)
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # The current job always runs to completion before shutdown
+            await run_job(pipeline, job, worker_id, visibility_timeout)
+    finally:
+        if local_engine:
+            local_engine.shutdown()
+        await dispose_engines()
+        print(f"[{worker_id}] stopped")
+
+def _run_process(index: int, poll_interval: float, visibility_timeout: int):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    asyncio.run(worker_loop(worker_id, poll_interval, visibility_timeout))
+
+def main():
+    parser = argparse.ArgumentParser(description='Run Twitter Handler background workers')
+    parser.add_argument('--workers', '-w', type=int, default=int(os.environ.get("WORKER_PROCESSES", "1")),
+                        help='Number of worker processes (default: WORKER_PROCESSES or 1)')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Seconds to wait when no job is due (default: 1.0)')
+    parser.add_argument('--visibility-timeout', type=int, default=DEFAULT_VISIBILITY_TIMEOUT,
+                        help='Seconds a claimed job stays leased without a heartbeat')
+    args = parser.parse_args()
+    # Children inherit this, so each sizes its local transcription pool to its share of the cores
+    os.environ["WORKER_PROCESSES"] = str(args.workers)
+    
+    init_db()
+    
+    if args.workers == 1:
+        _run_process(0, args.poll_interval, args.visibility_timeout)
+        return
+    
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_run_process, args=(i, args.poll_interval, args.visibility_timeout))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    # Children get SIGINT/SIGTERM themselves; just wait for them to drain
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: [p.terminate() for p in processes if p.is_alive()])
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
+import os
 from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, create_engine, Boolean
+from typing import Callable, Optional, List
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, create_engine, event, Boolean, Index, Float, select
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import Session, relationship, sessionmaker
 
 Base = declarative_base()
 
@@ -12,14 +14,22 @@ class Submission(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     filename = Column(String(255), nullable=True)
     storage_path = Column(String(255), nullable=True)
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the uploaded audio
+    processed_path = Column(String(255), nullable=True)  # Compact 16 kHz mono artifact sent to transcription
+    duration_seconds = Column(Float, nullable=True)  # Duration of the original clip
+    bytes_saved = Column(Integer, nullable=True)  # Original size minus processed size
     text_content = Column(Text, nullable=True)  # For direct text submissions
     transcript = Column(Text, nullable=True)
     sound_type = Column(String(50), nullable=True)
     caption = Column(Text, nullable=False)
+    caption_candidates = Column(Text, nullable=True)  # JSON list of {"caption", "tone", "score"}, best first
     tone = Column(String(50), nullable=False)
-    status = Column(String(20), nullable=False, default="pending")  # pending, approved, posted, rejected
+    status = Column(String(20), nullable=False, default="pending")  # processing, pending, approved, posting, posted, rejected, failed
+    scheduled_at = Column(DateTime, nullable=True)  # When an approved item should be posted
+    posting_claimed_at = Column(DateTime, nullable=True)  # When the current "posting" claim was taken
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(BigInteger, nullable=False, default=0)  # Change counter value of the last write (see ChangeCounter)
     
     # New fields for SMS tracking
     source = Column(String(20), nullable=True)  # 'audio', 'text', 'sms'
@@ -31,6 +41,23 @@ class Submission(Base):
     
     # Link to notification messages
     notifications = relationship("Notification", back_populates="submission")
+    
+    # Background processing jobs
+    jobs = relationship("Job", back_populates="submission")
+
+    __table_args__ = (
+        # Keyset pagination of the review queue: newest first, optionally by status
+        Index("idx_submissions_status_created_at", "status", "created_at", "id"),
+        Index("idx_submissions_created_at_id", "created_at", "id"),
+        # Delta sync of the review queue: changes since a version
+        Index("idx_submissions_version_id", "version", "id"),
+        # Scheduler rebuild: approved items by planned time
+        Index("idx_submissions_status_scheduled_at", "status", "scheduled_at"),
+        # Content-addressed deduplication of uploads
+        Index("idx_submissions_content_hash", "content_hash"),
+        # Twilio retries the webhook with the same MessageSid; store each message once
+        Index("idx_submissions_message_sid", "message_sid", unique=True),
+    )
 
 class Tweet(Base):
     __tablename__ = "tweets"
@@ -48,26 +75,307 @@ class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=True)  # Null for ad-hoc notifications
     recipient = Column(String(50), nullable=False)  # Phone number or other identifier
     message = Column(Text, nullable=False)
     sent = Column(Boolean, default=False)
-    delivery_status = Column(String(20), nullable=True)  # delivered, failed, etc.
+    delivery_status = Column(String(20), nullable=True)  # pending, folded, claimed (digest being sent), then Twilio's queued, sending, delivered, failed, etc.
     message_sid = Column(String(50), nullable=True)  # Twilio message ID
+    digest_id = Column(Integer, ForeignKey("notifications.id"), nullable=True)  # Digest this was folded into
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     sent_at = Column(DateTime, nullable=True)
     
     submission = relationship("Submission", back_populates="notifications")
 
-# Create database engine
-def get_engine(db_url="sqlite:///twitter_handler.db"):
-    return create_engine(db_url)
+    __table_args__ = (
+        # Delivery-status callbacks are matched by Twilio message ID
+        Index("idx_notifications_message_sid", "message_sid"),
+        # The coalescer scans pending notifications per recipient
+        Index("idx_notifications_status_recipient", "delivery_status", "recipient", "created_at"),
+        Index("idx_notifications_digest_id", "digest_id"),
+    )
+
+class ApprovedSender(Base):
+    """A phone number allowed to submit via SMS, in addition to APPROVED_PHONE_NUMBERS."""
+    __tablename__ = "approved_senders"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    phone_number = Column(String(20), nullable=False, unique=True)  # E.164
+    label = Column(String(100), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class Lease(Base):
+    """A named, expiring lock row, used to elect one process for singleton work (e.g. the scheduler)."""
+    __tablename__ = "leases"
+    
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class ChangeCounter(Base):
+    """
+    A monotonic counter per table. Each write bumps it in its own transaction,
+    and the counter row's lock orders concurrent writers, so versions become
+    visible in increasing order and a reader never skips one.
+    """
+    __tablename__ = "change_counters"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+SUBMISSIONS_COUNTER = "submissions"
+SUBMISSIONS_CHANNEL = f"{SUBMISSIONS_COUNTER}_changed"  # PostgreSQL NOTIFY channel
+
+def next_version(connection, name: str = SUBMISSIONS_COUNTER, notify: bool = True) -> int:
+    """
+    Bump a change counter in the connection's transaction and return the new
+    value. On PostgreSQL this also queues a NOTIFY on "<name>_changed", sent
+    when the transaction commits (unless notify is False; see notify_change).
+    """
+    counters = ChangeCounter.__table__
+    result = connection.execute(
+        counters.update().where(counters.c.name == name).values(value=counters.c.value + 1)
+    )
+    if notify:
+        notify_change(connection, name)
+    if result.rowcount == 0:
+        connection.execute(counters.insert().values(name=name, value=1))
+        return 1
+    return connection.execute(select(counters.c.value).where(counters.c.name == name)).scalar()
+
+def notify_change(connection, name: str = SUBMISSIONS_COUNTER):
+    """Queue the PostgreSQL NOTIFY for a counter (a no-op elsewhere)."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"NOTIFY {name}_changed")
+
+def _release_version(connection, name: str = SUBMISSIONS_COUNTER):
+    """
+    Take back a next_version() bump that wrote nothing. Our transaction still
+    holds the counter row's lock, so no one else has bumped it since.
+    """
+    counters = ChangeCounter.__table__
+    connection.execute(counters.update().where(counters.c.name == name).values(value=counters.c.value - 1))
+
+@event.listens_for(Session, "before_flush")
+def _version_submissions(session, flush_context, instances):
+    """Stamp new and modified submissions with the next version."""
+    changed = [obj for obj in session.new if isinstance(obj, Submission)]
+    changed += [obj for obj in session.dirty if isinstance(obj, Submission) and session.is_modified(obj)]
+    if changed:
+        version = next_version(session.connection())
+        session.info["submissions_changed"] = True
+        for submission in changed:
+            submission.version = version
+
+@event.listens_for(Session, "do_orm_execute")
+def _version_submission_statements(orm_execute_state):
+    """
+    Stamp rows written by insert(Submission)/update(Submission) statements too.
+    
+    A conditional UPDATE that matches no rows (a refused status transition, a
+    lost claim) gives its version back, so it doesn't move the queue's ETag
+    or wake the change feed.
+    """
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is None or table.name != Submission.__tablename__:
+        return
+    session = orm_execute_state.session
+    connection = session.connection()
+    version = next_version(connection, notify=False)
+    result = orm_execute_state.invoke_statement(statement=orm_execute_state.statement.values(version=version))
+    if orm_execute_state.is_update:
+        if isinstance(result, CursorResult):
+            changed = result.rowcount != 0
+        else:
+            # RETURNING: buffer the rows to count them; the caller gets an equivalent result
+            frozen = result.freeze()
+            changed = bool(frozen.data)
+            result = frozen()
+        if not changed:
+            _release_version(connection)
+            return result
+    notify_change(connection)
+    session.info["submissions_changed"] = True
+    return result
+
+_commit_listeners: List[Callable[[], None]] = []
+
+def add_commit_listener(callback: Callable[[], None]):
+    """Call callback() after each commit (in this process) that wrote submissions. It may run on any thread."""
+    _commit_listeners.append(callback)
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit_listeners(session):
+    if session.info.pop("submissions_changed", False):
+        for callback in _commit_listeners:
+            callback()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop("submissions_changed", None)
+
+class Job(Base):
+    """A durable unit of background work, claimed by `python -m api.worker` processes."""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    kind = Column(String(50), nullable=False, default="process_submission")
+    stage = Column(String(20), nullable=False, default="preprocess")  # Next pipeline stage to run
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    payload = Column(Text, nullable=True)  # JSON options for the job (tone, caption hint, ...)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)  # Retry backoff
+    locked_by = Column(String(100), nullable=True)  # Worker holding the lease
+    locked_until = Column(DateTime, nullable=True)  # Lease expiry (visibility timeout)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    submission = relationship("Submission", back_populates="jobs")
+    
+    __table_args__ = (
+        Index("idx_jobs_status_run_after", "status", "run_after"),
+        Index("idx_jobs_submission_id", "submission_id"),
+    )
+
+# Database engine and session management.
+#
+# One engine (and one connection pool) is created lazily per process and
+# shared by every session, instead of building a fresh engine per call.
+DEFAULT_DATABASE_URL = "sqlite:///twitter_handler.db"
+
+_engine = None
+_session_factory = None
+_async_engine = None
+_async_session_factory = None
+
+def get_database_url() -> str:
+    """Return the configured database URL (DATABASE_URL env var)."""
+    return os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+def _to_async_url(db_url: str) -> str:
+    """Map a sync database URL onto its asyncio driver equivalent."""
+    if db_url.startswith("postgresql://") or db_url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + db_url.split("://", 1)[1]
+    if db_url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + db_url.split("://", 1)[1]
+    if db_url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + db_url.split("://", 1)[1]
+    return db_url
+
+def _engine_kwargs(db_url: str) -> dict:
+    """
+    Build engine/pool options for a database URL.
+
+    Pool sizing is tunable via DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT
+    and DB_POOL_RECYCLE. In-memory SQLite keeps SQLAlchemy's default
+    single-connection pool, since every new connection would be a new database.
+    """
+    kwargs = {"pool_pre_ping": True}
+    if db_url.startswith("sqlite"):
+        # Sessions are used from FastAPI's threadpool, not only the creating thread
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if ":memory:" in db_url or db_url.rstrip("/").endswith("sqlite:"):
+            return kwargs
+    kwargs.update(
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    )
+    return kwargs
+
+def _configure_sqlite(engine, db_url: str):
+    """
+    Put file-backed SQLite in WAL mode, so readers don't block the writer and
+    commits append to the log instead of syncing the whole database file.
+    """
+    if not db_url.startswith("sqlite") or ":memory:" in db_url or db_url.rstrip("/").endswith("sqlite:"):
+        return
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+def create_db_engine(db_url: Optional[str] = None):
+    """Create a new (unshared) engine. Prefer get_engine() in application code."""
+    db_url = db_url or get_database_url()
+    engine = create_engine(db_url, **_engine_kwargs(db_url))
+    _configure_sqlite(engine, db_url)
+    return engine
+
+def get_engine(db_url: Optional[str] = None):
+    """
+    Get the process-wide engine, creating it on first use.
+
+    Args:
+        db_url: Optional URL override, only honoured on first call
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_db_engine(db_url)
+        _session_factory = sessionmaker(bind=_engine, expire_on_commit=False)
+    return _engine
 
 def get_session():
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+    """Open a session on the shared engine. Callers are responsible for closing it."""
+    get_engine()
+    return _session_factory()
+
+def get_async_engine(db_url: Optional[str] = None):
+    """Get the process-wide asyncio engine, creating it on first use."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        db_url = db_url or get_database_url()
+        kwargs = _engine_kwargs(db_url)
+        kwargs.pop("connect_args", None)  # aiosqlite runs on its own thread already
+        _async_engine = create_async_engine(_to_async_url(db_url), **kwargs)
+        _configure_sqlite(_async_engine.sync_engine, db_url)
+        _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_engine
+
+def get_async_session():
+    """Open an AsyncSession on the shared async engine."""
+    get_async_engine()
+    return _async_session_factory()
+
+def get_db():
+    """FastAPI dependency yielding a pooled sync session (use from `def` routes)."""
+    session = get_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+async def get_async_db():
+    """FastAPI dependency yielding a pooled AsyncSession (use from `async def` routes)."""
+    async with get_async_session() as session:
+        yield session
+
+async def dispose_engines():
+    """Close pooled connections; called on application shutdown."""
+    global _engine, _session_factory, _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = _session_factory = None
+    _async_engine = _async_session_factory = None
 
 def init_db():
     engine = get_engine()
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        counters = ChangeCounter.__table__
+        if connection.execute(select(counters.c.name).where(counters.c.name == SUBMISSIONS_COUNTER)).first() is None:
+            connection.execute(counters.insert().values(name=SUBMISSIONS_COUNTER, value=0))
@@ -2,14 +2,22 @@ CREATE TABLE IF NOT EXISTS submissions (
     id SERIAL PRIMARY KEY,
     filename VARCHAR(255),
     storage_path VARCHAR(255),
+    content_hash VARCHAR(64),
+    processed_path VARCHAR(255),
+    duration_seconds REAL,
+    bytes_saved INTEGER,
     text_content TEXT,
     transcript TEXT,
     sound_type VARCHAR(50),
     caption TEXT NOT NULL,
+    caption_candidates TEXT,
     tone VARCHAR(50) NOT NULL,
     status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    scheduled_at TIMESTAMP,
+    posting_claimed_at TIMESTAMP,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    version BIGINT NOT NULL DEFAULT 0,
     -- New fields for SMS
     source VARCHAR(20),
     phone_number VARCHAR(20),
@@ -28,21 +36,71 @@ CREATE TABLE IF NOT EXISTS tweets (
 
 CREATE TABLE IF NOT EXISTS notifications (
     id SERIAL PRIMARY KEY,
-    submission_id INTEGER NOT NULL,
+    submission_id INTEGER,
     recipient VARCHAR(50) NOT NULL,
     message TEXT NOT NULL,
     sent BOOLEAN NOT NULL DEFAULT FALSE,
     delivery_status VARCHAR(20),
     message_sid VARCHAR(50),
+    digest_id INTEGER,
     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     sent_at TIMESTAMP,
+    FOREIGN KEY (submission_id) REFERENCES submissions(id),
+    FOREIGN KEY (digest_id) REFERENCES notifications(id)
+);
+
+CREATE TABLE IF NOT EXISTS approved_senders (
+    id SERIAL PRIMARY KEY,
+    phone_number VARCHAR(20) NOT NULL UNIQUE,
+    label VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Monotonic change counters (one row per table); see database/models.py ChangeCounter
+CREATE TABLE IF NOT EXISTS change_counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO change_counters (name, value) VALUES ('submissions', 0) ON CONFLICT DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS leases (
+    name VARCHAR(50) PRIMARY KEY,
+    holder VARCHAR(100) NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    submission_id INTEGER NOT NULL,
+    kind VARCHAR(50) NOT NULL DEFAULT 'process_submission',
+    stage VARCHAR(20) NOT NULL DEFAULT 'preprocess',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    payload TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(100),
+    locked_until TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (submission_id) REFERENCES submissions(id)
 );
 
 -- Indexes
-CREATE INDEX idx_submissions_status ON submissions(status);
-CREATE INDEX idx_submissions_created_at ON submissions(created_at);
+-- (status, created_at, id) and (created_at, id) also cover status-only and created_at-only lookups
+CREATE INDEX idx_submissions_status_created_at ON submissions(status, created_at, id);
+CREATE INDEX idx_submissions_created_at_id ON submissions(created_at, id);
+CREATE INDEX idx_submissions_version_id ON submissions(version, id);
+CREATE INDEX idx_submissions_status_scheduled_at ON submissions(status, scheduled_at);
+CREATE INDEX idx_submissions_content_hash ON submissions(content_hash);
+CREATE UNIQUE INDEX idx_submissions_message_sid ON submissions(message_sid);
 CREATE INDEX idx_tweets_submission_id ON tweets(submission_id);
 CREATE INDEX idx_notifications_submission_id ON notifications(submission_id);
+CREATE INDEX idx_notifications_message_sid ON notifications(message_sid);
+CREATE INDEX idx_notifications_status_recipient ON notifications(delivery_status, recipient, created_at);
+CREATE INDEX idx_notifications_digest_id ON notifications(digest_id);
 CREATE INDEX idx_submissions_source ON submissions(source);
-CREATE INDEX idx_submissions_phone_number ON submissions(phone_number);
\ No newline at end of file
+CREATE INDEX idx_submissions_phone_number ON submissions(phone_number);
+CREATE INDEX idx_jobs_status_run_after ON jobs(status, run_after);
+CREATE INDEX idx_jobs_submission_id ON jobs(submission_id);
\ No newline at end of file
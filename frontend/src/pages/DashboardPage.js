@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Container,
   VStack,
@@ -50,6 +50,7 @@ const DashboardPage = () => {
   const [selectedItem, setSelectedItem] = useState(null);
   const [loading, setLoading] = useState(false);
   const [editedCaption, setEditedCaption] = useState('');
+  const changesCursor = useRef(null);
   const { isOpen, onOpen, onClose } = useDisclosure();
   const toast = useToast();
 
@@ -58,12 +59,22 @@ const DashboardPage = () => {
     fetchQueueItems();
   }, []);
 
+  // Live feed: apply changes as soon as the server reports them
+  useEffect(() => {
+    const source = new EventSource('http://localhost:8000/queue/stream');
+    ['created', 'status', 'caption', 'posted', 'updated', 'bulk'].forEach(type =>
+      source.addEventListener(type, () => syncChanges())
+    );
+    return () => source.close();
+  }, []);
+
   const fetchQueueItems = async () => {
     setLoading(true);
     try {
       // Replace with actual API endpoint
       const response = await axios.get('http://localhost:8000/queue');
-      setQueueItems(response.data || mockQueueData);
+      changesCursor.current = response.data?.cursor || null;
+      setQueueItems(response.data?.queue || mockQueueData);
     } catch (error) {
       console.error('Error fetching queue:', error);
       setQueueItems(mockQueueData); // Fallback to mock data
@@ -72,6 +83,34 @@ const DashboardPage = () => {
     }
   };
 
+  // Apply only what changed since the last fetch, instead of reloading the whole queue
+  const syncChanges = async () => {
+    if (!changesCursor.current) {
+      return fetchQueueItems();
+    }
+    try {
+      let more = true;
+      while (more) {
+        const { data } = await axios.get('http://localhost:8000/queue/changes', {
+          params: { since: changesCursor.current }
+        });
+        changesCursor.current = data.cursor;
+        more = data.has_more;
+        const changed = new Map(data.changes.map(item => [item.id, item]));
+        const removed = new Set(data.removed);
+        setQueueItems(items => [
+          ...data.changes.filter(item => !items.some(existing => existing.id === item.id)),
+          ...items
+            .filter(item => !removed.has(item.id))
+            .map(item => changed.get(item.id) || item),
+        ]);
+      }
+    } catch (error) {
+      console.error('Error syncing queue changes:', error);
+      fetchQueueItems();
+    }
+  };
+
   const mockQueueData = [
     {
       id: 1,
@@ -138,7 +177,7 @@ const DashboardPage = () => {
         duration: 2000,
         isClosable: true,
       });
-      fetchQueueItems();
+      syncChanges();
     } catch (error) {
       toast({
         title: "Error approving post",
@@ -158,7 +197,7 @@ const DashboardPage = () => {
         duration: 2000,
         isClosable: true,
       });
-      fetchQueueItems();
+      syncChanges();
     } catch (error) {
       toast({
         title: "Error rejecting post",
@@ -169,6 +208,32 @@ const DashboardPage = () => {
     }
   };
 
+  const handleApproveAll = async () => {
+    const ids = queueItems.filter(item => item.status === 'pending').map(item => item.id);
+    if (ids.length === 0) return;
+    try {
+      const response = await axios.post('http://localhost:8000/queue/bulk', {
+        ids,
+        action: 'approve'
+      });
+      toast({
+        title: `${response.data.succeeded} posts approved`,
+        description: response.data.failed ? `${response.data.failed} could not be approved` : undefined,
+        status: response.data.failed ? "warning" : "success",
+        duration: 3000,
+        isClosable: true,
+      });
+      syncChanges();
+    } catch (error) {
+      toast({
+        title: "Error approving posts",
+        status: "error",
+        duration: 3000,
+        isClosable: true,
+      });
+    }
+  };
+
   const handleDelete = async (id) => {
     try {
       await axios.delete(`http://localhost:8000/queue/${id}`);
@@ -178,7 +243,7 @@ const DashboardPage = () => {
         duration: 2000,
         isClosable: true,
       });
-      fetchQueueItems();
+      syncChanges();
     } catch (error) {
       toast({
         title: "Error deleting post",
@@ -198,7 +263,7 @@ const DashboardPage = () => {
         duration: 3000,
         isClosable: true,
       });
-      fetchQueueItems();
+      syncChanges();
     } catch (error) {
       toast({
         title: "Error posting to Twitter",
@@ -221,7 +286,7 @@ const DashboardPage = () => {
         isClosable: true,
       });
       onClose();
-      fetchQueueItems();
+      syncChanges();
     } catch (error) {
       toast({
         title: "Error updating caption",
@@ -232,6 +297,24 @@ const DashboardPage = () => {
     }
   };
 
+  const handleSelectCandidate = async (index) => {
+    const candidate = selectedItem.caption_candidates[index];
+    try {
+      // The server sets both the caption and the candidate's tone
+      await axios.put(`http://localhost:8000/queue/${selectedItem.id}/caption/candidates/${index}`);
+      setSelectedItem({ ...selectedItem, caption: candidate.caption, tone: candidate.tone });
+      setEditedCaption(candidate.caption);
+      syncChanges();
+    } catch (error) {
+      toast({
+        title: "Error selecting caption",
+        status: "error",
+        duration: 3000,
+        isClosable: true,
+      });
+    }
+  };
+
   const formatTime = (dateString) => {
     return new Date(dateString).toLocaleString();
   };
@@ -244,7 +327,10 @@ const DashboardPage = () => {
             Handler Dashboard
           </Heading>
           <Spacer />
-          <Button onClick={fetchQueueItems} isLoading={loading}>
+          <Button onClick={handleApproveAll} colorScheme="green" mr={2}>
+            Approve All Pending
+          </Button>
+          <Button onClick={syncChanges} isLoading={loading}>
             Refresh Queue
           </Button>
         </Flex>
@@ -342,6 +428,29 @@ const DashboardPage = () => {
                     {editedCaption.length}/280 characters
                   </Text>
                 </Box>
+                {selectedItem.caption_candidates?.length > 0 && (
+                  <Box w="100%">
+                    <Text fontWeight="bold" mb={2}>Alternatives:</Text>
+                    <VStack spacing={2} align="stretch">
+                      {selectedItem.caption_candidates.map((candidate, index) => (
+                        <Button
+                          key={index}
+                          variant={candidate.caption === editedCaption ? 'solid' : 'outline'}
+                          colorScheme={getToneColor(candidate.tone)}
+                          size="sm"
+                          whiteSpace="normal"
+                          height="auto"
+                          py={2}
+                          textAlign="left"
+                          justifyContent="flex-start"
+                          onClick={() => handleSelectCandidate(index)}
+                        >
+                          {candidate.caption}
+                        </Button>
+                      ))}
+                    </VStack>
+                  </Box>
+                )}
               </VStack>
             )}
           </ModalBody>
@@ -87,6 +87,9 @@ export const queueAPI = {
 
   // Post to Twitter immediately
   postNow: (id) => api.post(`/queue/${id}/post`),
+
+  // Apply one action (approve/reject/schedule/post/retone) to many items
+  bulkAction: (ids, action, options = {}) => api.post('/queue/bulk', { ids, action, ...options }),
 };
 
 export const systemAPI = {
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Local Transcription Benchmark for Twitter Handler
+
+Measures the real-time factor (processing time / audio duration, lower is
+better) of the local CPU engine at different worker counts. Threads per
+worker default to cores / workers so every run uses the whole machine.
+
+Usage:
+    pip install faster-whisper
+    python scripts/bench_local_whisper.py --audio sample.wav --clips 16 --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.local_whisper import LocalWhisperEngine
+
+async def run(audio_paths, clips: int, workers: int, threads: int, model: str, compute_type: str):
+    engine = LocalWhisperEngine(
+        model_size=model,
+        workers=workers,
+        threads_per_worker=threads,
+        compute_type=compute_type,
+    )
+    start = time.perf_counter()
+    await engine.warm_up()
+    load_time = time.perf_counter() - start
+    
+    batch = [audio_paths[i % len(audio_paths)] for i in range(clips)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.transcribe_path(path) for path in batch))
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+    
+    audio_seconds = sum(result["duration_seconds"] for result in results)
+    print(f"workers={workers:<3} threads={threads:<3} load={load_time:6.2f}s  "
+          f"wall={elapsed:7.2f}s  audio={audio_seconds:7.1f}s  RTF={elapsed / audio_seconds:.3f}  "
+          f"clips/min={clips / elapsed * 60:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark local transcription RTF vs worker count')
+    parser.add_argument('--audio', '-a', nargs='+', required=True, help='Audio file(s) to transcribe')
+    parser.add_argument('--clips', '-n', type=int, default=16, help='Clips transcribed per run')
+    parser.add_argument('--workers', '-w', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=None, help='Threads per worker (default: cores / workers)')
+    parser.add_argument('--model', default=os.environ.get("LOCAL_WHISPER_MODEL", "base"))
+    parser.add_argument('--compute-type', default=os.environ.get("LOCAL_WHISPER_COMPUTE_TYPE", "int8"))
+    args = parser.parse_args()
+    
+    cores = os.cpu_count() or 1
+    print(f"{cores} CPU cores, model={args.model}, compute_type={args.compute_type}")
+    for workers in args.workers:
+        threads = args.threads or max(1, cores // workers)
+        asyncio.run(run(args.audio, args.clips, workers, threads, args.model, args.compute_type))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Media Upload Benchmark for Twitter Handler
+
+Uploads a generated file through TwitterService.upload_media to the local stub
+server at several APPEND concurrencies and reports time, throughput and peak
+Python memory (tracemalloc) per run. It then checks resume: an upload is
+cancelled part-way and restarted, and the number of segments the restart sent
+is reported.
+
+Usage:
+    python scripts/stub_twitter_server.py --port 9200 --latency 0.2 --processing 2 &
+    python scripts/bench_media_upload.py --size-mb 32 --chunk-kb 1024 --concurrency 1 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.twitter import TwitterService
+
+CREDENTIALS = ("stub-key", "stub", "stub-token", "stub")
+
+def make_file(directory: str, size: int) -> str:
+    path = os.path.join(directory, "bench.mp4")
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            block = os.urandom(min(remaining, 1024 * 1024))
+            f.write(block)
+            remaining -= len(block)
+    return path
+
+def make_service(api_base: str, chunk_size: int, concurrency: int) -> TwitterService:
+    os.environ.update(
+        TWITTER_API_BASE=api_base,
+        TWITTER_UPLOAD_BASE=api_base,
+        TWITTER_UPLOAD_CHUNK_SIZE=str(chunk_size),
+        TWITTER_UPLOAD_CONCURRENCY=str(concurrency),
+    )
+    return TwitterService(*CREDENTIALS)
+
+async def run(api_base: str, path: str, chunk_size: int, concurrency: int):
+    service = make_service(api_base, chunk_size, concurrency)
+    tracemalloc.start()
+    start = time.perf_counter()
+    media_id = await service.upload_media(path, media_category="tweet_video")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await service.aclose()
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    segments = service.media_uploader.stats["segments"]
+    print(f"concurrency={concurrency:<3} segments={segments:<4} {elapsed:7.2f}s  {size_mb / elapsed:7.1f} MB/s  "
+          f"peak_mem={peak / (1024 * 1024):6.1f} MB  media_id={media_id}")
+
+async def run_resume(api_base: str, path: str, chunk_size: int, concurrency: int, interrupt_after: float):
+    service = make_service(api_base, chunk_size, concurrency)
+    task = asyncio.create_task(service.upload_media(path, media_category="tweet_video"))
+    await asyncio.sleep(interrupt_after)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    first = service.media_uploader.stats["segments"]
+    await service.aclose()
+
+    # A new service, as after a restart: only the sidecar carries progress
+    service = make_service(api_base, chunk_size, concurrency)
+    start = time.perf_counter()
+    await service.upload_media(path, media_category="tweet_video")
+    elapsed = time.perf_counter() - start
+    stats = service.media_uploader.stats
+    await service.aclose()
+    total = -(-os.path.getsize(path) // chunk_size)
+    print(f"resume: {first} of {total} segments acknowledged before the interruption; restart sent "
+          f"{stats['segments']} more (resumed={stats['resumed']}) in {elapsed:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chunked media upload against the stub Twitter server')
+    parser.add_argument('--url', '-u', default='http://127.0.0.1:9200', help='Stub API base URL')
+    parser.add_argument('--size-mb', type=float, default=32, help='Size of the generated file')
+    parser.add_argument('--chunk-kb', type=int, default=1024, help='Segment size')
+    parser.add_argument('--concurrency', '-c', type=int, nargs='+', default=[1, 4, 8], help='APPEND concurrencies to try')
+    parser.add_argument('--interrupt-after', type=float, default=1.5, help='Seconds before cancelling the resume run')
+    args = parser.parse_args()
+
+    chunk_size = args.chunk_kb * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_file(directory, int(args.size_mb * 1024 * 1024))
+        for concurrency in args.concurrency:
+            asyncio.run(run(args.url, path, chunk_size, concurrency))
+        asyncio.run(run_resume(args.url, path, chunk_size, max(args.concurrency), args.interrupt_after))
+
+if __name__ == "__main__":
+    main()
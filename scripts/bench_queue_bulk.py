@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Bulk Queue Operations Benchmark for Twitter Handler
+
+Starts the API under uvicorn against a scratch SQLite database, seeds pending
+items and approves them two ways: one PUT /queue/{id}/approve per item (run
+--concurrency at a time) and a single POST /queue/bulk. The same is then done
+for rejecting. Reports items per second and the number of live feed events
+each way produced (change versions written).
+
+Usage:
+    python scripts/bench_queue_bulk.py --items 500 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+def seed(count: int) -> list:
+    from sqlalchemy import insert
+    from database.models import Submission, get_session
+    
+    session = get_session()
+    ids = session.execute(insert(Submission).returning(Submission.id), [
+        {"source": "text", "status": "pending", "caption": f"bench {i}", "tone": "mixed"} for i in range(count)
+    ]).scalars().all()
+    session.commit()
+    session.close()
+    return list(ids)
+
+def current_version() -> int:
+    from database.models import ChangeCounter, SUBMISSIONS_COUNTER, get_session
+    
+    session = get_session()
+    version = session.get(ChangeCounter, SUBMISSIONS_COUNTER).value
+    session.close()
+    return version
+
+async def per_item(client: httpx.AsyncClient, ids: list, action: str, concurrency: int) -> int:
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one(item_id: int) -> bool:
+        async with semaphore:
+            response = await client.put(f"/queue/{item_id}/{action}")
+            return response.status_code == 200
+    
+    return sum(await asyncio.gather(*(one(item_id) for item_id in ids)))
+
+async def bulk(client: httpx.AsyncClient, ids: list, action: str) -> int:
+    response = await client.post("/queue/bulk", json={"ids": ids, "action": action})
+    response.raise_for_status()
+    return response.json()["succeeded"]
+
+async def run(url: str, items: int, concurrency: int):
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        await wait_until_up(client)
+        # Warm up connections and the route
+        await client.post("/queue/bulk", json={"ids": [0], "action": "approve"})
+        
+        for action in ("approve", "reject"):
+            for mode in ("per-item", "bulk"):
+                ids = seed(items)
+                if action == "reject":
+                    # Reject from approved, so both runs start from the same state
+                    await bulk(client, ids, "approve")
+                before = current_version()
+                start = time.perf_counter()
+                if mode == "bulk":
+                    done = await bulk(client, ids, action)
+                else:
+                    done = await per_item(client, ids, action, concurrency)
+                elapsed = time.perf_counter() - start
+                events = current_version() - before
+                print(f"{action:<8} {mode:<9} {done}/{items} items in {elapsed * 1000:8.1f}ms  "
+                      f"{done / elapsed:9.0f} items/s  change events={events}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare POST /queue/bulk with the per-item queue endpoints')
+    parser.add_argument('--items', '-n', type=int, default=500, help='Items per run')
+    parser.add_argument('--concurrency', '-c', type=int, default=8, help='Per-item requests in flight at once')
+    parser.add_argument('--port', type=int, default=8767)
+    args = parser.parse_args()
+    
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    env = dict(os.environ)
+    env.update(DATABASE_URL=database_url, SCHEDULER_ENABLED="false")
+    os.environ["DATABASE_URL"] = database_url
+    from database.models import init_db
+    init_db()
+    
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{args.port}", args.items, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
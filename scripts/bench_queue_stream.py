@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Live Queue Feed Benchmark for Twitter Handler
+
+Starts the API under uvicorn (several workers) against a scratch SQLite
+database, opens many idle /queue/stream subscribers and reports:
+
+- server memory per connection (RSS of all uvicorn processes, before and
+  after the subscribers connect)
+- fan-out latency: time from a change until each subscriber has the event.
+  Changes alternate between a caption edit through the API (it lands on one
+  worker; the others see it through the database) and a direct database
+  write from this process, as the pipeline worker makes.
+
+Client and server share the machine, so on few cores latencies include time
+spent parsing 500 streams in this process.
+
+Usage:
+    python scripts/bench_queue_stream.py --subscribers 500 --workers 2 --events 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def process_tree_rss(pid: int) -> int:
+    """Resident memory in bytes of a process and its descendants (Linux /proc)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        stack.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return total
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+async def subscribe(client: httpx.AsyncClient, received: dict, ready: asyncio.Event, counter: list, total: int):
+    async with client.stream("GET", "/queue/stream") as response:
+        event_type = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event_type = line[7:]
+                if event_type == "hello":
+                    counter[0] += 1
+                    if counter[0] == total:
+                        ready.set()
+            elif line.startswith("data: ") and event_type not in ("hello", None):
+                caption = json.loads(line[6:]).get("caption", "")
+                if caption in received:
+                    received[caption].append(time.perf_counter())
+
+async def run(url: str, server_pid: int, subscribers: int, events: int):
+    from database.models import Submission, get_session
+    
+    session = get_session()
+    item = Submission(source="text", status="pending", caption="seed", tone="mixed")
+    session.add(item)
+    session.commit()
+    
+    limits = httpx.Limits(max_connections=subscribers + 10, max_keepalive_connections=subscribers + 10)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=httpx.Timeout(30, read=None)) as client:
+        await wait_until_up(client)
+        # Let every worker finish starting up before measuring
+        await asyncio.sleep(2)
+        rss_before = process_tree_rss(server_pid)
+        
+        received = {}
+        ready = asyncio.Event()
+        counter = [0]
+        tasks = [asyncio.create_task(subscribe(client, received, ready, counter, subscribers))
+                 for _ in range(subscribers)]
+        await asyncio.wait_for(ready.wait(), timeout=60)
+        await asyncio.sleep(2)
+        rss_after = process_tree_rss(server_pid)
+        
+        latencies = {"api": [], "db": []}
+        delivered = {"api": 0, "db": 0}
+        for i in range(events):
+            caption = f"bench-{i}"
+            received[caption] = []
+            path = "api" if i % 2 == 0 else "db"
+            start = time.perf_counter()
+            if path == "api":
+                await client.put(f"/queue/{item.id}/caption", params={"caption": caption})
+            else:
+                item.caption = caption
+                await asyncio.to_thread(session.commit)
+            deadline = time.perf_counter() + 10
+            while len(received[caption]) < subscribers and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            delivered[path] += len(received[caption])
+            latencies[path].extend(t - start for t in received[caption])
+            await asyncio.sleep(0.2)
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    session.close()
+    
+    per_connection = (rss_after - rss_before) / subscribers
+    print(f"subscribers={subscribers} server RSS before={rss_before / 2**20:.1f} MB "
+          f"after={rss_after / 2**20:.1f} MB  per connection={per_connection / 1024:.1f} KB")
+    for path, values in latencies.items():
+        values.sort()
+        expected = subscribers * ((events + (path == "api")) // 2)
+        if not values:
+            print(f"{path:<4} no events delivered")
+            continue
+        print(f"{path:<4} delivered={delivered[path]}/{expected}  fan-out latency p50={percentile(values, 0.5) * 1000:.0f}ms "
+              f"p99={percentile(values, 0.99) * 1000:.0f}ms max={values[-1] * 1000:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /queue/stream fan-out and per-connection memory')
+    parser.add_argument('--subscribers', '-s', type=int, default=500, help='Idle SSE subscribers')
+    parser.add_argument('--workers', '-w', type=int, default=2, help='uvicorn worker processes')
+    parser.add_argument('--events', '-e', type=int, default=20, help='Changes to fan out')
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='QUEUE_STREAM_POLL_INTERVAL for the server')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+    
+    database_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    env = dict(os.environ)
+    env.update(DATABASE_URL=database_url, QUEUE_STREAM_POLL_INTERVAL=str(args.poll_interval), SCHEDULER_ENABLED="false")
+    os.environ["DATABASE_URL"] = database_url
+    from database.models import init_db
+    init_db()
+    
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{args.port}", server.pid, args.subscribers, args.events))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
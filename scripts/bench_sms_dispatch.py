@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Outbound SMS Benchmark for Twitter Handler
+
+Sends a batch of messages through TwilioService against the local stub server
+and reports messages/sec and event-loop stall time. A ticker task sleeps in
+short intervals alongside the sends; any lateness beyond the interval is time
+the loop was blocked (reported as p99 and max lag per tick). The "blocking" mode sends with a synchronous HTTP call
+on the loop, as the old twilio.rest.Client-based send_sms did.
+
+Usage:
+    python scripts/stub_twilio_server.py --port 9100 --latency 0.15 --mps 50 &
+    python scripts/bench_sms_dispatch.py --messages 200 --rate 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.twilio_service import TwilioService
+
+TICK = 0.005
+
+async def monitor_stall(stop: asyncio.Event, result: dict):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        result.append(max(0.0, loop.time() - start - TICK))
+
+async def run(api_base: str, messages: int, rate: float, blocking: bool):
+    os.environ["TWILIO_API_BASE"] = api_base
+    os.environ["TWILIO_SEND_RATE"] = str(rate)
+    os.environ["TWILIO_SEND_BURST"] = str(rate)
+    service = TwilioService(account_sid="ACstub", auth_token="stub", phone_number="+15550000000")
+    sync_client = httpx.Client(base_url=api_base, auth=("ACstub", "stub"))
+    
+    async def send_blocking(i: int):
+        sync_client.post("/Accounts/ACstub/Messages.json",
+                         data={"To": f"+1555{i:07d}", "From": service.phone_number, "Body": f"bench {i}"})
+        # Let other tasks (the ticker, in a server: other requests) run between sends
+        await asyncio.sleep(0)
+    
+    stall = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(monitor_stall(stop, stall))
+    start = time.perf_counter()
+    if blocking:
+        for i in range(messages):
+            await send_blocking(i)
+    else:
+        results = await asyncio.gather(
+            *(service.send_sms(f"+1555{i:07d}", f"bench {i}") for i in range(messages)),
+            return_exceptions=True
+        )
+        errors = sum(isinstance(r, Exception) for r in results)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    await service.aclose()
+    sync_client.close()
+    
+    stall.sort()
+    p99 = stall[int(0.99 * (len(stall) - 1))] if stall else 0.0
+    mode = "blocking" if blocking else "async"
+    print(f"{mode:<9} messages={messages:<5} {elapsed:7.2f}s  {messages / elapsed:7.1f} msg/s  "
+          f"loop stall p99={p99 * 1000:7.1f}ms max={max(stall, default=0.0) * 1000:7.1f}ms"
+          + ("" if blocking else f"  errors={errors}"))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark outbound SMS against the stub Twilio server')
+    parser.add_argument('--url', '-u', default='http://127.0.0.1:9100/2010-04-01', help='Stub API base URL')
+    parser.add_argument('--messages', '-n', type=int, default=200, help='Messages per run')
+    parser.add_argument('--rate', '-r', type=float, default=50, help='Token bucket rate (messages/sec)')
+    parser.add_argument('--skip-blocking', action='store_true', help='Only run the async dispatcher')
+    args = parser.parse_args()
+    
+    if not args.skip_blocking:
+        asyncio.run(run(args.url, args.messages, args.rate, blocking=True))
+    asyncio.run(run(args.url, args.messages, args.rate, blocking=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+SMS Webhook Load Test for Twitter Handler
+
+Starts the API under uvicorn against a scratch SQLite database and fires
+simulated Twilio webhook requests at a fixed arrival rate (open loop, like a
+burst of inbound texts), then reports latency percentiles. A fraction of
+requests reuse an earlier MessageSid, as Twilio retries do, to exercise
+deduplication.
+
+Usage:
+    python scripts/bench_sms_webhook.py --requests 3000 --rate 300 --retry-rate 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+async def run(url: str, total: int, rate: float, retry_rate: float):
+    sids = []
+    latencies = []
+    failures = 0
+    
+    async def send(client: httpx.AsyncClient, i: int):
+        nonlocal failures
+        if sids and random.random() < retry_rate:
+            sid = random.choice(sids)
+        else:
+            sid = "SM" + uuid.uuid4().hex
+            sids.append(sid)
+        data = {"From": f"+1555{i % 100:07d}", "To": "+15557654321", "Body": f"load test {i}", "MessageSid": sid}
+        start = time.perf_counter()
+        response = await client.post("/sms/webhook", data=data)
+        latencies.append(time.perf_counter() - start)
+        failures += response.status_code != 200 or b"received" not in response.content
+    
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await wait_until_up(client)
+        for i in range(20):  # Warm up
+            await send(client, i)
+        latencies.clear()
+        
+        tasks = []
+        start = time.perf_counter()
+        for i in range(total):
+            # Open loop: requests are sent on schedule whether or not earlier ones finished
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(client, i)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    print(f"requests={total} rate={rate:.0f}/s achieved={total / elapsed:.0f}/s failures={failures}")
+    print(f"latency p50={percentile(latencies, 0.50) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the SMS webhook')
+    parser.add_argument('--requests', '-n', type=int, default=3000, help='Total webhook requests')
+    parser.add_argument('--rate', '-r', type=float, default=300, help='Requests per second')
+    parser.add_argument('--retry-rate', type=float, default=0.1, help='Fraction of requests repeating an earlier MessageSid')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--database-url', default=None, help='Database to write to (default: a scratch SQLite file)')
+    args = parser.parse_args()
+    
+    env = dict(os.environ)
+    env["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    env.pop("TWILIO_AUTH_TOKEN", None)  # Unsigned requests
+    # 100 simulated senders far exceed a real sender's budget; measure the write path, not throttling
+    env["SMS_SENDER_BURST"] = str(args.requests)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{args.port}", args.requests, args.rate, args.retry_rate))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Sound Classifier Benchmark for Twitter Handler
+
+Compares the compiled classifier against the previous nested substring scan
+on synthetic transcripts. Both give the first label with a hit; labels only
+differ where a keyword appears inside a longer word (e.g. "needle").
+
+Usage:
+    python scripts/bench_sound_classifier.py --transcripts 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.sound_classifier import SoundClassifier
+
+VOCABULARY = (
+    "please need want feels moaning whimpering begging needle wanton unfeeling "
+    "i you me the a to be so good again now tonight listen everyone hear my "
+    "little voice quiet loud soft slowly sweet exposed shared online sounds"
+).split()
+
+def legacy_detect_sound_type(transcript: str) -> str:
+    """The previous implementation: rebuilt tables and substring scans per call."""
+    keywords = {
+        "whimper": ["whimper", "whimpered", "whimpering", "please"],
+        "moan": ["moan", "moaned", "moaning", "feels"],
+        "beg": ["beg", "begging", "need", "want"]
+    }
+    
+    transcript = transcript.lower()
+    for sound_type, word_list in keywords.items():
+        if any(word in transcript for word in word_list):
+            return sound_type
+            
+    return "other"
+
+def make_transcripts(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCABULARY, k=rng.randint(4, 30))) for _ in range(count)]
+
+def timed(label: str, fn, transcripts):
+    start = time.perf_counter()
+    results = fn(transcripts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {len(transcripts) / elapsed:12.0f} transcripts/s")
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sound-type classification')
+    parser.add_argument('--transcripts', '-n', type=int, default=100000)
+    args = parser.parse_args()
+    
+    transcripts = make_transcripts(args.transcripts)
+    classifier = SoundClassifier()
+    
+    legacy, legacy_time = timed("legacy substring scan", lambda ts: [legacy_detect_sound_type(t) for t in ts], transcripts)
+    single, _ = timed("compiled classify()", lambda ts: [classifier.classify(t) for t in ts], transcripts)
+    batch, batch_time = timed("compiled classify_many()", classifier.classify_many, transcripts)
+    
+    assert single == batch
+    changed = sum(a != b for a, b in zip(legacy, batch))
+    print(f"classify_many vs legacy time ratio: {batch_time / legacy_time:.2f}x")
+    print(f"Labels changed vs legacy: {changed} ({changed / len(transcripts):.1%}), "
+          f"from word-boundary matching (e.g. 'needle')")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Delivery-Status Callback Load Test for Twitter Handler
+
+Seeds a scratch SQLite database with notifications, starts the API under
+uvicorn, replays Twilio status callbacks for them (queued -> sent ->
+delivered, some out of order) against /sms/status, and reports callback
+latency and how many UPDATE statements reached the database. --naive flushes
+as soon as anything is buffered, approximating one UPDATE per callback.
+
+Usage:
+    python scripts/bench_status_callbacks.py --callbacks 10000 --concurrency 20
+    python scripts/bench_status_callbacks.py --callbacks 10000 --naive
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def make_callbacks(sids, total):
+    """Per message: queued, sent, delivered; neighbouring callbacks occasionally swapped."""
+    callbacks = [(sid, status) for sid in sids for status in ("queued", "sent", "delivered")][:total]
+    for i in range(0, len(callbacks) - 1, 17):
+        callbacks[i], callbacks[i + 1] = callbacks[i + 1], callbacks[i]
+    return callbacks
+
+def seed(total: int):
+    from sqlalchemy import insert
+    from database.models import Notification, get_session, init_db
+    
+    init_db()
+    sids = ["SM" + uuid.uuid4().hex for _ in range((total + 2) // 3)]
+    session = get_session()
+    session.execute(insert(Notification), [
+        {"recipient": "+15551234567", "message": "bench", "sent": True, "message_sid": sid} for sid in sids
+    ])
+    session.commit()
+    session.close()
+    return sids
+
+def final_statuses():
+    from sqlalchemy import func, select
+    from database.models import Notification, get_session
+    
+    session = get_session()
+    rows = session.execute(
+        select(Notification.delivery_status, func.count()).group_by(Notification.delivery_status)
+    ).all()
+    session.close()
+    return dict(rows)
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+async def run(url: str, callbacks, concurrency: int, flush_interval: float):
+    latencies = []
+    queue = asyncio.Queue()
+    for callback in callbacks:
+        queue.put_nowait(callback)
+    
+    async def worker(client):
+        while not queue.empty():
+            sid, status = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/sms/status", data={"MessageSid": sid, "MessageStatus": status})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+    
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await wait_until_up(client)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        # Let the last periodic flush run
+        await asyncio.sleep(flush_interval * 2)
+        stats = (await client.get("/sms/status/stats")).json()
+    
+    latencies.sort()
+    return elapsed, latencies, stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay Twilio status callbacks against /sms/status')
+    parser.add_argument('--callbacks', '-n', type=int, default=10000, help='Callbacks to replay')
+    parser.add_argument('--concurrency', '-c', type=int, default=20, help='Callbacks in flight at once')
+    parser.add_argument('--flush-interval', type=float, default=1.0, help='Seconds between flushes')
+    parser.add_argument('--naive', action='store_true', help='Flush as soon as anything is buffered')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+    
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    sids = seed(args.callbacks)
+    callbacks = make_callbacks(sids, args.callbacks)
+    
+    env = dict(os.environ)
+    env.pop("TWILIO_AUTH_TOKEN", None)  # Unsigned requests
+    env["STATUS_FLUSH_INTERVAL"] = str(args.flush_interval)
+    if args.naive:
+        env["STATUS_FLUSH_MAX_PENDING"] = "1"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        elapsed, latencies, stats = asyncio.run(
+            run(f"http://127.0.0.1:{args.port}", callbacks, args.concurrency, args.flush_interval)
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    
+    mode = "naive (flush immediately)" if args.naive else "buffered"
+    print(f"{mode}: callbacks={len(callbacks)} messages={len(sids)} {elapsed:.2f}s ({len(callbacks) / elapsed:.0f}/s)")
+    print(f"callback latency p50={percentile(latencies, 0.5) * 1000:.2f}ms p99={percentile(latencies, 0.99) * 1000:.2f}ms")
+    print(f"UPDATE statements={stats['statements']} flushes={stats['flushes']} rows updated={stats['rows_updated']} "
+          f"coalesced={stats['coalesced']} last flush={stats['last_flush_ms']}ms")
+    print(f"final statuses: {final_statuses()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Batch Transcription Benchmark for Twitter Handler
+
+Measures transcribe_many() throughput (files/min) at several concurrency
+levels against the local stub server.
+
+Usage:
+    python scripts/stub_transcription_server.py --port 9000 --latency 0.5 &
+    python scripts/bench_transcribe_many.py --files 64 --concurrency 1 4 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.whisper import WhisperTranscriptionService
+
+def make_files(count: int, size_kb: int):
+    directory = tempfile.mkdtemp()
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"clip-{i}.wav")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size_kb * 1024))
+        paths.append(path)
+    return paths
+
+async def run(api_base: str, paths, concurrency: int):
+    service = WhisperTranscriptionService(api_key="stub")
+    service.cache = None  # Measure the backend, not the cache
+    service.api_base = api_base.rstrip("/")
+    service.concurrency = concurrency
+    
+    errors = 0
+    start = time.perf_counter()
+    async for item in service.transcribe_many(paths, concurrency=concurrency):
+        errors += "error" in item
+    elapsed = time.perf_counter() - start
+    await service.aclose()
+    
+    print(f"concurrency={concurrency:<3} files={len(paths):<5} {elapsed:7.2f}s  "
+          f"{len(paths) / elapsed * 60:8.1f} files/min  errors={errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transcribe_many() against the stub server')
+    parser.add_argument('--url', '-u', default='http://127.0.0.1:9000/v1', help='Stub API base URL')
+    parser.add_argument('--files', '-n', type=int, default=64, help='Files per run')
+    parser.add_argument('--size-kb', type=int, default=256, help='Size of each dummy file')
+    parser.add_argument('--concurrency', '-c', type=int, nargs='+', default=[1, 4, 16])
+    args = parser.parse_args()
+    
+    paths = make_files(args.files, args.size_kb)
+    for concurrency in args.concurrency:
+        asyncio.run(run(args.url, paths, concurrency))
+
+if __name__ == "__main__":
+    main()
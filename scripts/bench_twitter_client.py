@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Twitter Rate-Limit Load Test for Twitter Handler
+
+Fires a burst of tweets through TwitterService at the local stub server and
+reports how long the burst took, how many 429s the server handed out and how
+many posts failed. The "naive" mode posts with the same signing and jittered
+backoff but ignores the x-rate-limit-* headers, retrying blindly on 429
+(like a plain retrying client); the "tracked" mode uses the rate-limit-aware
+TwitterClient, which holds calls until the window reopens.
+
+Usage:
+    python scripts/stub_twitter_server.py --port 9200 --limit 50 --window 5 &
+    python scripts/bench_twitter_client.py --posts 150 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.twitter import TwitterService
+from api.services.twitter_client import oauth1_header
+
+CREDENTIALS = ("stub-key", "stub", "stub-token", "stub")
+
+async def post_naive(client: httpx.AsyncClient, url: str, text: str, max_retries: int):
+    for attempt in range(max_retries + 1):
+        headers = {"Authorization": oauth1_header("POST", url, None, *CREDENTIALS)}
+        response = await client.post(url, json={"text": text}, headers=headers)
+        if response.status_code < 300:
+            return response.json()
+        if attempt == max_retries:
+            raise RuntimeError(f"status {response.status_code}")
+        await asyncio.sleep(random.uniform(0, min(60.0, 1.0 * (2 ** attempt))))
+
+async def run(api_base: str, posts: int, concurrency: int, naive: bool):
+    os.environ["TWITTER_API_BASE"] = api_base
+    async with httpx.AsyncClient(base_url=api_base) as stats_client:
+        before = (await stats_client.get("/stats")).json()
+        
+        service = TwitterService(*CREDENTIALS)
+        raw_client = httpx.AsyncClient(timeout=30)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        
+        async def post(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                if naive:
+                    await post_naive(raw_client, f"{api_base}/2/tweets", f"bench {i}", service.client.max_retries)
+                else:
+                    await service.post_tweet(f"bench {i}")
+                latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(*(post(i) for i in range(posts)), return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        gauges = service.get_rate_limits()
+        await service.aclose()
+        await raw_client.aclose()
+        
+        after = (await stats_client.get("/stats")).json()
+    
+    failed = sum(isinstance(r, Exception) for r in results)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+    mode = "naive" if naive else "tracked"
+    print(f"{mode:<8} posts={posts:<5} {elapsed:7.2f}s  ok={posts - failed:<5} failed={failed:<4} "
+          f"server_requests={after['requests'] - before['requests']:<5} "
+          f"429s={after['throttled'] - before['throttled']:<5} "
+          f"latency p50={p50:6.2f}s p95={p95:6.2f}s")
+    if not naive:
+        print(f"         gauges: {gauges['endpoints']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test Twitter rate-limit handling against the stub server')
+    parser.add_argument('--url', '-u', default='http://127.0.0.1:9200', help='Stub API base URL')
+    parser.add_argument('--posts', '-n', type=int, default=150, help='Tweets per run')
+    parser.add_argument('--concurrency', '-c', type=int, default=50, help='Posts in flight at once')
+    parser.add_argument('--pause', type=float, default=6.0, help='Seconds between runs (set above the stub --window)')
+    parser.add_argument('--skip-naive', action='store_true', help='Only run the rate-limit-aware client')
+    args = parser.parse_args()
+    
+    if not args.skip_naive:
+        asyncio.run(run(args.url, args.posts, args.concurrency, naive=True))
+        # Let the stub's window roll over so both runs start from a full budget
+        time.sleep(args.pause)
+    asyncio.run(run(args.url, args.posts, args.concurrency, naive=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Upload Concurrency Benchmark for Twitter Handler
+
+Measures /health latency while large audio uploads are in flight, to check
+that uploads no longer stall the event loop for other requests.
+
+Start the API first, e.g.:
+    MAX_UPLOAD_BYTES=209715200 uvicorn api.main:app --port 8000
+
+Then run:
+    python scripts/bench_upload_latency.py --uploads 20 --size-mb 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import struct
+import time
+
+import httpx
+
+def make_wav(size_mb: int) -> bytes:
+    """Build a silent 16-bit PCM WAV of roughly size_mb megabytes."""
+    data_size = size_mb * 1024 * 1024
+    header = b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 2, 48000, 48000 * 4, 4, 16)
+    header += b"data" + struct.pack("<I", data_size)
+    return header + bytes(data_size)
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe_health(client: httpx.AsyncClient, base_url: str, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"{base_url}/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def upload(client: httpx.AsyncClient, base_url: str, payload: bytes, index: int) -> float:
+    start = time.perf_counter()
+    response = await client.post(
+        f"{base_url}/submit/audio",
+        files={"file": (f"bench-{index}.wav", payload, "audio/wav")},
+        data={"tone": "auto"},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+async def run(base_url: str, uploads: int, size_mb: int, interval: float):
+    payload = make_wav(size_mb)
+    limits = httpx.Limits(max_connections=uploads + 4)
+    async with httpx.AsyncClient(timeout=600, limits=limits) as client:
+        # Baseline with no uploads in flight
+        stop = asyncio.Event()
+        idle_probe = asyncio.create_task(probe_health(client, base_url, stop, interval))
+        await asyncio.sleep(2)
+        stop.set()
+        idle = await idle_probe
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, base_url, stop, interval))
+        start = time.perf_counter()
+        durations = await asyncio.gather(*(upload(client, base_url, payload, i) for i in range(uploads)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        busy = await probe
+
+    print(f"{uploads} uploads x {size_mb} MB finished in {elapsed:.2f}s "
+          f"(slowest {max(durations):.2f}s, {uploads * size_mb / elapsed:.1f} MB/s)")
+    for label, samples in (("idle", idle), ("under load", busy)):
+        print(f"/health {label:<11} n={len(samples):<5} "
+              f"p50={statistics.median(samples):7.2f}ms  "
+              f"p99={percentile(samples, 99):7.2f}ms  max={max(samples):7.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /health latency during concurrent uploads")
+    parser.add_argument("--url", "-u", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--uploads", "-n", type=int, default=20, help="Concurrent uploads")
+    parser.add_argument("--size-mb", type=int, default=50, help="Size of each upload in MB")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between /health probes")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url.rstrip("/"), args.uploads, args.size_mb, args.interval))
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ It's useful for testing and initial data loading.
 """
 
 import argparse
+import asyncio
 import os
 import requests
 import sys
@@ -82,6 +83,45 @@ def batch_ingest(
     
     return results
 
+async def batch_transcribe(
+    directory: str,
+    extensions: List[str] = [".wav", ".mp3", ".ogg", ".m4a"],
+    concurrency: int = 4
+) -> List[dict]:
+    """
+    Transcribe all audio files in a directory directly, without uploading them.
+    
+    Useful for backfilling transcripts. Files are transcribed concurrently and
+    printed as they finish.
+    
+    Args:
+        directory: Directory containing audio files
+        extensions: List of valid file extensions to process
+        concurrency: Maximum transcriptions in flight
+        
+    Returns:
+        list: Result or error for each file
+    """
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from api.services.whisper import WhisperTranscriptionService
+    
+    path = Path(directory)
+    if not path.exists() or not path.is_dir():
+        print(f"Error: Directory {directory} not found")
+        return []
+    
+    files = (str(file) for file in path.iterdir() if file.is_file() and file.suffix.lower() in extensions)
+    service = WhisperTranscriptionService()
+    results = []
+    try:
+        async for item in service.transcribe_many(files, concurrency=concurrency):
+            status = item["result"]["text"] if "result" in item else f"Failed: {item['error']}"
+            print(f"{os.path.basename(item['path'])}: {status}")
+            results.append(item)
+    finally:
+        await service.aclose()
+    return results
+
 def main():
     parser = argparse.ArgumentParser(description='Ingest audio files into Twitter Handler')
     parser.add_argument('--file', '-f', help='Single audio file to upload')
@@ -91,10 +131,17 @@ def main():
     parser.add_argument('--hint', help='Caption hint for single file upload')
     parser.add_argument('--tone', default='cruel', choices=['cruel', 'clinical', 'teasing', 'possessive'],
                         help='Caption tone (default: cruel)')
+    parser.add_argument('--transcribe', action='store_true',
+                        help='Transcribe --directory directly instead of uploading (backfill)')
+    parser.add_argument('--concurrency', '-c', type=int, default=4,
+                        help='Concurrent transcriptions for --transcribe (default: 4)')
 
     args = parser.parse_args()
     
-    if args.file:
+    if args.transcribe and args.directory:
+        results = asyncio.run(batch_transcribe(args.directory, concurrency=args.concurrency))
+        print(f"Transcribed {len(results)} files")
+    elif args.file:
         result = ingest_file(args.file, args.url, args.hint, args.tone)
         print("Upload result:")
         print(result)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Stub Transcription Server for Twitter Handler
+
+A local stand-in for the OpenAI audio transcription endpoint, so batch
+transcription throughput can be benchmarked offline. Each request sleeps for a
+configurable latency and can fail at a configurable rate.
+
+Usage:
+    python scripts/stub_transcription_server.py --port 9000 --latency 0.5
+    WHISPER_API_BASE=http://127.0.0.1:9000/v1 OPENAI_API_KEY=stub ...
+"""
+
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Stub Transcription Server")
+config = {"latency": 0.5, "jitter": 0.1, "error_rate": 0.0}
+stats = {"requests": 0, "errors": 0}
+
+@app.post("/v1/audio/transcriptions")
+async def transcribe(file: UploadFile = File(...), model: str = Form("whisper-1")):
+    stats["requests"] += 1
+    await asyncio.sleep(max(0.0, random.gauss(config["latency"], config["jitter"])))
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "stub overloaded"}}, status_code=503)
+    content = await file.read()
+    return {
+        "text": f"Stub transcript of {file.filename} ({len(content)} bytes)",
+        "duration": len(content) / 32000,
+        "model": model,
+    }
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stub transcription API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', type=float, default=0.5, help='Mean seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Std dev of latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+    
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
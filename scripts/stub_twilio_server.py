@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Stub Twilio Server for Twitter Handler
+
+A local stand-in for Twilio's Messages API, so outbound SMS throughput can be
+benchmarked offline. Each request sleeps for a configurable latency, and the
+server answers 429 when the sending rate exceeds --mps (like Twilio's queue
+limit) or at random with --error-rate 503s.
+
+Usage:
+    python scripts/stub_twilio_server.py --port 9100 --latency 0.15 --mps 50
+    TWILIO_API_BASE=http://127.0.0.1:9100/2010-04-01 ...
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Form
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Stub Twilio Server")
+config = {"latency": 0.15, "jitter": 0.05, "error_rate": 0.0, "mps": 0.0}
+stats = {"requests": 0, "accepted": 0, "throttled": 0, "errors": 0}
+recent = []  # Accept timestamps within the last second
+
+@app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+async def create_message(account_sid: str, To: str = Form(...), From: str = Form(...), Body: str = Form(...)):
+    stats["requests"] += 1
+    await asyncio.sleep(max(0.0, random.gauss(config["latency"], config["jitter"])))
+    
+    now = time.monotonic()
+    recent[:] = [t for t in recent if now - t < 1.0]
+    if config["mps"] and len(recent) >= config["mps"]:
+        stats["throttled"] += 1
+        return JSONResponse({"code": 20429, "message": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"code": 20500, "message": "stub overloaded"}, status_code=503)
+    
+    recent.append(now)
+    stats["accepted"] += 1
+    return JSONResponse({
+        "sid": "SM" + uuid.uuid4().hex,
+        "account_sid": account_sid,
+        "status": "queued",
+        "to": To,
+        "from": From,
+        "body": Body,
+    }, status_code=201)
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stub Twilio Messages API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.15, help='Mean seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Std dev of latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--mps', type=float, default=0.0, help='Accepted messages/sec before answering 429 (0 = unlimited)')
+    args = parser.parse_args()
+    
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, mps=args.mps)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Stub Twitter Server for Twitter Handler
+
+A local stand-in for the Twitter API v2 tweet endpoint and the chunked media
+upload endpoint (INIT/APPEND/FINALIZE/STATUS), so posting, media uploads and
+rate-limit handling can be load-tested offline. Requests must carry a valid
+OAuth 1.0a signature (made with the --consumer-secret/--token-secret below).
+Each endpoint gets --limit calls per fixed --window seconds; every response
+carries x-rate-limit-limit/remaining/reset headers, and calls over the limit
+get a 429. --error-rate injects random 503s. Media uploads take --latency per
+APPEND and --processing seconds of "processing" after FINALIZE.
+
+Usage:
+    python scripts/stub_twitter_server.py --port 9200 --limit 50 --window 15
+    TWITTER_API_BASE=http://127.0.0.1:9200 TWITTER_API_KEY=stub TWITTER_API_SECRET=stub \\
+        TWITTER_ACCESS_TOKEN=stub TWITTER_ACCESS_SECRET=stub ...
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Optional
+from urllib.parse import unquote
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.services.twitter_client import oauth1_header
+
+app = FastAPI(title="Stub Twitter Server")
+config = {
+    "latency": 0.1, "jitter": 0.03, "error_rate": 0.0, "limit": 50, "window": 15.0,
+    "processing": 0.0, "consumer_secret": "stub", "token_secret": "stub",
+}
+stats = {"requests": 0, "accepted": 0, "throttled": 0, "errors": 0, "unauthorized": 0,
+         "media_inits": 0, "media_segments": 0, "media_bytes": 0, "media_finalized": 0}
+windows = {}  # endpoint -> [window reset (epoch), calls used]
+uploads = {}  # media_id -> {"total_bytes", "segments": {index: size}, "finalized_at"}
+next_id = [1790000000000000000]
+
+def _parse_oauth(header: str) -> dict:
+    if not header.startswith("OAuth "):
+        return {}
+    params = {}
+    for part in header[len("OAuth "):].split(","):
+        key, _, value = part.strip().partition("=")
+        params[key] = unquote(value.strip('"'))
+    return params
+
+def _authorized(request: Request, form: Optional[dict] = None) -> bool:
+    oauth = _parse_oauth(request.headers.get("authorization", ""))
+    if "oauth_signature" not in oauth:
+        return False
+    expected = _parse_oauth(oauth1_header(
+        request.method, str(request.url), form,
+        oauth.get("oauth_consumer_key", ""), config["consumer_secret"],
+        oauth.get("oauth_token", ""), config["token_secret"],
+        nonce=oauth.get("oauth_nonce"), timestamp=oauth.get("oauth_timestamp"),
+    ))
+    return expected["oauth_signature"] == oauth["oauth_signature"]
+
+def _take(endpoint: str):
+    """Count a call against the endpoint's window; returns (allowed, headers)."""
+    now = time.time()
+    window = windows.get(endpoint)
+    if window is None or now >= window[0]:
+        window = windows[endpoint] = [int(now + config["window"]) + 1, 0]
+    allowed = window[1] < config["limit"]
+    if allowed:
+        window[1] += 1
+    return allowed, {
+        "x-rate-limit-limit": str(config["limit"]),
+        "x-rate-limit-remaining": str(config["limit"] - window[1]),
+        "x-rate-limit-reset": str(window[0]),
+    }
+
+@app.post("/2/tweets")
+async def create_tweet(request: Request):
+    stats["requests"] += 1
+    if not _authorized(request):
+        stats["unauthorized"] += 1
+        return JSONResponse({"title": "Unauthorized", "status": 401}, status_code=401)
+    allowed, headers = _take("POST /2/tweets")
+    await asyncio.sleep(max(0.0, random.gauss(config["latency"], config["jitter"])))
+    if not allowed:
+        stats["throttled"] += 1
+        return JSONResponse({"title": "Too Many Requests", "status": 429}, status_code=429, headers=headers)
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"title": "Service Unavailable", "status": 503}, status_code=503, headers=headers)
+    
+    body = await request.json()
+    next_id[0] += 1
+    stats["accepted"] += 1
+    return JSONResponse({"data": {"id": str(next_id[0]), "text": body["text"]}}, status_code=201, headers=headers)
+
+def _processing_info(upload: dict) -> Optional[dict]:
+    if not config["processing"]:
+        return None
+    elapsed = time.time() - upload["finalized_at"]
+    if elapsed >= config["processing"]:
+        return {"state": "succeeded", "progress_percent": 100}
+    return {"state": "in_progress", "check_after_secs": 1,
+            "progress_percent": int(100 * elapsed / config["processing"])}
+
+@app.post("/1.1/media/upload.json")
+async def media_upload(request: Request):
+    stats["requests"] += 1
+    form = await request.form()
+    is_urlencoded = request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded")
+    if not _authorized(request, dict(form) if is_urlencoded else None):
+        stats["unauthorized"] += 1
+        return JSONResponse({"errors": [{"message": "Could not authenticate you", "code": 32}]}, status_code=401)
+    command = form.get("command")
+    
+    if command == "INIT":
+        next_id[0] += 1
+        media_id = str(next_id[0])
+        uploads[media_id] = {"total_bytes": int(form["total_bytes"]), "segments": {}, "finalized_at": None}
+        stats["media_inits"] += 1
+        return JSONResponse({"media_id": int(media_id), "media_id_string": media_id, "expires_after_secs": 86400},
+                            status_code=202)
+    
+    upload = uploads.get(form.get("media_id"))
+    if upload is None:
+        return JSONResponse({"errors": [{"message": "Invalid media id", "code": 324}]}, status_code=400)
+    
+    if command == "APPEND":
+        data = await form["media"].read()
+        await asyncio.sleep(max(0.0, random.gauss(config["latency"], config["jitter"])))
+        if random.random() < config["error_rate"]:
+            stats["errors"] += 1
+            return JSONResponse({"errors": [{"message": "Over capacity", "code": 130}]}, status_code=503)
+        upload["segments"][int(form["segment_index"])] = len(data)
+        stats["media_segments"] += 1
+        stats["media_bytes"] += len(data)
+        return Response(status_code=204)
+    
+    if command == "FINALIZE":
+        if sum(upload["segments"].values()) != upload["total_bytes"]:
+            return JSONResponse({"errors": [{"message": "Segments do not add up to provided total file size", "code": 324}]},
+                                status_code=400)
+        upload["finalized_at"] = time.time()
+        stats["media_finalized"] += 1
+        body = {"media_id": int(form["media_id"]), "media_id_string": form["media_id"], "size": upload["total_bytes"]}
+        processing_info = _processing_info(upload)
+        if processing_info:
+            body["processing_info"] = {**processing_info, "state": "pending"}
+        return JSONResponse(body, status_code=201)
+    
+    return JSONResponse({"errors": [{"message": f"Unknown command {command}"}]}, status_code=400)
+
+@app.get("/1.1/media/upload.json")
+async def media_status(request: Request, command: str, media_id: str):
+    stats["requests"] += 1
+    if not _authorized(request):
+        stats["unauthorized"] += 1
+        return JSONResponse({"errors": [{"message": "Could not authenticate you", "code": 32}]}, status_code=401)
+    upload = uploads.get(media_id)
+    if command != "STATUS" or upload is None or upload["finalized_at"] is None:
+        return JSONResponse({"errors": [{"message": "Invalid media id", "code": 324}]}, status_code=400)
+    return {"media_id": int(media_id), "media_id_string": media_id, "processing_info": _processing_info(upload)}
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local stub Twitter API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9200)
+    parser.add_argument('--latency', type=float, default=0.1, help='Mean seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.03, help='Std dev of latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--limit', type=int, default=50, help='Calls allowed per endpoint per window')
+    parser.add_argument('--window', type=float, default=15.0, help='Rate-limit window in seconds')
+    parser.add_argument('--processing', type=float, default=0.0, help='Seconds of media processing after FINALIZE')
+    parser.add_argument('--consumer-secret', default='stub', help='Consumer secret used to check signatures')
+    parser.add_argument('--token-secret', default='stub', help='Access token secret used to check signatures')
+    args = parser.parse_args()
+    
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, limit=args.limit,
+                  window=args.window, processing=args.processing, consumer_secret=args.consumer_secret, token_secret=args.token_secret)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
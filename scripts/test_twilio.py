@@ -8,6 +8,7 @@ This script simulates a Twilio webhook request to test SMS processing.
 import argparse
 import requests
 import os
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -31,7 +32,7 @@ def simulate_twilio_webhook(
         "From": phone_number,
         "Body": message,
         "To": os.environ.get("TWILIO_PHONE_NUMBER", "+15557654321"),
-        "MessageSid": "SM" + "1" * 32,
+        "MessageSid": "SM" + uuid.uuid4().hex,  # Unique, or the webhook treats it as a retry
     }
     
     # In a real webhook, Twilio would sign the request
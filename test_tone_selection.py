@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'api'))
 
-from services.gpt_caption import CaptionGenerationService
+from services.gpt_caption import MOCK_CAPTIONS, CaptionGenerationService
 import asyncio
 
 async def test_tone_selection():
@@ -54,5 +54,29 @@ async def test_tone_selection():
     
     print(f"\n✅ Preferred tones: {service.preferred_tones}")
 
+async def test_caption_cache():
+    service = CaptionGenerationService()
+    
+    print("\n💾 Testing Caption Cache")
+    print("=" * 50)
+    
+    first = await service.generate_caption("Please notice me...", "whimper", tone="cruel")
+    again = await service.generate_caption("Please notice me...", "whimper", tone="cruel")
+    assert again == first, "identical request should be served from the cache"
+    assert service.stats["hits"] == 1 and service.stats["misses"] == 1
+    print(f"  Repeat request hit the cache: {again[:60]}...")
+    
+    # "auto" draws on the preferred tones, so changing them must not reuse old captions
+    service.set_preferred_tones(["clinical"])
+    await service.generate_caption("Good girl...", "moan", tone="auto")
+    service.set_preferred_tones(["possessive"])
+    caption = await service.generate_caption("Good girl...", "moan", tone="auto")
+    assert service.stats["misses"] == 3, "new preferred tones should miss the cache"
+    assert caption in MOCK_CAPTIONS["possessive"] + MOCK_CAPTIONS["mixed"]
+    print(f"  New preferred tones missed the cache: {caption[:60]}...")
+    
+    print(f"\n✅ Cache stats: {service.get_cache_stats()}")
+
 if __name__ == "__main__":
     asyncio.run(test_tone_selection())
+    asyncio.run(test_caption_cache())